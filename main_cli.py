@@ -6,7 +6,8 @@ Este é o programa que você vai executar para testar o sistema.
 Ele conecta todos os módulos:
 1. intent_parser.py - entende o que você quer
 2. order_formatter.py - formata ordens bonitas
-3. (em breve) news_fetcher.py - busca notícias
+3. news_fetcher.py - busca notícias
+4. command_processor.py - junta tudo e devolve um resultado (sem imprimir)
 
 Como usar:
 1. Execute: python main_cli.py
@@ -15,18 +16,35 @@ Como usar:
    - "notícias VALE3"
    - "venda 50 ITUB4"
 3. Veja o sistema funcionando!
+
+Modo streaming (muitos comandos de uma vez, saída em JSONL):
+   python main_cli.py --stdin < comandos.txt
+   python main_cli.py --jsonl comandos.jsonl --progresso
+   python main_cli.py --jsonl comandos.jsonl --processos 4 --tamanho-lote 256
+
+Servidor de mensagens (webhook HTTP local para o WhatsApp):
+   python main_cli.py --servidor --porta 8080
+   python main_cli.py --teste-carga 2000 --porta 8080
+
+Consulta ao histórico de ordens (log de auditoria):
+   python main_cli.py --auditoria --ticker PETR4 --conta 12345 --acao venda --desde hoje
 """
 
 # Importar nossos módulos
 import sys
 import os
+import json
+import argparse
+from datetime import datetime
 
 # Adicionar a pasta 'src' ao caminho do Python
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 # Agora podemos importar nossos módulos
-from intent_parser import analisar_comando
-from order_formatter import formatar_ordem, criar_mensagem_broker, validar_ordem
+from command_processor import executar_comando
+from utils.helpers import mostrar_progresso
+from audit_log import obter_log_auditoria
+from order_aggregator import AgregadorOrdens
 
 
 def mostrar_banner():
@@ -56,62 +74,56 @@ def mostrar_banner():
     print(banner)
 
 
-def processar_comando(comando):
+def renderizar_resultado(resultado):
     """
-    Processa um comando do usuário usando todos os módulos
+    Camada de apresentação: mostra na tela um ResultadoComando.
+    Toda a decisão já foi tomada em executar_comando.
     """
     
-    print(f"\n🔍 Analisando: '{comando}'")
+    print(f"\n🔍 Analisando: '{resultado.comando}'")
     print("-" * 50)
+    print(f"✅ Ação detectada: {resultado.acao}")
     
-    # 1. USAR O ANALISADOR PARA ENTENDER
-    resultado = analisar_comando(comando)
-    
-    print(f"✅ Ação detectada: {resultado['acao']}")
-    
-    # 2. DECIDIR O QUE FAZER BASEADO NA AÇÃO
-    if resultado['acao'] in ['compra', 'venda']:
+    if resultado.acao in ['compra', 'venda']:
         # É UMA ORDEM DE COMPRA/VENDA
-        
-        # Verificar se temos dados suficientes
-        if not resultado['ticker']:
-            print("❌ ERRO: Não consegui identificar o ticker (ex: PETR4)")
+        if resultado.erro:
+            print(f"❌ ERRO: {resultado.erro}")
             return
         
-        if not resultado['quantidade']:
-            print("❌ ERRO: Não consegui identificar a quantidade")
-            return
-        
-        print(f"   📊 Ticker: {resultado['ticker']}")
-        print(f"   🔢 Quantidade: {resultado['quantidade']}")
-        if resultado['conta']:
-            print(f"   🏦 Conta: {resultado['conta']}")
+        print(f"   📊 Ticker: {resultado.ticker}")
+        if resultado.confirmacao_necessaria:
+            print(f"   🤔 Ticker deduzido do texto (confiança {resultado.confianca:.0%}) - confirme antes de enviar")
+        print(f"   🔢 Quantidade: {resultado.quantidade}")
+        if resultado.conta:
+            print(f"   🏦 Conta: {resultado.conta}")
         
-        # Validar a ordem
-        valido, mensagem = validar_ordem(resultado)
-        print(f"   📋 Validação: {mensagem}")
+        print(f"   📋 Validação: {resultado.validacao}")
         
-        if valido:
-            # Formatar ordem bonita
-            ordem_formatada = formatar_ordem(resultado)
+        if resultado.valido and not resultado.confirmacao_necessaria:
             print("\n💼 ORDEM FORMATADA PARA BROKER:")
             print("=" * 40)
-            print(ordem_formatada)
+            print(resultado.ordem_formatada)
             
             # Mostrar também versão WhatsApp
             print("\n📱 PRONTO PARA WHATSAPP:")
             print("-" * 30)
-            msg_whatsapp = criar_mensagem_broker(resultado)
-            print(msg_whatsapp)
+            print(resultado.mensagem_broker)
             
             print("\n✅ Ação sugerida: Enviar esta mensagem ao broker via WhatsApp")
-            
-    elif resultado['acao'] == 'noticias':
+    
+    elif resultado.acao == 'noticias':
         # É UM PEDIDO DE NOTÍCIAS
-        if resultado['ticker']:
-            print(f"📰 Buscando notícias para: {resultado['ticker']}")
-            print("   (Módulo de notícias em desenvolvimento...)")
-            print("   ⏳ Em breve: notícias reais da web!")
+        if resultado.erro:
+            print(f"⚠️  {resultado.erro}")
+        
+        if resultado.confirmacao_necessaria:
+            print(f"🤔 Você quis dizer {resultado.ticker}? (confiança {resultado.confianca:.0%})")
+        elif resultado.noticias:
+            print(f"📰 Notícias para: {', '.join(resultado.tickers)}")
+            print()
+            print(resultado.noticias['formatado_whatsapp'])
+        elif resultado.ticker:
+            print(f"📰 Pedido de notícias para: {resultado.ticker}")
         else:
             print("📰 Notícias gerais do mercado")
             print("   (Módulo em desenvolvimento...)")
@@ -125,6 +137,47 @@ def processar_comando(comando):
         print("   • 'venda 50 ITUB4'")
 
 
+def perguntar_confirmacao(resultado):
+    """Pergunta ao usuário se o ticker deduzido do texto está certo."""
+    resposta = input(f"\n🤔 Você quis dizer {resultado.ticker} "
+                     f"(confiança {resultado.confianca:.0%})? (s/n): ")
+    return resposta.strip().lower() in ['s', 'sim', 'y', 'yes']
+
+
+def processar_comando(comando, exibir=True, buscar_noticias=True,
+                      auditoria=None, usuario='CLI', confirmar=None, resultado=None):
+    """
+    Processa um comando do usuário usando todos os módulos.
+    
+    Retorna um ResultadoComando. Com exibir=False nada é impresso,
+    o que permite processar muitos comandos em sequência.
+    
+    Se um log de auditoria for informado, toda ordem (compra/venda),
+    válida ou não, é registrada nele.
+    
+    Quando o ticker foi deduzido com pouca confiança, confirmar(resultado)
+    é chamada (se informada); se ela devolver True, o comando é refeito
+    com o ticker confirmado.
+    
+    resultado: ResultadoComando já calculado (ex: por um pool de processos);
+    nesse caso o comando não é executado de novo.
+    """
+    if resultado is None:
+        resultado = executar_comando(comando, buscar_noticias=buscar_noticias)
+    
+    if resultado.confirmacao_necessaria and confirmar is not None and confirmar(resultado):
+        resultado = executar_comando(comando, buscar_noticias=buscar_noticias,
+                                     ticker_confirmado=resultado.ticker)
+    
+    if auditoria is not None and resultado.acao in ['compra', 'venda']:
+        auditoria.registrar_resultado(resultado, usuario=usuario)
+    
+    if exibir:
+        renderizar_resultado(resultado)
+    
+    return resultado
+
+
 def modo_interativo():
     """Modo interativo: fica esperando comandos do usuário"""
     
@@ -152,7 +205,8 @@ def modo_interativo():
             
             # Processar o comando
             if comando:  # Se não for vazio
-                processar_comando(comando)
+                processar_comando(comando, auditoria=obter_log_auditoria(),
+                                  confirmar=perguntar_confirmacao)
             else:
                 print("⚠️  Digite algo ou 'sair' para encerrar")
                 
@@ -168,21 +222,360 @@ def modo_unico_comando(comando):
     """Modo para testar um único comando"""
     print(f"🚀 Testando comando: '{comando}'")
     print("=" * 50)
-    processar_comando(comando)
+    processar_comando(comando, auditoria=obter_log_auditoria())
+
+
+def ler_comandos(arquivo, formato_jsonl=False):
+    """
+    Gerador que lê comandos linha a linha (memória constante).
+    
+    - Texto simples: cada linha não vazia é um comando.
+    - JSONL: cada linha é um objeto com a chave "comando" (ou uma string JSON).
+    """
+    for linha in arquivo:
+        linha = linha.strip()
+        if not linha:
+            continue
+        
+        if not formato_jsonl:
+            yield linha
+            continue
+        
+        try:
+            registro = json.loads(linha)
+        except ValueError:
+            # Linha inválida vira um comando "desconhecido" em vez de parar tudo
+            yield linha
+            continue
+        
+        if isinstance(registro, dict):
+            yield str(registro.get("comando", ""))
+        else:
+            yield str(registro)
+
+
+def contar_linhas(caminho):
+    """
+    Conta os comandos de um arquivo para a barra de progresso: as mesmas
+    linhas que ler_comandos aproveita (não vazias depois do strip), lidas
+    do mesmo jeito (texto UTF-8, com as mesmas quebras de linha).
+    """
+    with open(caminho, 'r', encoding='utf-8', errors='replace') as f:
+        return sum(1 for linha in f if not linha.isspace())
+
+
+def modo_streaming(arquivo, formato_jsonl=False, mostrar_barra=False,
+                   total_linhas=None, saida=None, intervalo_progresso=1000,
+                   buscar_noticias=True, auditoria=None, agregador=None, pool=None):
+    """
+    Modo streaming: processa comandos vindos de um arquivo ou da entrada
+    padrão e escreve um resultado JSON por linha na saída padrão.
+    
+    Com um agregador (AgregadorOrdens em modo não automático), as ordens
+    válidas não levam mensagem própria ao broker: cada janela fechada
+    vira uma linha {"tipo": "lote_consolidado", ...} com a mensagem única
+    da conta e as ordens que a compõem.
+    
+    Com um pool (PoolProcessos), a análise dos comandos roda em lotes em
+    vários processos; a saída continua na ordem de entrada.
+    
+    A barra de progresso (opcional) vai para stderr, para não misturar
+    com o JSONL. Retorna o número de comandos processados.
+    """
+    saida = saida or sys.stdout
+    processados = 0
+    
+    def escrever_lotes(lotes):
+        for lote in lotes:
+            saida.write(json.dumps({"tipo": "lote_consolidado", **lote.para_dict()},
+                                   ensure_ascii=False))
+            saida.write("\n")
+    
+    comandos = ler_comandos(arquivo, formato_jsonl)
+    if pool is not None:
+        pares = pool.executar_comandos(comandos, buscar_noticias=buscar_noticias)
+    else:
+        pares = ((comando, None) for comando in comandos)
+    
+    for comando, pronto in pares:
+        lotes = []
+        try:
+            if isinstance(pronto, Exception):
+                raise pronto
+            resultado = processar_comando(
+                comando, exibir=False, buscar_noticias=buscar_noticias,
+                auditoria=auditoria, resultado=pronto
+            )
+            if agregador is not None and resultado.mensagem_broker and agregador.aceita(resultado):
+                lotes = agregador.adicionar(resultado)
+                resultado.mensagem_broker = None  # vai no lote consolidado
+            resultado = resultado.para_dict()
+        except Exception as e:
+            # Um comando com problema não deve interromper o lote inteiro
+            resultado = {"comando": comando, "erro": f"Erro inesperado: {e}"}
+        
+        saida.write(json.dumps(resultado, ensure_ascii=False))
+        saida.write("\n")
+        escrever_lotes(lotes)
+        processados += 1
+        
+        if mostrar_barra and processados % intervalo_progresso == 0:
+            mostrar_progresso(processados, total_linhas, "comandos processados",
+                              arquivo=sys.stderr)
+    
+    if agregador is not None:
+        escrever_lotes(agregador.encerrar())
+    
+    if mostrar_barra:
+        mostrar_progresso(processados, total_linhas or processados,
+                          "comandos processados", arquivo=sys.stderr)
+    
+    saida.flush()
+    return processados
+
+
+def emitir_lote(lote):
+    """Mostra a mensagem consolidada do lote (lotes que se compensaram não geram mensagem)."""
+    if lote.mensagem_broker is not None:
+        print(lote.mensagem_broker)
+
+
+def modo_servidor(argumentos, agregador=None):
+    """
+    Sobe o servidor asyncio de mensagens (webhook HTTP e/ou socket unix)
+    e fica atendendo até Ctrl+C.
+    """
+    import asyncio
+    from message_server import ServidorMensagens
+    
+    servidor = ServidorMensagens(
+        porta=argumentos.porta,
+        caminho_socket=argumentos.socket,
+        buscar_noticias=not argumentos.sem_noticias,
+        auditoria=obter_log_auditoria(),
+        agregador=agregador,
+        workers_ordens=argumentos.workers_ordens,
+        workers_noticias=argumentos.workers_noticias
+    )
+    
+    print(f"🌐 Servidor de mensagens em http://127.0.0.1:{argumentos.porta}/mensagens"
+          + (f" e {argumentos.socket}" if argumentos.socket else ""))
+    print("   POST {\"comando\": \"compra 100 PETR4 conta 12345\"} | GET /saude | Ctrl+C para sair")
+    
+    atualizador = None
+    if argumentos.atualizar_noticias and not argumentos.sem_noticias:
+        # Notícias mais pedidas renovadas antes de vencer + aquecimento da carteira IBOV
+        from news_refresher import AtualizadorNoticias
+        atualizador = AtualizadorNoticias().iniciar()
+        print("   🔄 Atualização de notícias em segundo plano ligada")
+    
+    try:
+        asyncio.run(servidor.servir_para_sempre())
+    except KeyboardInterrupt:
+        print("\n👋 Servidor encerrado.")
+    finally:
+        if atualizador is not None:
+            atualizador.parar(esperar=False)
+        if agregador is not None:
+            # Janelas ainda abertas: fecha e envia (ao_emitir) antes de sair
+            lotes = agregador.encerrar()
+            if lotes:
+                print(f"   📦 {len(lotes)} lote(s) pendente(s) emitido(s) no encerramento")
+
+
+def modo_teste_carga(argumentos):
+    """Dispara mensagens contra um servidor já rodando e mostra o relatório."""
+    import asyncio
+    from message_server import testar_carga
+    
+    relatorio = asyncio.run(testar_carga(
+        porta=argumentos.porta, total=argumentos.teste_carga,
+        simultaneas=argumentos.simultaneas, caminho_socket=argumentos.socket
+    ))
+    print(json.dumps(relatorio, ensure_ascii=False, indent=2))
+
+
+def converter_data_consulta(texto):
+    """Converte 'hoje', '2026-01-30' ou '2026-01-30 14:00' em datetime."""
+    if texto is None:
+        return None
+    if texto.lower() == 'hoje':
+        return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return datetime.fromisoformat(texto)
+
+
+def modo_auditoria(argumentos, saida=None):
+    """
+    Consulta o log de auditoria e escreve os registros encontrados
+    em JSONL. Usa o índice dos segmentos (não varre os arquivos).
+    Retorna o número de registros encontrados.
+    """
+    saida = saida or sys.stdout
+    encontrados = 0
+    
+    registros = obter_log_auditoria().consultar(
+        ticker=argumentos.ticker,
+        conta=argumentos.conta,
+        acao=argumentos.acao,
+        usuario=argumentos.usuario,
+        desde=converter_data_consulta(argumentos.desde),
+        ate=converter_data_consulta(argumentos.ate),
+        limite=argumentos.limite
+    )
+    
+    for registro in registros:
+        saida.write(json.dumps(registro, ensure_ascii=False))
+        saida.write("\n")
+        encontrados += 1
+    
+    print(f"🔎 {encontrados} registro(s) encontrado(s)", file=sys.stderr)
+    saida.flush()
+    return encontrados
+
+
+def criar_parser_argumentos():
+    """Define os argumentos aceitos pela linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Assistente Financeiro WhatsApp (MVP)"
+    )
+    parser.add_argument(
+        'comando', nargs='*',
+        help="Comando único a testar (ex: compra 100 PETR4 conta 12345)"
+    )
+    parser.add_argument(
+        '--stdin', action='store_true',
+        help="Lê um comando por linha da entrada padrão e escreve JSONL"
+    )
+    parser.add_argument(
+        '--jsonl', metavar='ARQUIVO',
+        help="Lê comandos de um arquivo JSONL ({\"comando\": ...}); use - para stdin"
+    )
+    parser.add_argument(
+        '--progresso', action='store_true',
+        help="Mostra barra de progresso (em stderr) no modo streaming"
+    )
+    parser.add_argument(
+        '--sem-noticias', action='store_true',
+        help="No modo streaming, não busca notícias na web (só reconhece o pedido)"
+    )
+    parser.add_argument(
+        '--consolidar', type=float, metavar='SEGUNDOS',
+        help="No streaming ou no servidor, junta as ordens de cada conta por SEGUNDOS e "
+             "compensa compras e vendas do mesmo ticker (uma mensagem por conta)"
+    )
+    parser.add_argument(
+        '--processos', type=int, metavar='N',
+        help="No modo streaming, processa os comandos em N processos (0 = um por núcleo)"
+    )
+    parser.add_argument(
+        '--tamanho-lote', type=int, default=256, metavar='N',
+        help="Comandos enviados de uma vez a cada processo (padrão: 256)"
+    )
+    
+    servidor = parser.add_argument_group('servidor de mensagens')
+    servidor.add_argument(
+        '--servidor', action='store_true',
+        help="Sobe o servidor asyncio (POST /mensagens) em vez do modo interativo"
+    )
+    servidor.add_argument('--porta', type=int, default=8080, help="Porta HTTP local (padrão: 8080)")
+    servidor.add_argument('--socket', metavar='CAMINHO', help="Também atende num socket unix")
+    servidor.add_argument('--workers-ordens', type=int, default=2, metavar='N',
+                          help="Workers dedicados a compra/venda (padrão: 2)")
+    servidor.add_argument('--workers-noticias', type=int, default=4, metavar='N',
+                          help="Workers para buscas de notícias (padrão: 4)")
+    servidor.add_argument(
+        '--atualizar-noticias', action='store_true',
+        help="Renova em segundo plano as notícias mais pedidas antes de vencerem, serve as "
+             "vencidas na hora e aquece a carteira do Ibovespa antes da abertura"
+    )
+    servidor.add_argument(
+        '--teste-carga', type=int, metavar='N',
+        help="Envia N mensagens a um servidor já rodando e mede vazão/latência"
+    )
+    servidor.add_argument('--simultaneas', type=int, default=100,
+                          help="Mensagens simultâneas no teste de carga (padrão: 100)")
+    
+    consulta = parser.add_argument_group(
+        'consulta ao log de auditoria',
+        "Use --auditoria com os filtros abaixo (ex: --ticker PETR4 --conta 12345 --desde hoje)"
+    )
+    consulta.add_argument(
+        '--auditoria', action='store_true',
+        help="Consulta o histórico de ordens e escreve os registros em JSONL"
+    )
+    consulta.add_argument('--ticker', help="Filtra por ticker (ex: PETR4)")
+    consulta.add_argument('--conta', help="Filtra por conta (ex: 12345)")
+    consulta.add_argument('--acao', choices=['compra', 'venda'], help="Filtra por ação")
+    consulta.add_argument('--usuario', help="Filtra por usuário")
+    consulta.add_argument('--desde', help="Início do período: 'hoje', AAAA-MM-DD ou 'AAAA-MM-DD HH:MM'")
+    consulta.add_argument('--ate', help="Fim do período (mesmo formato de --desde)")
+    consulta.add_argument('--limite', type=int, help="Número máximo de registros")
+    return parser
 
 
 # ====== PROGRAMA PRINCIPAL ======
 if __name__ == "__main__":
     """
     Ponto de entrada do programa.
-    Decide se roda em modo interativo ou comando único.
+    Decide se roda em modo interativo, comando único ou streaming.
     """
     
-    # Verificar se recebeu argumentos (modo comando único)
-    if len(sys.argv) > 1:
+    argumentos = criar_parser_argumentos().parse_args()
+    agregador = None
+    if argumentos.consolidar:
+        # No servidor as janelas fecham sozinhas (thread); no streaming, em sequência
+        agregador = AgregadorOrdens(
+            janela_segundos=argumentos.consolidar,
+            automatico=argumentos.servidor,
+            ao_emitir=emitir_lote if argumentos.servidor else None
+        )
+    
+    pool = None
+    if argumentos.processos is not None and (argumentos.jsonl or argumentos.stdin):
+        from process_pool import PoolProcessos
+        pool = PoolProcessos(workers=argumentos.processos or None,
+                             tamanho_lote=argumentos.tamanho_lote)
+    
+    if argumentos.auditoria:
+        # Consulta ao histórico de ordens
+        modo_auditoria(argumentos)
+    elif argumentos.servidor:
+        # Servidor de mensagens (webhook local)
+        modo_servidor(argumentos, agregador)
+    elif argumentos.teste_carga:
+        # Cliente de teste de carga contra um servidor rodando
+        modo_teste_carga(argumentos)
+    elif argumentos.jsonl:
+        # Modo streaming a partir de arquivo JSONL (ou stdin com "-")
+        if argumentos.jsonl == '-':
+            modo_streaming(sys.stdin, formato_jsonl=True,
+                           mostrar_barra=argumentos.progresso,
+                           buscar_noticias=not argumentos.sem_noticias,
+                           auditoria=obter_log_auditoria(),
+                           agregador=agregador, pool=pool)
+        else:
+            total = contar_linhas(argumentos.jsonl) if argumentos.progresso else None
+            with open(argumentos.jsonl, 'r', encoding='utf-8') as arquivo:
+                modo_streaming(arquivo, formato_jsonl=True,
+                               mostrar_barra=argumentos.progresso,
+                               total_linhas=total,
+                               buscar_noticias=not argumentos.sem_noticias,
+                               auditoria=obter_log_auditoria(),
+                               agregador=agregador, pool=pool)
+    elif argumentos.stdin:
+        # Modo streaming: um comando por linha na entrada padrão
+        modo_streaming(sys.stdin, mostrar_barra=argumentos.progresso,
+                       buscar_noticias=not argumentos.sem_noticias,
+                       auditoria=obter_log_auditoria(),
+                       agregador=agregador, pool=pool)
+    elif argumentos.comando:
         # Juntar todos os argumentos em um comando
-        comando_teste = " ".join(sys.argv[1:])
+        comando_teste = " ".join(argumentos.comando)
         modo_unico_comando(comando_teste)
     else:
         # Modo interativo (padrão)
         modo_interativo()
+    
+    if pool is not None:
+        # Os lotes já foram todos consumidos; só fecha os processos
+        pool.encerrar()
@@ -9,18 +9,29 @@ __version__ = "1.0.0-beta"
 __author__ = "SardinhaPlantao"
 
 # Exportar funções principais para fácil importação
-from .intent_parser import analisar_comando
-from .order_formatter import formatar_ordem, criar_mensagem_broker, validar_ordem
-from .news_fetcher import buscar_noticias_por_ticker
+from .intent_parser import analisar_comando, analisar_comandos, analisar_comandos_colunar
+from .order_formatter import formatar_ordem, criar_mensagem_broker, validar_ordem, validar_ordens
+from .order_templates import renderizar_ordem, renderizar_ordens
+from .news_fetcher import buscar_noticias_por_ticker, buscar_noticias_por_ticker_async, buscar_noticias_em_lote
+from .command_processor import executar_comando, ResultadoComando
 from .utils.helpers import normalizar_texto, validar_ticker, criar_log
 
 # Lista do que está disponível
 __all__ = [
     'analisar_comando',
+    'analisar_comandos',
+    'analisar_comandos_colunar',
     'formatar_ordem',
     'criar_mensagem_broker',
     'validar_ordem',
+    'validar_ordens',
+    'renderizar_ordem',
+    'renderizar_ordens',
     'buscar_noticias_por_ticker',
+    'buscar_noticias_por_ticker_async',
+    'buscar_noticias_em_lote',
+    'executar_comando',
+    'ResultadoComando',
     'normalizar_texto',
     'validar_ticker',
     'criar_log'
@@ -0,0 +1,417 @@
+"""
+LOG DE AUDITORIA DE ORDENS (JSONL + ÍNDICE)
+
+Cada ordem processada vira um registro JSON numa linha:
+    {"ts": 1769781015.2, "data_hora": "2026-01-30T14:30:15", "usuario": "CLI",
+     "comando": "...", "acao": "venda", "ticker": "PETR4", "quantidade": 100,
+     "conta": "12345", "valido": true, "validacao": "✅ Ordem válida"}
+
+Os registros ficam em segmentos (logs/auditoria/segmento_000001.jsonl, ...).
+Cada segmento tem um índice ao lado (segmento_000001.idx.json) com:
+- posição (byte) de cada registro por ticker e por conta
+- primeiro/último horário e uma amostra (horário → posição) a cada N registros
+
+Assim, "todas as vendas de PETR4 da conta 12345 hoje" lê só as linhas
+certas (seek direto), sem varrer os arquivos inteiros.
+"""
+
+import atexit
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+# Configurações padrão
+PASTA_PADRAO = 'logs/auditoria'
+MAX_REGISTROS_SEGMENTO = 50000
+SALVAR_INDICE_A_CADA = 1000
+AMOSTRA_TEMPO_A_CADA = 256
+
+
+class _IndiceSegmento:
+    """Índice de um segmento: posições por ticker, por conta e por tempo."""
+
+    def __init__(self):
+        self.tickers = {}
+        self.contas = {}
+        self.tempos = []     # amostras: horário
+        self.posicoes = []   # amostras: posição do registro correspondente
+        self.ts_min = None
+        self.ts_max = None
+        self.total = 0
+        self.bytes_indexados = 0
+
+    def adicionar(self, registro, posicao, fim):
+        """Inclui no índice o registro gravado entre posicao e fim."""
+        ts = registro['ts']
+
+        if registro.get('ticker'):
+            self.tickers.setdefault(registro['ticker'], []).append(posicao)
+        if registro.get('conta'):
+            self.contas.setdefault(registro['conta'], []).append(posicao)
+
+        if self.total % AMOSTRA_TEMPO_A_CADA == 0:
+            self.tempos.append(ts)
+            self.posicoes.append(posicao)
+
+        self.ts_min = ts if self.ts_min is None else min(self.ts_min, ts)
+        self.ts_max = ts if self.ts_max is None else max(self.ts_max, ts)
+        self.total += 1
+        self.bytes_indexados = fim
+
+    def para_dict(self):
+        return {
+            'tickers': self.tickers,
+            'contas': self.contas,
+            'tempos': self.tempos,
+            'posicoes': self.posicoes,
+            'ts_min': self.ts_min,
+            'ts_max': self.ts_max,
+            'total': self.total,
+            'bytes_indexados': self.bytes_indexados
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        indice = cls()
+        for nome, valor in dados.items():
+            setattr(indice, nome, valor)
+        return indice
+
+
+class LogAuditoria:
+    """
+    Grava registros de auditoria em segmentos JSONL com índice e
+    responde consultas filtradas usando o índice.
+    """
+
+    def __init__(self, pasta=PASTA_PADRAO, max_registros_segmento=MAX_REGISTROS_SEGMENTO,
+                 salvar_indice_a_cada=SALVAR_INDICE_A_CADA):
+        self.pasta = pasta
+        self.max_registros_segmento = max_registros_segmento
+        self.salvar_indice_a_cada = salvar_indice_a_cada
+
+        self._trava = threading.Lock()
+        self._arquivo = None
+        self._numero = None
+        self._indice = None
+        self._nao_salvos = 0
+
+    # ====== CAMINHOS ======
+
+    def _caminho_segmento(self, numero):
+        return os.path.join(self.pasta, f"segmento_{numero:06d}.jsonl")
+
+    @staticmethod
+    def _caminho_indice(caminho_segmento):
+        return caminho_segmento[:-len('.jsonl')] + '.idx.json'
+
+    def _segmentos(self):
+        """Lista os segmentos existentes em ordem."""
+        return sorted(glob.glob(os.path.join(self.pasta, 'segmento_*.jsonl')))
+
+    # ====== ESCRITA ======
+
+    def _abrir_segmento_atual(self):
+        """Abre o último segmento (ou cria o primeiro) para continuar gravando."""
+        os.makedirs(self.pasta, exist_ok=True)
+
+        segmentos = self._segmentos()
+        if segmentos:
+            caminho = segmentos[-1]
+            self._numero = int(os.path.basename(caminho)[len('segmento_'):-len('.jsonl')])
+        else:
+            self._numero = 1
+            caminho = self._caminho_segmento(self._numero)
+
+        self._indice = self._carregar_indice(caminho)
+        self._arquivo = open(caminho, 'ab')
+
+        if self._indice.total >= self.max_registros_segmento:
+            self._trocar_segmento()
+
+    def _trocar_segmento(self):
+        """Fecha o segmento atual (salvando o índice) e começa o próximo."""
+        self._salvar_indice()
+        self._arquivo.close()
+
+        self._numero += 1
+        self._indice = _IndiceSegmento()
+        self._arquivo = open(self._caminho_segmento(self._numero), 'ab')
+
+    def _salvar_indice(self):
+        """Grava o índice do segmento atual no arquivo ao lado (troca atômica)."""
+        self._arquivo.flush()
+        caminho = self._caminho_indice(self._caminho_segmento(self._numero))
+        temporario = caminho + '.tmp'
+
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self._indice.para_dict(), f, separators=(',', ':'))
+        os.replace(temporario, caminho)
+        self._nao_salvos = 0
+
+    def registrar(self, acao, ticker=None, quantidade=None, conta=None, valido=None,
+                  validacao=None, usuario='SISTEMA', comando=None, ts=None, **extras):
+        """
+        Grava um registro de auditoria e o inclui no índice.
+        Retorna o registro gravado.
+        """
+        ts = time.time() if ts is None else ts
+        registro = {
+            'ts': ts,
+            'data_hora': datetime.fromtimestamp(ts).isoformat(timespec='seconds'),
+            'usuario': usuario,
+            'comando': comando,
+            'acao': acao,
+            'ticker': ticker,
+            'quantidade': quantidade,
+            'conta': conta,
+            'valido': valido,
+            'validacao': validacao
+        }
+        registro.update(extras)
+        linha = (json.dumps(registro, ensure_ascii=False) + '\n').encode('utf-8')
+
+        with self._trava:
+            if self._arquivo is None:
+                self._abrir_segmento_atual()
+            elif self._indice.total >= self.max_registros_segmento:
+                self._trocar_segmento()
+
+            posicao = self._arquivo.tell()
+            self._arquivo.write(linha)
+            self._indice.adicionar(registro, posicao, posicao + len(linha))
+
+            self._nao_salvos += 1
+            if self._nao_salvos >= self.salvar_indice_a_cada:
+                self._salvar_indice()
+
+        return registro
+
+    def registrar_resultado(self, resultado, usuario='SISTEMA'):
+        """Atalho: grava um ResultadoComando (ou dicionário equivalente)."""
+        dados = resultado.para_dict() if hasattr(resultado, 'para_dict') else resultado
+        return self.registrar(
+            dados['acao'], dados.get('ticker'), dados.get('quantidade'), dados.get('conta'),
+            dados.get('valido'), dados.get('validacao') or dados.get('erro'),
+            usuario=usuario, comando=dados.get('comando')
+        )
+
+    def descarregar(self):
+        """Grava em disco os dados e o índice pendentes."""
+        with self._trava:
+            if self._arquivo is not None:
+                self._salvar_indice()
+
+    def fechar(self):
+        """Salva o índice e fecha o segmento atual."""
+        with self._trava:
+            if self._arquivo is not None:
+                self._salvar_indice()
+                self._arquivo.close()
+                self._arquivo = None
+
+    # ====== LEITURA ======
+
+    def _carregar_indice(self, caminho_segmento):
+        """
+        Lê o índice de um segmento. Se o índice estiver atrasado (ex: o
+        programa parou antes de salvá-lo), indexa só o trecho que faltou.
+        """
+        caminho_indice = self._caminho_indice(caminho_segmento)
+        indice = _IndiceSegmento()
+
+        if os.path.exists(caminho_indice):
+            try:
+                with open(caminho_indice, 'r', encoding='utf-8') as f:
+                    indice = _IndiceSegmento.de_dict(json.load(f))
+            except (ValueError, OSError):
+                indice = _IndiceSegmento()
+
+        if os.path.exists(caminho_segmento) and \
+                os.path.getsize(caminho_segmento) > indice.bytes_indexados:
+            with open(caminho_segmento, 'rb') as f:
+                f.seek(indice.bytes_indexados)
+                posicao = indice.bytes_indexados
+                for linha in f:
+                    fim = posicao + len(linha)
+                    if linha.endswith(b'\n'):
+                        try:
+                            indice.adicionar(json.loads(linha), posicao, fim)
+                        except ValueError:
+                            pass  # linha corrompida: ignora
+                    posicao = fim
+
+        return indice
+
+    def consultar(self, ticker=None, conta=None, acao=None, usuario=None,
+                  desde=None, ate=None, limite=None):
+        """
+        Gerador com os registros que atendem a todos os filtros informados.
+
+        - ticker / conta: usam o índice (só as linhas certas são lidas)
+        - desde / ate: horários (epoch ou datetime); pulam segmentos inteiros
+          e, sem ticker/conta, começam a leitura perto do horário pedido
+        - acao / usuario: conferidos em cada registro lido
+        """
+        desde = _para_epoch(desde)
+        ate = _para_epoch(ate)
+        ticker = ticker.upper() if ticker else None
+        encontrados = 0
+
+        with self._trava:
+            if self._arquivo is not None:
+                self._salvar_indice()
+            segmentos = self._segmentos()
+
+        for caminho in segmentos:
+            if self._arquivo is not None and caminho == self._caminho_segmento(self._numero):
+                with self._trava:
+                    indice = _IndiceSegmento.de_dict(self._indice.para_dict())
+            else:
+                indice = self._carregar_indice(caminho)
+
+            if not indice.total:
+                continue
+            if desde is not None and indice.ts_max < desde:
+                continue
+            if ate is not None and indice.ts_min > ate:
+                continue
+
+            for registro in self._ler_candidatos(caminho, indice, ticker, conta, desde):
+                if ticker and registro.get('ticker') != ticker:
+                    continue
+                if conta and registro.get('conta') != conta:
+                    continue
+                if acao and registro.get('acao') != acao:
+                    continue
+                if usuario and registro.get('usuario') != usuario:
+                    continue
+                if desde is not None and registro['ts'] < desde:
+                    continue
+                if ate is not None and registro['ts'] > ate:
+                    continue
+
+                yield registro
+                encontrados += 1
+                if limite and encontrados >= limite:
+                    return
+
+    @staticmethod
+    def _ler_candidatos(caminho, indice, ticker, conta, desde):
+        """Lê do segmento só as linhas apontadas pelo índice."""
+        listas = []
+        if ticker:
+            listas.append(indice.tickers.get(ticker, []))
+        if conta:
+            listas.append(indice.contas.get(conta, []))
+
+        with open(caminho, 'rb') as f:
+            if listas:
+                # Interseção das posições (ticker E conta)
+                posicoes = set(min(listas, key=len))
+                for outra in listas:
+                    posicoes.intersection_update(outra)
+
+                for posicao in sorted(posicoes):
+                    if posicao >= indice.bytes_indexados:
+                        continue
+                    f.seek(posicao)
+                    yield json.loads(f.readline())
+                return
+
+            # Sem ticker/conta: começa na amostra de tempo anterior a "desde"
+            if desde is not None and indice.tempos:
+                amostra = max(bisect.bisect_right(indice.tempos, desde) - 1, 0)
+                f.seek(indice.posicoes[amostra])
+
+            while f.tell() < indice.bytes_indexados:
+                linha = f.readline()
+                if not linha:
+                    break
+                yield json.loads(linha)
+
+
+def _para_epoch(valor):
+    """Aceita None, epoch, datetime ou texto ISO ('2026-01-30', '2026-01-30 14:00')."""
+    if valor is None or isinstance(valor, (int, float)):
+        return valor
+    if isinstance(valor, str):
+        valor = datetime.fromisoformat(valor)
+    return valor.timestamp()
+
+
+# ====== LOG PADRÃO ======
+_log_padrao = None
+_trava_log = threading.Lock()
+
+
+def obter_log_auditoria(pasta=PASTA_PADRAO):
+    """Retorna o log de auditoria compartilhado (criado na primeira chamada)."""
+    global _log_padrao
+
+    if _log_padrao is None:
+        with _trava_log:
+            if _log_padrao is None:
+                _log_padrao = LogAuditoria(pasta)
+                atexit.register(_log_padrao.fechar)
+    return _log_padrao
+
+
+# ====== FUNÇÃO DE TESTE ======
+def testar_auditoria():
+    """Testa gravação e consulta pelo índice numa pasta temporária"""
+
+    import random
+    import tempfile
+
+    print("🧪 TESTANDO LOG DE AUDITORIA")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        log = LogAuditoria(pasta, max_registros_segmento=20000)
+        aleatorio = random.Random(1)
+        inicio = time.time() - 3600
+
+        for i in range(60000):
+            log.registrar(
+                aleatorio.choice(['compra', 'venda']),
+                aleatorio.choice(['PETR4', 'VALE3', 'ITUB4', 'BBDC4', 'WEGE3']),
+                aleatorio.randint(1, 1000),
+                str(aleatorio.randint(10000, 10099)),
+                True, "✅ Ordem válida", usuario='TESTE', ts=inicio + i * 0.05
+            )
+        log.fechar()
+
+        print(f"\n   Segmentos gravados: {len(log._segmentos())}")
+
+        t0 = time.perf_counter()
+        vendas = list(LogAuditoria(pasta).consultar(ticker='PETR4', conta='10042', acao='venda'))
+        duracao_indice = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        varredura = []
+        for caminho in log._segmentos():
+            with open(caminho, 'rb') as f:
+                for linha in f:
+                    registro = json.loads(linha)
+                    if registro['ticker'] == 'PETR4' and registro['conta'] == '10042' \
+                            and registro['acao'] == 'venda':
+                        varredura.append(registro)
+        duracao_varredura = time.perf_counter() - t0
+
+        print(f"   Vendas de PETR4 na conta 10042: {len(vendas)} "
+              f"(varredura completa achou {len(varredura)})")
+        print(f"   ⏱️  Com índice: {duracao_indice * 1000:.1f} ms | "
+              f"varredura: {duracao_varredura * 1000:.1f} ms")
+
+        ultimos = list(log.consultar(desde=inicio + 2990))
+        print(f"   Registros dos últimos 10s: {len(ultimos)}")
+
+
+# Executar teste se rodar arquivo diretamente
+if __name__ == "__main__":
+    testar_auditoria()
@@ -0,0 +1,385 @@
+"""
+DISJUNTOR (CIRCUIT BREAKER) E TIMEOUT ADAPTATIVO POR FONTE DE NOTÍCIAS
+
+Quando uma fonte (ex: Google News) fica lenta ou começa a nos bloquear,
+cada busca esperaria o timeout inteiro antes de cair no fallback, e uma
+única queda prenderia todos os workers. Cada fonte tem um disjuntor:
+
+- fechado:     chamadas normais; guarda o resultado das últimas
+               janela_chamadas. Se a taxa de falhas passar de
+               taxa_falha_maxima (com pelo menos minimo_chamadas), abre
+- aberto:      nenhuma chamada sai; chamar() levanta CircuitoAberto na
+               hora (quem chama usa o cache ou o fallback)
+- meio_aberto: depois de espera_aberto_segundos, deixa passar
+               chamadas_teste chamadas; sucesso fecha, falha abre de novo
+
+O timeout de cada chamada acompanha a fonte: p99 das últimas latências
+× fator_timeout, entre timeout_minimo e o máximo pedido. Chamadas que
+estouram o timeout entram nas latências com o próprio timeout, para ele
+crescer se a fonte ficar mais lenta (e não só diminuir). As chamadas de
+teste do meio aberto usam sempre o timeout máximo.
+
+Exemplo:
+    disjuntor = obter_disjuntor('google_news')
+    resposta = disjuntor.chamar(lambda timeout: cliente.get(url, timeout=timeout))
+    estatisticas_disjuntores()
+"""
+
+import threading
+import time
+from collections import deque
+
+try:
+    from .utils.helpers import percentil
+except ImportError:
+    from utils.helpers import percentil
+
+# Estados
+FECHADO = 'fechado'
+ABERTO = 'aberto'
+MEIO_ABERTO = 'meio_aberto'
+
+# Configurações padrão
+JANELA_CHAMADAS = 20
+MINIMO_CHAMADAS = 5
+TAXA_FALHA_MAXIMA = 0.5
+ESPERA_ABERTO_SEGUNDOS = 30.0
+CHAMADAS_TESTE = 1
+TIMEOUT_MAXIMO_SEGUNDOS = 10.0
+TIMEOUT_MINIMO_SEGUNDOS = 1.0
+FATOR_TIMEOUT = 1.5
+MINIMO_AMOSTRAS_TIMEOUT = 10
+AMOSTRAS_LATENCIA = 200
+
+
+class CircuitoAberto(Exception):
+    """A fonte está com o circuito aberto: a chamada nem foi feita."""
+
+
+def _e_timeout(erro):
+    """TimeoutError, ou uma exceção de timeout das bibliotecas HTTP (requests.Timeout...)."""
+    return isinstance(erro, TimeoutError) or any('Timeout' in classe.__name__
+                                                  for classe in type(erro).__mro__)
+
+
+class Disjuntor:
+    """
+    Disjuntor de uma fonte, seguro para várias threads.
+    """
+
+    def __init__(self, nome, janela_chamadas=JANELA_CHAMADAS, minimo_chamadas=MINIMO_CHAMADAS,
+                 taxa_falha_maxima=TAXA_FALHA_MAXIMA, espera_aberto_segundos=ESPERA_ABERTO_SEGUNDOS,
+                 chamadas_teste=CHAMADAS_TESTE, timeout_maximo=TIMEOUT_MAXIMO_SEGUNDOS,
+                 timeout_minimo=TIMEOUT_MINIMO_SEGUNDOS, fator_timeout=FATOR_TIMEOUT):
+        self.nome = nome
+        self.minimo_chamadas = minimo_chamadas
+        self.taxa_falha_maxima = taxa_falha_maxima
+        self.espera_aberto_segundos = espera_aberto_segundos
+        self.chamadas_teste = chamadas_teste
+        self.timeout_maximo = timeout_maximo
+        self.timeout_minimo = timeout_minimo
+        self.fator_timeout = fator_timeout
+
+        self._trava = threading.Lock()
+        self._janela = deque(maxlen=janela_chamadas)  # True = falha
+        self._latencias = deque(maxlen=AMOSTRAS_LATENCIA)
+        self._estado = FECHADO
+        self._aberto_em = 0.0
+        self._testes_em_andamento = 0
+
+        # Contadores
+        self.chamadas = 0
+        self.sucessos = 0
+        self.falhas = 0
+        self.rejeitadas = 0  # falharam rápido com o circuito aberto
+        self.aberturas = 0
+
+    # ====== ESTADO ======
+
+    def _atualizar_estado(self, agora):
+        """Aberto há tempo suficiente → meio aberto (chamar com a trava)."""
+        if self._estado == ABERTO and agora - self._aberto_em >= self.espera_aberto_segundos:
+            self._estado = MEIO_ABERTO
+            self._testes_em_andamento = 0
+
+    def _abrir(self, agora):
+        self._estado = ABERTO
+        self._aberto_em = agora
+        self._janela.clear()
+        self.aberturas += 1
+
+    @property
+    def estado(self):
+        with self._trava:
+            self._atualizar_estado(time.monotonic())
+            return self._estado
+
+    def aberto(self):
+        """True se uma chamada agora seria rejeitada."""
+        return self.estado == ABERTO
+
+    def timeout(self, maximo=None):
+        """
+        Timeout para a próxima chamada: p99 das latências (sucessos e
+        timeouts) × fator_timeout, entre timeout_minimo e maximo (ou
+        timeout_maximo).
+        """
+        maximo = self.timeout_maximo if maximo is None else maximo
+        with self._trava:
+            if len(self._latencias) < MINIMO_AMOSTRAS_TIMEOUT:
+                return maximo
+            p99 = percentil(sorted(self._latencias), 99)
+        return min(maximo, max(self.timeout_minimo, p99 * self.fator_timeout))
+
+    # ====== CHAMADAS ======
+
+    def _reservar(self):
+        """
+        Decide se a chamada pode sair: FECHADO, MEIO_ABERTO (chamada de
+        teste) ou None se não puder (conta a rejeição).
+        """
+        with self._trava:
+            self._atualizar_estado(time.monotonic())
+
+            if self._estado == FECHADO:
+                return FECHADO
+            if self._estado == MEIO_ABERTO and self._testes_em_andamento < self.chamadas_teste:
+                self._testes_em_andamento += 1
+                return MEIO_ABERTO
+
+            self.rejeitadas += 1
+            return None
+
+    def _desistir(self, reserva):
+        """A chamada foi interrompida (cancelada, Ctrl+C): libera a vaga de teste sem contar falha."""
+        with self._trava:
+            if reserva == MEIO_ABERTO and self._estado == MEIO_ABERTO:
+                self._testes_em_andamento = max(self._testes_em_andamento - 1, 0)
+
+    def registrar(self, sucesso, segundos=None, estourou_timeout=False):
+        """
+        Registra o resultado de uma chamada feita fora de chamar(). A
+        latência entra nas amostras do timeout nos sucessos e nas falhas
+        por timeout (estourou_timeout=True, segundos = o timeout usado).
+        """
+        agora = time.monotonic()
+        with self._trava:
+            self.chamadas += 1
+            if sucesso:
+                self.sucessos += 1
+            else:
+                self.falhas += 1
+            if segundos is not None and (sucesso or estourou_timeout):
+                self._latencias.append(segundos)
+
+            if self._estado == MEIO_ABERTO:
+                self._testes_em_andamento = max(self._testes_em_andamento - 1, 0)
+                if sucesso:
+                    self._estado = FECHADO
+                    self._janela.clear()
+                else:
+                    self._abrir(agora)
+                return
+
+            if self._estado == ABERTO:
+                # Chamada que saiu antes de o circuito abrir: só conta
+                return
+
+            self._janela.append(not sucesso)
+            if len(self._janela) >= self.minimo_chamadas and \
+                    sum(self._janela) / len(self._janela) > self.taxa_falha_maxima:
+                self._abrir(agora)
+
+    def chamar(self, funcao, *args, timeout_maximo=None, **kwargs):
+        """
+        Executa funcao(*args, timeout=..., **kwargs) protegida pelo
+        disjuntor. Levanta CircuitoAberto sem chamar nada se o circuito
+        estiver aberto. Qualquer Exception da função conta como falha (um
+        timeout também como latência igual ao timeout); cancelamento e
+        KeyboardInterrupt não são culpa da fonte e não contam.
+        """
+        reserva = self._reservar()
+        if reserva is None:
+            raise CircuitoAberto(f"Circuito aberto para {self.nome}")
+
+        if reserva == MEIO_ABERTO:
+            # O teste decide se a fonte voltou: não pode estourar um timeout
+            # encolhido pelas latências de antes da queda
+            timeout = self.timeout_maximo if timeout_maximo is None else timeout_maximo
+        else:
+            timeout = self.timeout(timeout_maximo)
+        inicio = time.perf_counter()
+        try:
+            resultado = funcao(*args, timeout=timeout, **kwargs)
+        except Exception as erro:
+            segundos = time.perf_counter() - inicio
+            if _e_timeout(erro) or segundos >= timeout:
+                self.registrar(False, max(segundos, timeout), estourou_timeout=True)
+            else:
+                self.registrar(False)
+            raise
+        except BaseException:
+            self._desistir(reserva)
+            raise
+
+        self.registrar(True, time.perf_counter() - inicio)
+        return resultado
+
+    def estatisticas(self):
+        """Estado, aberturas, contadores, taxa de falha e timeout atual."""
+        timeout = self.timeout()
+        with self._trava:
+            self._atualizar_estado(time.monotonic())
+            latencias = sorted(self._latencias)
+            return {
+                'estado': self._estado,
+                'aberturas': self.aberturas,
+                'chamadas': self.chamadas,
+                'sucessos': self.sucessos,
+                'falhas': self.falhas,
+                'rejeitadas': self.rejeitadas,
+                'taxa_falha_janela': (sum(self._janela) / len(self._janela)) if self._janela else 0.0,
+                'timeout_atual': round(timeout, 3),
+                'latencia_p50': percentil(latencias, 50),
+                'latencia_p99': percentil(latencias, 99)
+            }
+
+
+# ====== DISJUNTORES POR FONTE ======
+_disjuntores = {}
+_opcoes_disjuntores = {}
+_trava_disjuntores = threading.Lock()
+
+
+def obter_disjuntor(nome):
+    """Retorna o disjuntor da fonte (criado no primeiro uso)."""
+    disjuntor = _disjuntores.get(nome)
+    if disjuntor is None:
+        with _trava_disjuntores:
+            disjuntor = _disjuntores.get(nome)
+            if disjuntor is None:
+                disjuntor = Disjuntor(nome, **_opcoes_disjuntores)
+                _disjuntores[nome] = disjuntor
+    return disjuntor
+
+
+def configurar_disjuntores(**opcoes):
+    """
+    Troca as opções de todos os disjuntores (os atuais são descartados
+    e recriados, fechados, no próximo uso).
+
+    Exemplo: configurar_disjuntores(taxa_falha_maxima=0.3, espera_aberto_segundos=60)
+    """
+    with _trava_disjuntores:
+        _opcoes_disjuntores.clear()
+        _opcoes_disjuntores.update(opcoes)
+        _disjuntores.clear()
+
+
+def estatisticas_disjuntores():
+    """Estatísticas de todos os disjuntores: {fonte: {...}}."""
+    with _trava_disjuntores:
+        disjuntores = list(_disjuntores.values())
+    return {disjuntor.nome: disjuntor.estatisticas() for disjuntor in disjuntores}
+
+
+# ====== FUNÇÃO DE TESTE ======
+def testar_disjuntor():
+    """Testa abertura, falha rápida, meio aberto e o timeout adaptativo"""
+
+    print("🧪 TESTANDO DISJUNTOR DE FONTES")
+    print("=" * 50)
+
+    disjuntor = Disjuntor('teste', janela_chamadas=10, minimo_chamadas=5,
+                          espera_aberto_segundos=0.5, timeout_minimo=0.05)
+
+    def fonte_rapida(timeout):
+        time.sleep(0.02)
+        return 'ok'
+
+    def fonte_fora_do_ar(timeout):
+        time.sleep(0.01)
+        raise TimeoutError(f"sem resposta em {timeout:.2f}s")
+
+    print("\n1️⃣ Timeout adaptativo (fonte responde em ~20ms):")
+    print(f"   Antes das amostras: {disjuntor.timeout():.2f}s")
+    for _ in range(20):
+        disjuntor.chamar(fonte_rapida)
+    print(f"   Depois de 20 chamadas: {disjuntor.timeout():.3f}s")
+
+    print("\n2️⃣ Fonte cai: o circuito abre e as chamadas falham na hora:")
+    for _ in range(10):
+        try:
+            disjuntor.chamar(fonte_fora_do_ar)
+        except TimeoutError:
+            pass
+        except CircuitoAberto:
+            break
+    inicio = time.perf_counter()
+    rejeitadas = 0
+    for _ in range(1000):
+        try:
+            disjuntor.chamar(fonte_fora_do_ar)
+        except CircuitoAberto:
+            rejeitadas += 1
+    print(f"   Estado: {disjuntor.estado} | {rejeitadas} rejeitadas em "
+          f"{(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    print("\n3️⃣ Depois da espera: meio aberto, teste com sucesso fecha:")
+    time.sleep(0.6)
+    print(f"   Estado: {disjuntor.estado}")
+    disjuntor.chamar(fonte_rapida)
+    print(f"   Depois do teste: {disjuntor.estado}")
+
+    print("\n4️⃣ Fonte fica mais lenta (sem cair): o timeout cresce e o teste usa o máximo:")
+    lento = Disjuntor('lento', janela_chamadas=4, minimo_chamadas=4, espera_aberto_segundos=0.1,
+                      timeout_minimo=0.01, timeout_maximo=1.0)
+    for _ in range(10):
+        lento.chamar(fonte_rapida)
+    encolhido = lento.timeout()
+
+    def fonte_lenta(timeout):
+        if timeout < 0.1:
+            time.sleep(timeout)
+            raise TimeoutError(f"sem resposta em {timeout:.2f}s")
+        time.sleep(0.1)
+        return 'ok'
+
+    timeouts_usados = []
+    for _ in range(12):
+        try:
+            timeouts_usados.append(round(lento.timeout(), 3))
+            lento.chamar(fonte_lenta)
+        except TimeoutError:
+            pass
+        except CircuitoAberto:
+            time.sleep(0.15)
+    print(f"   Timeout com a fonte rápida: {encolhido:.3f}s → usados depois: {timeouts_usados}")
+    print(f"   Estado final: {lento.estado}")
+    assert lento.estado == FECHADO
+
+    print("\n5️⃣ Cancelamento não conta como falha e libera o teste:")
+    cancelado = Disjuntor('cancelado', janela_chamadas=2, minimo_chamadas=2, espera_aberto_segundos=0.05)
+    for _ in range(2):
+        try:
+            cancelado.chamar(fonte_fora_do_ar)
+        except TimeoutError:
+            pass
+    time.sleep(0.1)
+
+    def interrompida(timeout):
+        raise KeyboardInterrupt
+
+    try:
+        cancelado.chamar(interrompida)
+    except KeyboardInterrupt:
+        pass
+    print(f"   Estado: {cancelado.estado} | falhas: {cancelado.falhas}")
+    assert cancelado.falhas == 2 and cancelado.chamar(fonte_rapida) == 'ok'
+
+    print(f"\n📊 Estatísticas: {disjuntor.estatisticas()}")
+
+
+# Executar teste se rodar arquivo diretamente
+if __name__ == "__main__":
+    testar_disjuntor()
@@ -0,0 +1,165 @@
+"""
+Núcleo de processamento de comandos do assistente financeiro.
+
+Junta os módulos (analisador, formatador e buscador de notícias) e devolve
+um ResultadoComando com tudo o que foi decidido, SEM imprimir nada.
+Quem quiser mostrar o resultado (CLI, servidor, lote) faz isso por fora.
+
+Exemplo:
+    resultado = executar_comando("compra 100 PETR4 conta 12345")
+    resultado.mensagem_broker  # texto pronto para o broker
+    resultado.para_dict()      # versão serializável (JSON)
+"""
+
+from dataclasses import dataclass, asdict, field
+from typing import List, Optional
+
+try:
+    from .intent_parser import analisar_comando
+    from .order_formatter import formatar_ordem, criar_mensagem_broker, validar_ordem
+    from .utils.helpers import validar_ticker
+    from .ticker_resolver import resolver_ticker, LIMIAR_CONFIRMACAO
+except ImportError:
+    from intent_parser import analisar_comando
+    from order_formatter import formatar_ordem, criar_mensagem_broker, validar_ordem
+    from utils.helpers import validar_ticker
+    from ticker_resolver import resolver_ticker, LIMIAR_CONFIRMACAO
+
+
+@dataclass
+class ResultadoComando:
+    """
+    Resultado completo do processamento de um comando.
+
+    - acao: "compra", "venda", "noticias" ou "desconhecida"
+    - valido / validacao: resultado de validar_ordem (só para ordens)
+    - ordem_formatada / mensagem_broker: textos prontos (só ordens válidas)
+    - tickers: todos os tickers citados (ex: pedido de notícias da carteira)
+    - confianca: preenchida quando o ticker veio do nome da empresa ou de
+      um ticker digitado com erro (ex: "compra 100 petrobras")
+    - confirmacao_necessaria: True se essa confiança for baixa; nesse caso
+      a ordem não é formatada e as notícias não são buscadas até o usuário
+      confirmar (executar_comando(..., ticker_confirmado=...))
+    - noticias: dicionário de buscar_noticias_por_ticker, ou de
+      buscar_noticias_em_lote quando vários tickers foram pedidos
+    - erro: motivo quando o comando não pôde ser atendido (ou aviso de
+      tickers não listados ignorados num pedido de notícias)
+    """
+    comando: str
+    acao: str
+    ticker: Optional[str] = None
+    quantidade: Optional[int] = None
+    conta: Optional[str] = None
+    tickers: List[str] = field(default_factory=list)
+    confianca: Optional[float] = None
+    confirmacao_necessaria: bool = False
+    valido: Optional[bool] = None
+    validacao: Optional[str] = None
+    ordem_formatada: Optional[str] = None
+    mensagem_broker: Optional[str] = None
+    noticias: Optional[dict] = None
+    erro: Optional[str] = None
+
+    def para_dict(self):
+        """Converte o resultado em dicionário (pronto para JSON)."""
+        return asdict(self)
+
+
+def executar_comando(comando, buscar_noticias=True, ticker_confirmado=None):
+    """
+    Processa um comando e retorna um ResultadoComando, sem escrever nada
+    na tela.
+
+    Com buscar_noticias=False, pedidos de notícias são apenas
+    reconhecidos (sem acesso à rede).
+
+    Sem ticker no formato exato, o ticker é procurado pelo nome da
+    empresa (resolver_ticker). ticker_confirmado é o ticker que o usuário
+    confirmou depois de um resultado com confirmacao_necessaria: só vale
+    se for o mesmo que o resolvedor encontrou (um ticker digitado no
+    comando nunca é substituído).
+    """
+
+    # 1. ENTENDER O COMANDO
+    dados = analisar_comando(comando)
+    confianca = None
+
+    if not dados['ticker'] and dados['acao'] in ['compra', 'venda', 'noticias']:
+        resolucao = resolver_ticker(comando)
+        if resolucao:
+            dados['ticker'] = resolucao.ticker
+            dados['tickers'] = [resolucao.ticker]
+            if (ticker_confirmado or '').upper() != resolucao.ticker:
+                confianca = resolucao.confianca
+
+    resultado = ResultadoComando(
+        comando=comando,
+        acao=dados['acao'],
+        ticker=dados['ticker'],
+        quantidade=dados['quantidade'],
+        conta=dados['conta'],
+        tickers=dados['tickers'],
+        confianca=confianca,
+        confirmacao_necessaria=confianca is not None and confianca < LIMIAR_CONFIRMACAO
+    )
+
+    # 2. DECIDIR O QUE FAZER BASEADO NA AÇÃO
+    if dados['acao'] in ['compra', 'venda']:
+        if not dados['ticker']:
+            resultado.erro = "Não consegui identificar o ticker (ex: PETR4)"
+            return resultado
+
+        if not dados['quantidade']:
+            resultado.erro = "Não consegui identificar a quantidade"
+            return resultado
+
+        resultado.valido, resultado.validacao = validar_ordem(dados)
+
+        if resultado.valido and not resultado.confirmacao_necessaria:
+            resultado.ordem_formatada = formatar_ordem(dados)
+            resultado.mensagem_broker = criar_mensagem_broker(dados)
+
+    elif dados['acao'] == 'noticias':
+        # Tickers que não existem na B3 não chegam a gerar requisição
+        # (mesma regra de validar_ticker: com o cadastro parcial vale o formato)
+        listados = [t for t in dados['tickers'] if validar_ticker(t)[0]]
+        nao_listados = [t for t in dados['tickers'] if t not in listados]
+
+        if nao_listados:
+            resultado.erro = f"Ticker não listado na B3: {', '.join(nao_listados)}"
+
+        if listados and buscar_noticias:
+            completar_noticias(resultado, listados)
+
+    else:
+        resultado.erro = "Não entendi o comando"
+
+    return resultado
+
+
+def completar_noticias(resultado, listados=None):
+    """
+    Busca as notícias de um pedido de notícias já analisado (ex: por
+    executar_comando(..., buscar_noticias=False) num processo separado)
+    e preenche resultado.noticias. Nada é buscado enquanto a confirmação
+    do ticker estiver pendente.
+    """
+    if resultado.acao != 'noticias' or resultado.confirmacao_necessaria:
+        return resultado
+
+    if listados is None:
+        listados = [t for t in resultado.tickers if validar_ticker(t)[0]]
+    if not listados:
+        return resultado
+
+    # Importação tardia: só paga o custo do módulo de rede se precisar
+    try:
+        from .news_fetcher import buscar_noticias_por_ticker, buscar_noticias_em_lote
+    except ImportError:
+        from news_fetcher import buscar_noticias_por_ticker, buscar_noticias_em_lote
+
+    if len(listados) > 1:
+        resultado.noticias = buscar_noticias_em_lote(listados)
+    else:
+        resultado.noticias = buscar_noticias_por_ticker(listados[0], exibir=False)
+    return resultado
@@ -0,0 +1,326 @@
+"""
+CLIENTE HTTP COMPARTILHADO (POOL DE CONEXÕES + RETRY)
+
+Em vez de um requests.get "solto" por busca (uma conexão TCP/TLS nova a
+cada vez), todas as buscas de notícias passam por uma única Session com:
+
+- pool de conexões reaproveitadas (keep-alive)
+- limite de conexões simultâneas por host
+- novas tentativas com espera exponencial para 429 e erros 5xx (cada
+  espera, mesmo um Retry-After do servidor, vai até espera_maxima; a
+  soma das esperas, até tempo_retry ou até o tempo_retry passado no get)
+- métricas: conexões novas (handshakes), reaproveitamentos, tentativas
+  extras e latência (p50/p95)
+
+Exemplo:
+    cliente = obter_cliente_http()
+    resposta = cliente.get(url, headers=HEADERS, timeout=10)
+    cliente.estatisticas()
+"""
+
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+try:
+    from .utils.helpers import percentil
+except ImportError:
+    from utils.helpers import percentil
+
+# Configurações padrão
+MAX_HOSTS_PADRAO = 10          # quantos hosts diferentes mantêm pool
+CONEXOES_POR_HOST_PADRAO = 10  # conexões simultâneas por host
+MAX_TENTATIVAS_PADRAO = 3      # tentativas extras para 429/5xx
+FATOR_ESPERA_PADRAO = 0.5      # espera: 0.5s, 1s, 2s, ...
+ESPERA_MAXIMA_PADRAO = 5.0     # teto de cada espera, inclusive Retry-After do servidor
+TEMPO_RETRY_PADRAO = 10.0      # soma máxima das esperas de uma requisição
+STATUS_PARA_REPETIR = (429, 500, 502, 503, 504)
+
+
+class ClienteHTTP:
+    """
+    Session do requests com pool de conexões, retry e métricas.
+    Pode ser usada por várias threads ao mesmo tempo.
+    """
+
+    def __init__(self, max_hosts=MAX_HOSTS_PADRAO, conexoes_por_host=CONEXOES_POR_HOST_PADRAO,
+                 max_tentativas=MAX_TENTATIVAS_PADRAO, fator_espera=FATOR_ESPERA_PADRAO,
+                 manter_conexao=True, amostras_latencia=1000,
+                 espera_maxima=ESPERA_MAXIMA_PADRAO, tempo_retry=TEMPO_RETRY_PADRAO):
+        self.max_hosts = max_hosts
+        self.conexoes_por_host = conexoes_por_host
+        self.max_tentativas = max_tentativas
+        self.fator_espera = fator_espera
+        self.espera_maxima = espera_maxima
+        self.tempo_retry = tempo_retry
+        self.manter_conexao = manter_conexao
+
+        self._trava = threading.Lock()
+        self._latencias = deque(maxlen=amostras_latencia)
+        # Tempo de novas tentativas da requisição em andamento em cada
+        # thread (get(..., tempo_retry=...)); a Session é compartilhada
+        self._por_thread = threading.local()
+
+        # Contadores
+        self.requisicoes = 0
+        self.conexoes_novas = 0
+        self.tentativas_extras = 0
+        self.falhas = 0
+
+        self.sessao = self._criar_sessao()
+
+    def _contar(self, nome):
+        with self._trava:
+            setattr(self, nome, getattr(self, nome) + 1)
+
+    def _criar_sessao(self):
+        """Monta a Session com o adaptador de pool e a política de retry."""
+        cliente = self
+
+        # Subclasses que só contam eventos (handshakes e novas tentativas)
+        class PoolHTTPContado(HTTPConnectionPool):
+            def _new_conn(self):
+                cliente._contar('conexoes_novas')
+                return super()._new_conn()
+
+        class PoolHTTPSContado(HTTPSConnectionPool):
+            def _new_conn(self):
+                cliente._contar('conexoes_novas')
+                return super()._new_conn()
+
+        class RetryContado(Retry):
+            # Um "Retry-After: 3600" não pode prender o worker por uma hora:
+            # cada espera vai até espera_maxima e, somadas, até tempo_retry
+            # (contado a partir da primeira nova tentativa)
+            inicio = None
+
+            def new(self, **kwargs):
+                proxima = super().new(**kwargs)
+                proxima.inicio = self.inicio if self.inicio is not None else time.monotonic()
+                return proxima
+
+            def _restante(self):
+                limite = getattr(cliente._por_thread, 'tempo_retry', None)
+                if limite is None:
+                    limite = cliente.tempo_retry
+                if self.inicio is None:
+                    return limite
+                return limite - (time.monotonic() - self.inicio)
+
+            def _limitar(self, segundos):
+                if segundos is None:
+                    return None
+                return max(0.0, min(segundos, cliente.espera_maxima, self._restante()))
+
+            def get_retry_after(self, response):
+                return self._limitar(super().get_retry_after(response))
+
+            def get_backoff_time(self):
+                return self._limitar(super().get_backoff_time())
+
+            def is_retry(self, method, status_code, has_retry_after=False):
+                # Tempo de novas tentativas esgotado: devolve a resposta como veio
+                return self._restante() > 0 and super().is_retry(method, status_code, has_retry_after)
+
+            def increment(self, *args, **kwargs):
+                # Se as tentativas acabaram, increment levanta exceção e não conta
+                proxima = super().increment(*args, **kwargs)
+                cliente._contar('tentativas_extras')
+                return proxima
+
+        class AdaptadorContado(HTTPAdapter):
+            def init_poolmanager(self, *args, **kwargs):
+                super().init_poolmanager(*args, **kwargs)
+                self.poolmanager.pool_classes_by_scheme = {
+                    'http': PoolHTTPContado,
+                    'https': PoolHTTPSContado
+                }
+
+        # Repete só erros de conexão e status 429/5xx: um timeout de leitura
+        # não é repetido, para não multiplicar a espera do chamador
+        politica_retry = RetryContado(
+            total=self.max_tentativas,
+            read=0,
+            backoff_factor=self.fator_espera,
+            status_forcelist=STATUS_PARA_REPETIR,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+
+        adaptador = AdaptadorContado(
+            pool_connections=self.max_hosts,
+            pool_maxsize=self.conexoes_por_host,
+            pool_block=True,  # respeita o limite por host: espera uma conexão livre
+            max_retries=politica_retry
+        )
+
+        sessao = requests.Session()
+        sessao.mount('http://', adaptador)
+        sessao.mount('https://', adaptador)
+        if not self.manter_conexao:
+            sessao.headers['Connection'] = 'close'
+
+        return sessao
+
+    def get(self, url, tempo_retry=None, **kwargs):
+        """
+        Faz um GET pela sessão compartilhada, registrando latência e falhas.
+
+        tempo_retry limita a soma das esperas entre tentativas só desta
+        requisição (no máximo o tempo_retry do cliente): quem tem um prazo
+        passa o tempo que sobra, e as novas tentativas param nele.
+        """
+        self._contar('requisicoes')
+        inicio = time.perf_counter()
+        if tempo_retry is not None:
+            self._por_thread.tempo_retry = min(tempo_retry, self.tempo_retry)
+
+        try:
+            return self.sessao.get(url, **kwargs)
+        except requests.RequestException:
+            self._contar('falhas')
+            raise
+        finally:
+            self._por_thread.tempo_retry = None
+            with self._trava:
+                self._latencias.append(time.perf_counter() - inicio)
+
+    def fechar(self):
+        """Fecha todas as conexões do pool."""
+        self.sessao.close()
+
+    def estatisticas(self):
+        """
+        Retorna as métricas do cliente. 'conexoes_reaproveitadas' conta as
+        requisições (incluindo novas tentativas) que não precisaram de handshake.
+        """
+        with self._trava:
+            latencias = sorted(self._latencias)
+            envios = self.requisicoes + self.tentativas_extras
+            return {
+                'requisicoes': self.requisicoes,
+                'conexoes_novas': self.conexoes_novas,
+                'conexoes_reaproveitadas': max(envios - self.conexoes_novas, 0),
+                'tentativas_extras': self.tentativas_extras,
+                'falhas': self.falhas,
+                'latencia_p50': percentil(latencias, 50),
+                'latencia_p95': percentil(latencias, 95)
+            }
+
+
+# ====== CLIENTE PADRÃO DO MÓDULO ======
+_cliente_padrao = None
+_trava_cliente = threading.Lock()
+
+
+def obter_cliente_http():
+    """Retorna o cliente HTTP compartilhado (criado na primeira chamada)."""
+    global _cliente_padrao
+
+    if _cliente_padrao is None:
+        with _trava_cliente:
+            if _cliente_padrao is None:
+                _cliente_padrao = ClienteHTTP()
+    return _cliente_padrao
+
+
+def configurar_cliente_http(**opcoes):
+    """
+    Substitui o cliente compartilhado por um novo com outras opções.
+
+    Exemplo: configurar_cliente_http(conexoes_por_host=4, max_tentativas=5)
+    """
+    global _cliente_padrao
+
+    with _trava_cliente:
+        if _cliente_padrao is not None:
+            _cliente_padrao.fechar()
+        _cliente_padrao = ClienteHTTP(**opcoes)
+        return _cliente_padrao
+
+
+# ====== FUNÇÃO DE TESTE ======
+def testar_cliente_http():
+    """
+    Testa o cliente contra um servidor local: reaproveitamento de conexões
+    e novas tentativas após erros 503.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    print("🧪 TESTANDO CLIENTE HTTP (servidor local)")
+    print("=" * 50)
+
+    falhas_restantes = {'valor': 2}
+
+    class ServidorFalso(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # permite keep-alive
+
+        def do_GET(self):
+            extras = {}
+            if self.path.startswith('/instavel') and falhas_restantes['valor'] > 0:
+                falhas_restantes['valor'] -= 1
+                status, corpo = 503, b'ocupado'
+            elif self.path.startswith('/lotado'):
+                status, corpo = 429, b'volte daqui a uma hora'
+                extras['Retry-After'] = '3600'
+            else:
+                status, corpo = 200, b'ok'
+            self.send_response(status)
+            for nome, valor in extras.items():
+                self.send_header(nome, valor)
+            self.send_header('Content-Length', str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), ServidorFalso)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{servidor.server_address[1]}"
+
+    try:
+        cliente = ClienteHTTP(fator_espera=0.01)
+
+        print("\n1️⃣ 20 requisições seguidas ao mesmo host:")
+        for _ in range(20):
+            cliente.get(base + '/ok', timeout=5)
+        estatisticas = cliente.estatisticas()
+        print(f"   Conexões novas: {estatisticas['conexoes_novas']} | "
+              f"reaproveitadas: {estatisticas['conexoes_reaproveitadas']}")
+
+        print("\n2️⃣ Servidor responde 503 duas vezes antes de funcionar:")
+        resposta = cliente.get(base + '/instavel', timeout=5)
+        print(f"   Status final: {resposta.status_code} | "
+              f"tentativas extras: {cliente.estatisticas()['tentativas_extras']}")
+
+        print("\n3️⃣ Servidor pede 'Retry-After: 3600' (teto 0.2s por espera, 0.5s no total):")
+        limitado = ClienteHTTP(espera_maxima=0.2, tempo_retry=0.5)
+        inicio = time.perf_counter()
+        resposta = limitado.get(base + '/lotado', timeout=5)
+        print(f"   Status final: {resposta.status_code} em {time.perf_counter() - inicio:.2f}s | "
+              f"tentativas extras: {limitado.estatisticas()['tentativas_extras']}")
+        limitado.fechar()
+
+        print("\n4️⃣ Mesmo servidor, com só 0.3s de prazo nesta requisição (tempo_retry=0.3):")
+        inicio = time.perf_counter()
+        resposta = cliente.get(base + '/lotado', timeout=5, tempo_retry=0.3)
+        duracao = time.perf_counter() - inicio
+        print(f"   Status final: {resposta.status_code} em {duracao:.2f}s")
+        assert duracao < 1.0
+
+        print(f"\n📊 Estatísticas: {cliente.estatisticas()}")
+        cliente.fechar()
+    finally:
+        servidor.shutdown()
+
+
+# Executar teste se rodar arquivo diretamente
+if __name__ == "__main__":
+    testar_cliente_http()
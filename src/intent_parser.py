@@ -8,6 +8,25 @@ Exemplos de comandos que entende:
 
 import re
 
+# ====== MOTOR DE ANÁLISE ======
+# Cada campo sai da operação mais barata que o Python oferece para ele:
+# - palavras-chave: "in" sobre o texto (busca em C, bem mais rápida que
+#   uma alternativa dentro de uma regex); "venda"/"vender" só são
+#   procuradas se "vend" aparecer
+# - quantidade: o primeiro número do texto; sem nenhum dígito não há
+#   ticker, quantidade nem conta e a análise termina aí
+# - tickers: uma única varredura com findall, começando 4 caracteres antes
+#   do primeiro número (antes dele não pode haver ticker)
+# - conta: str.find de "conta" e um número procurado só no trecho até o
+#   próximo "conta"
+# A versão anterior (uma regex com lookahead e uma máquina de estados em
+# Python consumindo cada elemento) ficava mais lenta que a original em
+# mensagens longas ou com vários tickers: o laço em Python custava mais
+# que as varreduras que ele substituía.
+_PADRAO_TICKER = re.compile(r'[a-z]{4}\d\d?')
+_PADRAO_NUMERO = re.compile(r'\d\d*')
+
+
 def analisar_comando(texto):
     """
     Analisa um comando em português e descobre o que o usuário quer.
@@ -18,8 +37,196 @@ def analisar_comando(texto):
         "ticker": "PETR4" (se houver),
         "quantidade": 100 (se for ordem),
         "conta": "12345" (se mencionada),
+        "tickers": ["PETR4", ...] (todos os tickers citados, sem repetição),
         "mensagem_original": texto original
     }
+    
+    Regras (mesmas da versão original):
+    - "compra" tem prioridade sobre "venda", que tem prioridade sobre notícias
+    - ticker é o primeiro padrão 4 letras + 1-2 números; "tickers" traz
+      todos (ex: "notícias PETR4 VALE3 ITUB4")
+    - quantidade é o primeiro número do texto
+    - conta é o primeiro número depois da palavra "conta" (e antes de um
+      segundo "conta", se houver)
+    """
+    texto_limpo = texto.lower()
+    
+    if 'compra' in texto_limpo:
+        acao = "compra"
+    elif 'vend' in texto_limpo and ('venda' in texto_limpo or 'vender' in texto_limpo):
+        acao = "venda"
+    elif 'news' in texto_limpo or 'noticia' in texto_limpo or 'notícia' in texto_limpo:
+        acao = "noticias"
+    else:
+        acao = "desconhecida"
+    
+    numero = _PADRAO_NUMERO.search(texto_limpo)
+    if numero is None:
+        return {
+            "acao": acao,
+            "ticker": None,
+            "quantidade": None,
+            "conta": None,
+            "tickers": [],
+            "mensagem_original": texto
+        }
+    
+    inicio = numero.start()
+    tickers = [encontrado.upper() for encontrado
+               in _PADRAO_TICKER.findall(texto_limpo, inicio - 4 if inicio > 4 else 0)]
+    if len(tickers) > 1 and len(set(tickers)) < len(tickers):
+        tickers = list(dict.fromkeys(tickers))
+    
+    conta = None
+    inicio = texto_limpo.find('conta')
+    if inicio >= 0:
+        fim = texto_limpo.find('conta', inicio + 5)
+        conta = _PADRAO_NUMERO.search(texto_limpo, inicio + 5, len(texto_limpo) if fim < 0 else fim)
+        if conta is not None:
+            conta = conta.group()
+    
+    return {
+        "acao": acao,
+        "ticker": tickers[0] if tickers else None,
+        "quantidade": int(numero.group()),
+        "conta": conta,
+        "tickers": tickers,
+        "mensagem_original": texto
+    }
+
+
+# ====== ANÁLISE DE VÁRIOS COMANDOS ======
+# A versão colunar analisa os comandos em blocos de TAMANHO_BLOCO. Por bloco:
+# - os textos são juntados com um separador e passados para minúsculas
+#   numa chamada só (lower + split em C, em vez de um lower por texto)
+# - cada palavra-chave ("compra", "vend", "news", "noticia", "notícia",
+#   "conta") é procurada uma vez no bloco inteiro; a que não aparece no
+#   bloco não é procurada em nenhum comando dele
+# - os campos vão direto para listas (colunas), sem um dicionário por
+#   comando
+# Varrer tickers e números no bloco inteiro com uma regex só saiu mais
+# caro: devolver cada ocorrência ao seu comando custa mais em Python do
+# que uma varredura por texto.
+TAMANHO_BLOCO = 1024
+_SEPARADOR = '\x00'
+
+
+def _analisar_bloco(textos):
+    """
+    Analisa uma lista de textos e devolve as colunas
+    (acoes, tickers, quantidades, contas, listas_tickers), com os mesmos
+    resultados de analisar_comando para cada texto.
+    """
+    juntos = _SEPARADOR.join(textos).lower()
+    minusculos = juntos.split(_SEPARADOR)
+    if len(minusculos) != len(textos):
+        # Algum texto já tinha o separador: um lower por texto
+        minusculos = [texto.lower() for texto in textos]
+    
+    tem_compra = 'compra' in juntos
+    tem_vend = 'vend' in juntos
+    tem_news = 'news' in juntos
+    tem_noticia = 'noticia' in juntos
+    tem_noticia_acento = 'notícia' in juntos
+    tem_conta = 'conta' in juntos
+    
+    procurar_numero = _PADRAO_NUMERO.search
+    procurar_tickers = _PADRAO_TICKER.findall
+    acoes, tickers, quantidades, contas, listas_tickers = [], [], [], [], []
+    
+    for texto_limpo in minusculos:
+        if tem_compra and 'compra' in texto_limpo:
+            acoes.append("compra")
+        elif tem_vend and 'vend' in texto_limpo and ('venda' in texto_limpo or 'vender' in texto_limpo):
+            acoes.append("venda")
+        elif ((tem_news and 'news' in texto_limpo) or (tem_noticia and 'noticia' in texto_limpo)
+              or (tem_noticia_acento and 'notícia' in texto_limpo)):
+            acoes.append("noticias")
+        else:
+            acoes.append("desconhecida")
+    
+        numero = procurar_numero(texto_limpo)
+        if numero is None:
+            tickers.append(None)
+            quantidades.append(None)
+            contas.append(None)
+            listas_tickers.append([])
+            continue
+    
+        inicio = numero.start()
+        encontrados = [encontrado.upper() for encontrado
+                       in procurar_tickers(texto_limpo, inicio - 4 if inicio > 4 else 0)]
+        if len(encontrados) > 1 and len(set(encontrados)) < len(encontrados):
+            encontrados = list(dict.fromkeys(encontrados))
+    
+        conta = None
+        if tem_conta:
+            inicio = texto_limpo.find('conta')
+            if inicio >= 0:
+                fim = texto_limpo.find('conta', inicio + 5)
+                conta = procurar_numero(texto_limpo, inicio + 5, len(texto_limpo) if fim < 0 else fim)
+                if conta is not None:
+                    conta = conta.group()
+    
+        tickers.append(encontrados[0] if encontrados else None)
+        quantidades.append(int(numero.group()))
+        contas.append(conta)
+        listas_tickers.append(encontrados)
+    
+    return acoes, tickers, quantidades, contas, listas_tickers
+
+
+def analisar_comandos(textos):
+    """
+    Versão para vários comandos de analisar_comando.
+    
+    Aceita uma lista ou qualquer iterável de textos (inclusive geradores)
+    e devolve um iterador preguiçoso com um dicionário por comando, na
+    mesma ordem e no mesmo formato de analisar_comando. Cada dicionário é
+    montado por analisar_comando: analisar em bloco e depois montar um
+    dicionário por comando saiu mais lento. Para amortizar o trabalho no
+    lote inteiro, use analisar_comandos_colunar.
+    """
+    return map(analisar_comando, textos)
+
+
+def analisar_comandos_colunar(textos):
+    """
+    Versão colunar: em vez de um dicionário por comando, retorna um
+    dicionário de listas paralelas (uma posição por comando):
+    {
+        "acao": [...],
+        "ticker": [...],
+        "quantidade": [...],
+        "conta": [...],
+        "tickers": [...],
+        "mensagem_original": [...]
+    }
+    
+    Útil para validar e formatar as ordens em bloco depois (ex:
+    order_formatter.validar_ordens recebe essas colunas).
+    """
+    textos = list(textos)
+    colunas = ([], [], [], [], [])
+    for inicio in range(0, len(textos), TAMANHO_BLOCO):
+        for coluna, parte in zip(colunas, _analisar_bloco(textos[inicio:inicio + TAMANHO_BLOCO])):
+            coluna.extend(parte)
+    acoes, tickers, quantidades, contas, listas_tickers = colunas
+    
+    return {
+        "acao": acoes,
+        "ticker": tickers,
+        "quantidade": quantidades,
+        "conta": contas,
+        "tickers": listas_tickers,
+        "mensagem_original": textos
+    }
+
+
+def _analisar_comando_referencia(texto):
+    """
+    Implementação original (várias passadas sobre o texto).
+    Mantida apenas como referência para o teste de equivalência.
     """
     
     # Primeiro, vamos limpar o texto
@@ -81,6 +288,7 @@ def testar():
         "compra 100 PETR4 conta 12345",
         "venda 50 VALE3",
         "notícias sobre ITSA4",
+        "notícias PETR4 VALE3 ITUB4 BBDC4",
         "quero comprar 200 WEGE3",
         "vender 1000",
         "algo completamente diferente"
@@ -96,12 +304,140 @@ def testar():
         print(f"   Ação detectada: {resultado['acao']}")
         if resultado['ticker']:
             print(f"   Ticker: {resultado['ticker']}")
+        if len(resultado['tickers']) > 1:
+            print(f"   Tickers: {', '.join(resultado['tickers'])}")
         if resultado['quantidade']:
             print(f"   Quantidade: {resultado['quantidade']}")
         if resultado['conta']:
             print(f"   Conta: {resultado['conta']}")
 
 
+def gerar_corpus_comandos(total=50000, semente=42):
+    """
+    Gera um corpus grande e variado de comandos (incluindo casos estranhos:
+    palavras coladas, acentos, números unicode, várias contas) para testes.
+    """
+    import random
+    
+    aleatorio = random.Random(semente)
+    pedacos = [
+        "compra", "comprar", "Compra", "COMPRAR", "venda", "vender", "VENDA",
+        "notícias", "noticia", "Notícia", "news", "NEWS", "conta", "contas", "Conta",
+        "PETR4", "vale3", "ITUB4", "B3SA3", "WEGE3", "BBDC4", "abcdef12", "XYZ",
+        "100", "50", "1000", "12345", "0", "٣٤", "²", "XP-12345", "sobre", "quero",
+        "da", "para", "ação", "hoje", "!", ",", ".", "_", "-", "İ", "ß", "Σ",
+    ]
+    separadores = [" ", " ", " ", "", "  ", "\t", "\n", "/"]
+    
+    corpus = []
+    for _ in range(total):
+        partes = []
+        for _ in range(aleatorio.randint(0, 8)):
+            partes.append(aleatorio.choice(pedacos))
+            partes.append(aleatorio.choice(separadores))
+        corpus.append("".join(partes))
+    return corpus
+
+
+def testar_equivalencia(total=50000):
+    """
+    Compara o motor de análise com a implementação original
+    num corpus grande. Retorna True se todos os resultados forem iguais.
+    """
+    import time
+    
+    print("🧪 TESTANDO EQUIVALÊNCIA DO MOTOR DE ANÁLISE")
+    print("=" * 50)
+    
+    corpus = gerar_corpus_comandos(total)
+    
+    # Exemplos fixos de casos limite
+    corpus += [
+        "conta12345 compra", "venda1", "compra4 conta conta 7", "news1",
+        "  compra 100 PETR4 conta 12345  ", "petr_4", "", "contaconta 5",
+    ]
+    
+    divergencias = 0
+    for texto in corpus:
+        esperado = _analisar_comando_referencia(texto)
+        obtido = analisar_comando(texto)
+        # "tickers" é um campo novo, que a implementação original não tinha:
+        # todas as ocorrências do mesmo padrão de ticker, sem repetição
+        tickers_esperados = list(dict.fromkeys(
+            ticker.upper() for ticker in re.findall(r'[a-z]{4}\d{1,2}', texto.lower())
+        ))
+        if obtido["tickers"] != tickers_esperados:
+            divergencias += 1
+            print(f"   ❌ '{texto}': tickers {obtido['tickers']} != {tickers_esperados}")
+        obtido = {chave: obtido[chave] for chave in esperado}
+        if esperado != obtido:
+            divergencias += 1
+            if divergencias <= 5:
+                print(f"   ❌ '{texto}'")
+                print(f"      esperado: {esperado}")
+                print(f"      obtido:   {obtido}")
+    
+    # Análise de vários comandos (gerador e colunar) deve bater com a individual
+    individuais = [analisar_comando(texto) for texto in corpus]
+    if list(analisar_comandos(iter(corpus))) != individuais:
+        divergencias += 1
+        print("   ❌ analisar_comandos diverge de analisar_comando")
+    
+    # O texto com o separador interno força o caminho de um lower por texto
+    extra = ["compra 1 \x00 petr4"]
+    colunas = analisar_comandos_colunar(corpus + extra)
+    esperadas = individuais + [analisar_comando(texto) for texto in extra]
+    if any(colunas[campo] != [r[campo] for r in esperadas] for campo in colunas):
+        divergencias += 1
+        print("   ❌ analisar_comandos_colunar diverge de analisar_comando")
+    
+    print(f"   Comandos comparados: {len(corpus)}")
+    print(f"   Divergências: {divergencias}")
+    
+    # Mensagens típicas: vários tickers e uma mensagem longa (melhor de 20
+    # medições, alternando as versões, porque a máquina pode oscilar)
+    longa = ("Bom dia! Por favor, quero comprar 300 ações da PETR4 na conta 123456 "
+             "assim que o mercado abrir, e depois me mande as notícias de VALE3 e "
+             "ITUB4 também, obrigado")
+    for nome, texto in [("vários tickers", "notícias PETR4 VALE3 ITUB4 BBDC4"),
+                        ("mensagem longa", longa),
+                        ("ordem simples", "compra 100 PETR4 conta 12345")]:
+        melhores = {}
+        for _ in range(20):
+            for versao, funcao in [("original", _analisar_comando_referencia),
+                                   ("atual", analisar_comando)]:
+                inicio = time.perf_counter()
+                for _ in range(1000):
+                    funcao(texto)
+                duracao = (time.perf_counter() - inicio) / 1000
+                melhores[versao] = min(melhores.get(versao, duracao), duracao)
+        print(f"   ⏱️  {nome}: original {melhores['original'] * 1e6:.2f} µs | "
+              f"atual {melhores['atual'] * 1e6:.2f} µs")
+    
+    # Comparação rápida de desempenho (todas guardam os resultados, para
+    # comparar o mesmo trabalho; melhor de 3 medições)
+    def individual(textos):
+        return [analisar_comando(texto) for texto in textos]
+    
+    def referencia(textos):
+        return [_analisar_comando_referencia(texto) for texto in textos]
+    
+    for nome, funcao in [("original", referencia),
+                         ("atual", individual),
+                         ("vários comandos", lambda textos: list(analisar_comandos(textos))),
+                         ("colunar", analisar_comandos_colunar)]:
+        duracoes = []
+        for _ in range(3):
+            inicio = time.perf_counter()
+            funcao(corpus)
+            duracoes.append(time.perf_counter() - inicio)
+        print(f"   ⏱️  {nome}: {min(duracoes) / len(corpus) * 1e6:.2f} µs por comando")
+    
+    return divergencias == 0
+
+
 # Isso faz o teste rodar se executarmos o arquivo diretamente
 if __name__ == "__main__":
     testar()
+    print()
+    testar_equivalencia()
@@ -0,0 +1,385 @@
+"""
+SERVIDOR DE MENSAGENS (ASYNCIO)
+
+Recebe mensagens (ex: vindas do WhatsApp) por um webhook HTTP local ou
+por um socket unix e responde com o ResultadoComando em JSON:
+
+    POST /mensagens   {"comando": "compra 100 PETR4 conta 12345", "usuario": "ana"}
+                      (+ "ticker_confirmado": "PETR4" para responder a um
+                      resultado com confirmacao_necessaria)
+    GET  /saude       estatísticas do servidor
+
+Como funciona:
+- cada mensagem é analisada na hora (barato) e vai para o
+  EscalonadorPrioridade (scheduler.py): ordens numa faixa, pedidos de
+  notícias em outra, cada uma com fila limitada e workers próprios
+- notícias lentas (rede, até 10s) nunca ficam na frente de uma ordem
+- fila cheia → 503 com Retry-After (backpressure), sem acumular memória
+
+Para testar sem WhatsApp: testar_carga() dispara muitas mensagens
+simultâneas contra o servidor e mede vazão e latência.
+
+Exemplo:
+    python main_cli.py --servidor --porta 8080
+    curl -d '{"comando": "compra 100 PETR4 conta 12345"}' localhost:8080/mensagens
+"""
+
+import asyncio
+import json
+import queue
+import time
+from collections import deque
+
+try:
+    from .command_processor import executar_comando
+    from .scheduler import EscalonadorPrioridade
+    from .circuit_breaker import estatisticas_disjuntores
+    from .rate_limiter import obter_limitador
+    from .news_dedup import obter_indice_noticias
+    from .utils.helpers import percentil
+except ImportError:
+    from command_processor import executar_comando
+    from scheduler import EscalonadorPrioridade
+    from circuit_breaker import estatisticas_disjuntores
+    from rate_limiter import obter_limitador
+    from news_dedup import obter_indice_noticias
+    from utils.helpers import percentil
+
+# Configurações padrão
+PORTA_PADRAO = 8080
+MAX_FILA_ORDENS = 1000
+MAX_FILA_NOTICIAS = 100
+WORKERS_ORDENS = 2
+WORKERS_NOTICIAS = 4
+PRAZO_RESPOSTA_SEGUNDOS = 30.0
+MAX_CORPO_BYTES = 64 * 1024
+ESPERA_SUGERIDA_SEGUNDOS = 1
+
+STATUS_HTTP = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    413: 'Payload Too Large', 500: 'Internal Server Error',
+    503: 'Service Unavailable', 504: 'Gateway Timeout'
+}
+
+
+class ServidorMensagens:
+    """
+    Servidor asyncio com filas limitadas para ordens e notícias
+    (workers e filas ficam no EscalonadorPrioridade).
+
+    - auditoria: LogAuditoria opcional (toda ordem é registrada)
+    - agregador: AgregadorOrdens opcional (ordens válidas são consolidadas
+      por conta em vez de gerar uma mensagem ao broker cada)
+    """
+
+    def __init__(self, host='127.0.0.1', porta=PORTA_PADRAO, caminho_socket=None,
+                 max_fila_ordens=MAX_FILA_ORDENS, max_fila_noticias=MAX_FILA_NOTICIAS,
+                 workers_ordens=WORKERS_ORDENS, workers_noticias=WORKERS_NOTICIAS,
+                 buscar_noticias=True, auditoria=None, agregador=None,
+                 prazo_resposta=PRAZO_RESPOSTA_SEGUNDOS):
+        self.host = host
+        self.porta = porta
+        self.caminho_socket = caminho_socket
+        self.max_fila_ordens = max_fila_ordens
+        self.max_fila_noticias = max_fila_noticias
+        self.workers_ordens = workers_ordens
+        self.workers_noticias = workers_noticias
+        self.buscar_noticias = buscar_noticias
+        self.auditoria = auditoria
+        self.agregador = agregador
+        self.prazo_resposta = prazo_resposta
+
+        self._servidores = []
+        self._escalonador = None
+
+        # Contadores
+        self.recebidas = 0
+        self.respondidas = 0
+        self.rejeitadas = 0  # 503 por fila cheia
+        self.erros = 0
+        self._latencias = {'ordens': deque(maxlen=5000), 'noticias': deque(maxlen=5000)}
+
+    # ====== CICLO DE VIDA ======
+
+    async def iniciar(self):
+        """Abre o socket (TCP e/ou unix) e inicia os workers."""
+        self._escalonador = EscalonadorPrioridade(
+            workers_ordens=self.workers_ordens, workers_noticias=self.workers_noticias,
+            max_fila_ordens=self.max_fila_ordens, max_fila_noticias=self.max_fila_noticias
+        )
+
+        if self.caminho_socket:
+            self._servidores.append(
+                await asyncio.start_unix_server(self._atender_conexao, path=self.caminho_socket)
+            )
+        if self.porta is not None:
+            servidor = await asyncio.start_server(self._atender_conexao, self.host, self.porta)
+            self.porta = servidor.sockets[0].getsockname()[1]  # porta 0 → porta escolhida
+            self._servidores.append(servidor)
+
+    async def parar(self):
+        """Para de aceitar conexões e encerra os workers."""
+        for servidor in self._servidores:
+            servidor.close()
+            await servidor.wait_closed()
+        self._escalonador.encerrar(esperar=False, cancelar_pendentes=True)
+        self._servidores.clear()
+
+    async def servir_para_sempre(self):
+        """Inicia e fica atendendo até ser cancelado (Ctrl+C)."""
+        await self.iniciar()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.parar()
+
+    # ====== HTTP ======
+
+    async def _atender_conexao(self, leitor, escritor):
+        """Atende as requisições de uma conexão (com keep-alive)."""
+        try:
+            while True:
+                try:
+                    linha = await leitor.readline()
+                except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+                    return
+                if not linha:
+                    return
+
+                partes = linha.decode('latin-1').split()
+                if len(partes) != 3:
+                    await self._responder(escritor, 400, {'erro': 'Requisição inválida'}, fechar=True)
+                    return
+                metodo, caminho, versao = partes
+
+                cabecalhos = {}
+                while True:
+                    linha = await leitor.readline()
+                    if linha in (b'\r\n', b'\n', b''):
+                        break
+                    nome, _, valor = linha.decode('latin-1').partition(':')
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+
+                fechar = cabecalhos.get('connection', '').lower() == 'close' or versao == 'HTTP/1.0'
+
+                tamanho = cabecalhos.get('content-length') or '0'
+                if not (tamanho.isascii() and tamanho.isdigit()):
+                    # Não numérico ou negativo
+                    await self._responder(escritor, 400, {'erro': 'Content-Length inválido'}, fechar=True)
+                    return
+                tamanho = int(tamanho)
+                if tamanho > MAX_CORPO_BYTES:
+                    await self._responder(escritor, 413, {'erro': 'Mensagem grande demais'}, fechar=True)
+                    return
+                corpo = await leitor.readexactly(tamanho) if tamanho else b''
+
+                status, resposta, extras = await self._tratar(metodo, caminho.split('?')[0], corpo)
+                await self._responder(escritor, status, resposta, fechar=fechar, extras=extras)
+                if fechar:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    @staticmethod
+    async def _responder(escritor, status, dados, fechar=False, extras=None):
+        corpo = json.dumps(dados, ensure_ascii=False).encode('utf-8')
+        cabecalhos = [
+            f"HTTP/1.1 {status} {STATUS_HTTP.get(status, '')}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(corpo)}",
+            f"Connection: {'close' if fechar else 'keep-alive'}"
+        ]
+        for nome, valor in (extras or {}).items():
+            cabecalhos.append(f"{nome}: {valor}")
+        escritor.write(('\r\n'.join(cabecalhos) + '\r\n\r\n').encode('latin-1') + corpo)
+        await escritor.drain()
+
+    async def _tratar(self, metodo, caminho, corpo):
+        """Roteia a requisição. Retorna (status, dados, cabeçalhos extras)."""
+        if caminho == '/saude':
+            return 200, self.estatisticas(), None
+
+        if caminho != '/mensagens':
+            return 404, {'erro': 'Caminho não encontrado'}, None
+        if metodo != 'POST':
+            return 405, {'erro': 'Use POST'}, None
+
+        try:
+            dados = json.loads(corpo or b'{}')
+            comando = str(dados['comando'])
+        except (ValueError, KeyError, TypeError):
+            return 400, {'erro': 'Corpo deve ser JSON com a chave "comando"'}, None
+
+        self.recebidas += 1
+
+        # Análise rápida só para escolher a faixa
+        chegada = time.perf_counter()
+        tipo = self._escalonador.faixa_do_comando(comando)
+        try:
+            futuro = self._escalonador.enviar(
+                tipo, self._processar, comando,
+                str(dados.get('usuario') or 'WHATSAPP'), dados.get('ticker_confirmado')
+            )
+        except queue.Full:
+            self.rejeitadas += 1
+            return 503, {'erro': f'Fila de {tipo} cheia, tente novamente'}, \
+                {'Retry-After': ESPERA_SUGERIDA_SEGUNDOS}
+
+        try:
+            resultado = await asyncio.wait_for(asyncio.wrap_future(futuro), self.prazo_resposta)
+        except asyncio.TimeoutError:
+            self.erros += 1
+            return 504, {'erro': 'Tempo esgotado processando a mensagem'}, None
+        except Exception as e:
+            self.erros += 1
+            return 500, {'erro': f'Erro inesperado: {e}'}, None
+
+        self.respondidas += 1
+        self._latencias[tipo].append(time.perf_counter() - chegada)
+        return 200, resultado, None
+
+    # ====== PROCESSAMENTO ======
+
+    def _processar(self, comando, usuario, ticker_confirmado=None):
+        """Executa o comando (mesmo núcleo do CLI) e devolve o dicionário."""
+        resultado = executar_comando(comando, buscar_noticias=self.buscar_noticias,
+                                     ticker_confirmado=ticker_confirmado)
+
+        if self.auditoria is not None and resultado.acao in ['compra', 'venda']:
+            self.auditoria.registrar_resultado(resultado, usuario=usuario)
+
+        if self.agregador is not None and resultado.mensagem_broker and self.agregador.aceita(resultado):
+            self.agregador.adicionar(resultado)
+            resultado.mensagem_broker = None  # vai na mensagem consolidada da conta
+
+        return resultado.para_dict()
+
+    def estatisticas(self):
+        """Contadores, latência (p50/p95) por tipo, faixas, disjuntores, limites por host e deduplicação."""
+        latencias = {}
+        for tipo, valores in self._latencias.items():
+            ordenados = sorted(valores)
+            latencias[tipo] = {
+                'p50': percentil(ordenados, 50),
+                'p95': percentil(ordenados, 95)
+            }
+        return {
+            'recebidas': self.recebidas,
+            'respondidas': self.respondidas,
+            'rejeitadas': self.rejeitadas,
+            'erros': self.erros,
+            'latencia': latencias,
+            'faixas': self._escalonador.estatisticas() if self._escalonador else {},
+            'fontes': estatisticas_disjuntores(),
+            'limites': obter_limitador().estatisticas(),
+            'deduplicacao': obter_indice_noticias().estatisticas()
+        }
+
+
+# ====== CLIENTE DE TESTE DE CARGA ======
+
+async def _enviar_mensagem(host, porta, comando, caminho_socket=None):
+    """Envia um POST /mensagens e devolve (status, segundos)."""
+    inicio = time.perf_counter()
+    if caminho_socket:
+        leitor, escritor = await asyncio.open_unix_connection(caminho_socket)
+    else:
+        leitor, escritor = await asyncio.open_connection(host, porta)
+
+    try:
+        corpo = json.dumps({'comando': comando, 'usuario': 'CARGA'}).encode('utf-8')
+        escritor.write(
+            f"POST /mensagens HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(corpo)}\r\nConnection: close\r\n\r\n".encode('latin-1') + corpo
+        )
+        await escritor.drain()
+        resposta = await leitor.read()
+        status = int(resposta.split(b' ', 2)[1])
+    finally:
+        escritor.close()
+
+    return status, time.perf_counter() - inicio
+
+
+async def testar_carga(host='127.0.0.1', porta=PORTA_PADRAO, total=2000, simultaneas=100,
+                       comandos=None, caminho_socket=None):
+    """
+    Cliente substituto do WhatsApp: envia `total` mensagens, no máximo
+    `simultaneas` ao mesmo tempo, e devolve vazão, latência e status.
+    """
+    comandos = comandos or [
+        "compra 100 PETR4 conta 12345",
+        "venda 50 VALE3 conta 777",
+        "compra 10 ITUB4 conta 12345",
+        "notícias PETR4",
+    ]
+    limite = asyncio.Semaphore(simultaneas)
+    resultados = []
+
+    async def uma(indice):
+        async with limite:
+            try:
+                resultados.append(await _enviar_mensagem(
+                    host, porta, comandos[indice % len(comandos)], caminho_socket
+                ))
+            except (ConnectionError, OSError, ValueError, IndexError):
+                resultados.append((0, 0.0))
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*[uma(i) for i in range(total)])
+    duracao = time.perf_counter() - inicio
+
+    por_status = {}
+    for status, _ in resultados:
+        por_status[status] = por_status.get(status, 0) + 1
+    latencias = sorted(segundos for status, segundos in resultados if status == 200)
+
+    return {
+        'total': total,
+        'segundos': round(duracao, 3),
+        'mensagens_por_segundo': round(total / duracao, 1) if duracao else None,
+        'status': por_status,
+        'latencia_p50': percentil(latencias, 50),
+        'latencia_p95': percentil(latencias, 95)
+    }
+
+
+# ====== FUNÇÃO DE TESTE ======
+def testar_servidor():
+    """Sobe o servidor numa porta livre e roda o teste de carga contra ele"""
+
+    print("🧪 TESTANDO SERVIDOR DE MENSAGENS")
+    print("=" * 50)
+
+    async def cenario():
+        # Sem rede: notícias só reconhecidas, para medir o servidor em si
+        servidor = ServidorMensagens(porta=0, buscar_noticias=False)
+        await servidor.iniciar()
+        try:
+            print(f"\n1️⃣ 2000 mensagens, 100 simultâneas (porta {servidor.porta}):")
+            relatorio = await testar_carga(porta=servidor.porta, total=2000, simultaneas=100)
+            print(f"   {relatorio}")
+
+            print("\n2️⃣ Fila de ordens com 5 vagas e 200 mensagens simultâneas:")
+            pequeno = ServidorMensagens(porta=0, buscar_noticias=False, max_fila_ordens=5,
+                                        workers_ordens=1)
+            await pequeno.iniciar()
+            try:
+                relatorio = await testar_carga(porta=pequeno.porta, total=200, simultaneas=200,
+                                               comandos=["compra 100 PETR4 conta 1"])
+                print(f"   Status: {relatorio['status']} (503 = backpressure)")
+            finally:
+                await pequeno.parar()
+
+            print(f"\n📊 Estatísticas: {servidor.estatisticas()}")
+        finally:
+            await servidor.parar()
+
+    asyncio.run(cenario())
+
+
+# Executar teste se rodar arquivo diretamente
+if __name__ == "__main__":
+    testar_servidor()
@@ -0,0 +1,278 @@
+"""
+CACHE DE NOTÍCIAS (TTL + LRU)
+
+Guarda o resultado completo de buscar_noticias_por_ticker (inclusive o texto
+'formatado_whatsapp'), para que vários pedidos iguais em pouco tempo não
+façam uma nova requisição HTTP nem formatem a mensagem de novo.
+
+- Chave: (ticker, max_noticias)
+- Cada entrada expira depois de ttl_segundos
+- No máximo max_itens em memória (remove o usado há mais tempo - LRU)
+- Opcional: cópia em disco (SQLite) para o cache sobreviver a reinícios
+- Opcional: entradas vencidas há menos de tolerancia_vencido_segundos
+  continuam guardadas e podem ser servidas com obter_vencido() enquanto
+  uma atualização acontece (stale-while-revalidate, ver news_refresher)
+
+Exemplo:
+    cache = CacheNoticias(ttl_segundos=300, max_itens=256)
+    cache.guardar(('PETR4', 5), resultado)
+    cache.obter(('PETR4', 5))  # → resultado (ou None se expirou)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Configurações padrão
+TTL_PADRAO_SEGUNDOS = 300
+MAX_ITENS_PADRAO = 256
+ARQUIVO_SQLITE_PADRAO = 'logs/cache_noticias.sqlite3'
+
+
+class CacheNoticias:
+    """
+    Cache em memória com expiração (TTL) e limite de tamanho (LRU),
+    seguro para uso com várias threads.
+    """
+
+    def __init__(self, ttl_segundos=TTL_PADRAO_SEGUNDOS, max_itens=MAX_ITENS_PADRAO,
+                 arquivo_sqlite=None, tolerancia_vencido_segundos=0):
+        self.ttl_segundos = ttl_segundos
+        self.max_itens = max_itens
+        self.arquivo_sqlite = arquivo_sqlite
+        self.tolerancia_vencido_segundos = tolerancia_vencido_segundos
+
+        self._itens = OrderedDict()  # chave → (expira_em, valor)
+        self._trava = threading.Lock()
+
+        # Contadores
+        self.acertos = 0
+        self.falhas = 0
+        self.expirados = 0
+        self.removidos_lru = 0
+        self.acertos_disco = 0
+        self.vencidos_servidos = 0
+
+        self._conexao = None
+        if arquivo_sqlite:
+            self._abrir_sqlite(arquivo_sqlite)
+
+    # ====== DISCO (OPCIONAL) ======
+
+    def _abrir_sqlite(self, arquivo_sqlite):
+        """Abre (ou cria) o banco SQLite usado como segunda camada do cache."""
+        pasta = os.path.dirname(arquivo_sqlite)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+
+        self._conexao = sqlite3.connect(arquivo_sqlite, check_same_thread=False)
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS cache_noticias ("
+            " chave TEXT PRIMARY KEY,"
+            " expira_em REAL NOT NULL,"
+            " valor TEXT NOT NULL)"
+        )
+        self._conexao.commit()
+
+    @staticmethod
+    def _chave_texto(chave):
+        """Converte a chave (tupla) em texto para o SQLite: ('PETR4', 5) → 'PETR4|5'."""
+        return "|".join(str(parte) for parte in chave)
+
+    def _ler_disco(self, chave, limite):
+        linha = self._conexao.execute(
+            "SELECT expira_em, valor FROM cache_noticias WHERE chave = ?",
+            (self._chave_texto(chave),)
+        ).fetchone()
+
+        if not linha:
+            return None
+
+        expira_em, valor_json = linha
+        if expira_em <= limite:
+            return None
+
+        return expira_em, json.loads(valor_json)
+
+    def _gravar_disco(self, chave, expira_em, valor):
+        self._conexao.execute(
+            "INSERT OR REPLACE INTO cache_noticias (chave, expira_em, valor) VALUES (?, ?, ?)",
+            (self._chave_texto(chave), expira_em, json.dumps(valor, ensure_ascii=False))
+        )
+        self._conexao.commit()
+
+    # ====== OPERAÇÕES PRINCIPAIS ======
+
+    def _procurar(self, chave, agora):
+        """
+        Procura a entrada na memória e depois no disco, aceitando vencidas
+        dentro da tolerância (chamar com a trava).
+        Retorna ((expira_em, valor), veio_do_disco) ou (None, False).
+        """
+        limite = agora - self.tolerancia_vencido_segundos
+        item = self._itens.get(chave)
+
+        if item is not None:
+            if item[0] > limite:
+                # Marca como usado recentemente (LRU)
+                self._itens.move_to_end(chave)
+                return item, False
+
+            del self._itens[chave]
+            self.expirados += 1
+
+        if self._conexao is not None:
+            item = self._ler_disco(chave, limite)
+            if item is not None:
+                self._guardar_memoria(chave, *item)
+                return item, True
+
+        return None, False
+
+    def obter(self, chave):
+        """
+        Retorna o valor guardado para a chave, ou None se não existir
+        ou já tiver expirado.
+        """
+        agora = time.time()
+
+        with self._trava:
+            item, do_disco = self._procurar(chave, agora)
+
+            if item is not None and item[0] > agora:
+                self.acertos += 1
+                if do_disco:
+                    self.acertos_disco += 1
+                return item[1]
+
+            self.falhas += 1
+            return None
+
+    def obter_vencido(self, chave):
+        """
+        Como obter(), mas também devolve entradas vencidas há menos de
+        tolerancia_vencido_segundos. Retorna (valor, expira_em) ou (None, None);
+        quem chama decide se precisa atualizar (expira_em <= agora).
+        """
+        agora = time.time()
+
+        with self._trava:
+            item, _ = self._procurar(chave, agora)
+            if item is None:
+                return None, None
+
+            if item[0] <= agora:
+                self.vencidos_servidos += 1
+            return item[1], item[0]
+
+    def expira_em(self, chave):
+        """Quando a entrada em memória vence (ou None), sem mexer em contadores nem na ordem LRU."""
+        with self._trava:
+            item = self._itens.get(chave)
+            return item[0] if item is not None else None
+
+    def guardar(self, chave, valor, ttl_segundos=None):
+        """
+        Guarda um valor no cache. ttl_segundos permite um prazo diferente
+        do padrão (ex: prazo curto para notícias simuladas).
+        """
+        ttl = self.ttl_segundos if ttl_segundos is None else ttl_segundos
+        expira_em = time.time() + ttl
+
+        with self._trava:
+            self._guardar_memoria(chave, expira_em, valor)
+            if self._conexao is not None:
+                self._gravar_disco(chave, expira_em, valor)
+
+    def _guardar_memoria(self, chave, expira_em, valor):
+        """Guarda em memória respeitando o limite de itens (chamar com a trava)."""
+        self._itens[chave] = (expira_em, valor)
+        self._itens.move_to_end(chave)
+
+        while len(self._itens) > self.max_itens:
+            self._itens.popitem(last=False)
+            self.removidos_lru += 1
+
+    def limpar(self):
+        """Remove todas as entradas (memória e disco) e zera os contadores."""
+        with self._trava:
+            self._itens.clear()
+            if self._conexao is not None:
+                self._conexao.execute("DELETE FROM cache_noticias")
+                self._conexao.commit()
+
+            self.acertos = self.falhas = self.expirados = 0
+            self.removidos_lru = self.acertos_disco = self.vencidos_servidos = 0
+
+    def fechar(self):
+        """Fecha a conexão com o SQLite (se houver)."""
+        with self._trava:
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
+
+    def estatisticas(self):
+        """Retorna os contadores do cache em um dicionário."""
+        with self._trava:
+            total = self.acertos + self.falhas
+            return {
+                'itens': len(self._itens),
+                'max_itens': self.max_itens,
+                'ttl_segundos': self.ttl_segundos,
+                'acertos': self.acertos,
+                'acertos_disco': self.acertos_disco,
+                'falhas': self.falhas,
+                'expirados': self.expirados,
+                'removidos_lru': self.removidos_lru,
+                'vencidos_servidos': self.vencidos_servidos,
+                'taxa_acerto': (self.acertos / total) if total else 0.0,
+                'disco': self.arquivo_sqlite
+            }
+
+    def __len__(self):
+        return len(self._itens)
+
+
+# ====== FUNÇÃO DE TESTE ======
+def testar_cache():
+    """Testa o cache de notícias"""
+
+    print("🧪 TESTANDO CACHE DE NOTÍCIAS")
+    print("=" * 50)
+
+    cache = CacheNoticias(ttl_segundos=1, max_itens=2)
+
+    print("\n1️⃣ Guardar e obter:")
+    cache.guardar(('PETR4', 5), {'ticker': 'PETR4'})
+    print(f"   Obtido: {cache.obter(('PETR4', 5))}")
+    print(f"   Inexistente: {cache.obter(('VALE3', 5))}")
+
+    print("\n2️⃣ Limite LRU (max 2 itens):")
+    cache.guardar(('VALE3', 5), {'ticker': 'VALE3'})
+    cache.obter(('PETR4', 5))  # PETR4 passa a ser o mais recente
+    cache.guardar(('ITUB4', 5), {'ticker': 'ITUB4'})
+    print(f"   VALE3 removido? {cache.obter(('VALE3', 5)) is None}")
+    print(f"   PETR4 mantido? {cache.obter(('PETR4', 5)) is not None}")
+
+    print("\n3️⃣ Expiração (TTL 1s):")
+    time.sleep(1.1)
+    print(f"   PETR4 expirou? {cache.obter(('PETR4', 5)) is None}")
+
+    print("\n4️⃣ Servir vencido (tolerância de 60s):")
+    cache.tolerancia_vencido_segundos = 60
+    cache.guardar(('VALE3', 5), {'ticker': 'VALE3'}, ttl_segundos=0)
+    valor, expira_em = cache.obter_vencido(('VALE3', 5))
+    print(f"   obter: {cache.obter(('VALE3', 5))} | obter_vencido: {valor} "
+          f"(vencido? {expira_em <= time.time()})")
+
+    print("\n📊 Estatísticas:")
+    for nome, valor in cache.estatisticas().items():
+        print(f"   {nome}: {valor}")
+
+
+# Executar teste se rodar arquivo diretamente
+if __name__ == "__main__":
+    testar_cache()
@@ -0,0 +1,428 @@
+"""
+DEDUPLICAÇÃO INCREMENTAL DE NOTÍCIAS
+
+Com várias fontes e atualizações repetidas, a mesma manchete chega
+muitas vezes (às vezes com link diferente só por ?utm_source=...). Em
+vez de remontar a lista a cada busca, cada ticker tem:
+
+- um conjunto limitado de "já vistas" (max_vistas por ticker, sai a mais
+  antiga): chave = hash do título normalizado (helpers.normalizar_texto)
+  e hash da URL canônica (sem www, fragmento e parâmetros de rastreio)
+- as max_recentes notícias mais novas, em ordem de publicação (mais
+  nova primeiro); cada busca só insere as que nunca foram vistas
+- o tempo das fontes vira um instante quando a notícia chega (o
+  atributo datetime da tag <time>, se veio; senão o texto relativo
+  "Há 2 horas" ou a data "12 de jan.") e é escrito de novo a partir
+  dele a cada consulta (a notícia não fica "Há 2 horas" para sempre);
+  texto que não dá para interpretar ("Há algum tempo") é exibido como
+  veio e a notícia fica depois de todas as de data conhecida
+- a mensagem do WhatsApp fica guardada e só é montada de novo quando
+  entra alguma notícia nova ou quando algum tempo exibido muda
+
+Exemplo:
+    indice = obter_indice_noticias()
+    novas = indice.mesclar('PETR4', noticias_da_busca)
+    indice.recentes('PETR4', 5)
+    indice.formatar('PETR4', 5, formatar_noticias_para_whatsapp)
+"""
+
+import bisect
+import hashlib
+import math
+import itertools
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+try:
+    from .utils.helpers import normalizar_texto
+except ImportError:
+    from utils.helpers import normalizar_texto
+
+# Configurações padrão
+MAX_VISTAS_POR_TICKER = 500
+MAX_RECENTES_POR_TICKER = 20
+
+# Parâmetros de URL que não mudam a notícia (rastreio, idioma do agregador)
+PARAMETROS_IGNORADOS = frozenset([
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
+    'fbclid', 'gclid', 'hl', 'gl', 'ceid', 'ref', 'oc'
+])
+
+_MINUTO, _HORA, _DIA, _SEMANA, _MES, _ANO = 60, 3600, 86400, 604800, 2592000, 31536000
+_SEGUNDOS_UNIDADE = {
+    'm': _MINUTO, 'min': _MINUTO, 'mins': _MINUTO, 'minuto': _MINUTO, 'minutos': _MINUTO,
+    'minute': _MINUTO, 'minutes': _MINUTO,
+    'h': _HORA, 'hr': _HORA, 'hrs': _HORA, 'hora': _HORA, 'horas': _HORA, 'hour': _HORA, 'hours': _HORA,
+    'd': _DIA, 'dia': _DIA, 'dias': _DIA, 'day': _DIA, 'days': _DIA,
+    'sem': _SEMANA, 'semana': _SEMANA, 'semanas': _SEMANA, 'week': _SEMANA, 'weeks': _SEMANA,
+    'mes': _MES, 'meses': _MES, 'month': _MES, 'months': _MES,
+    'ano': _ANO, 'anos': _ANO, 'year': _ANO, 'years': _ANO,
+}
+_PADRAO_TEMPO = re.compile(
+    r'\b(\d+)\s*(' + '|'.join(sorted(_SEGUNDOS_UNIDADE, key=len, reverse=True)) + r')\b'
+)
+_MESES = {'jan': 1, 'fev': 2, 'feb': 2, 'mar': 3, 'abr': 4, 'apr': 4, 'mai': 5, 'may': 5,
+          'jun': 6, 'jul': 7, 'ago': 8, 'aug': 8, 'set': 9, 'sep': 9, 'out': 10, 'oct': 10,
+          'nov': 11, 'dez': 12, 'dec': 12}
+# "12 de jan", "12 de janeiro de 2024" (já sem acentos e pontuação)
+_PADRAO_DATA_EXTENSO = re.compile(
+    r'\b(\d{1,2}) de (' + '|'.join(_MESES) + r')[a-z]*(?: de (\d{4}))?\b'
+)
+# "12/01/2024" vira "12 01 2024" depois de normalizar_texto
+_PADRAO_DATA_NUMERICA = re.compile(r'\b(\d{1,2}) (\d{1,2}) (\d{4})\b')
+
+# Chave de ordenação das notícias sem data conhecida: depois de todas as outras
+SEM_DATA = math.inf
+
+
+def _hash(texto):
+    """Hash curto (8 bytes) para o conjunto de vistas ocupar pouca memória."""
+    return hashlib.blake2b(texto.encode('utf-8'), digest_size=8).digest()
+
+
+def url_canonica(link):
+    """
+    Forma canônica do link: esquema e host em minúsculas, sem "www.",
+    sem fragmento, sem parâmetros de rastreio, demais parâmetros em ordem
+    e sem barra no final.
+    """
+    if not link:
+        return ''
+    partes = urlsplit(link.strip())
+    host = (partes.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    parametros = sorted((nome, valor) for nome, valor in parse_qsl(partes.query, keep_blank_values=True)
+                        if nome.lower() not in PARAMETROS_IGNORADOS)
+    caminho = partes.path.rstrip('/') or '/'
+    return urlunsplit((partes.scheme.lower(), host, caminho, urlencode(parametros), ''))
+
+
+def chaves_noticia(noticia):
+    """Chaves de deduplicação da notícia: hash do título normalizado e da URL canônica."""
+    chaves = []
+    titulo = normalizar_texto(noticia.get('titulo', ''))
+    if titulo:
+        chaves.append(b't' + _hash(titulo))
+    link = url_canonica(noticia.get('link'))
+    if link:
+        chaves.append(b'u' + _hash(link))
+    return chaves
+
+
+def _instante_data(dia, mes, ano, agora):
+    """Epoch do início do dia; sem ano, a última vez que a data ocorreu."""
+    hoje = datetime.fromtimestamp(agora)
+    try:
+        data = datetime(ano or hoje.year, mes, dia)
+        if ano is None and data > hoje:
+            data = data.replace(year=hoje.year - 1)
+    except ValueError:
+        return None
+    return data.timestamp()
+
+
+def estimar_publicacao(tempo, agora=None, data_iso=None):
+    """
+    Converte o tempo das fontes num instante (epoch). Usa data_iso (o
+    atributo datetime da tag <time>) quando veio; senão interpreta o texto:
+    "Há 3 horas", "3 days ago", "Ontem", "Agora", "12 de jan.",
+    "12/01/2024". Devolve None quando não dá para saber a idade
+    ("Há algum tempo", "Recente").
+    """
+    agora = time.time() if agora is None else agora
+
+    if data_iso:
+        try:
+            data = datetime.fromisoformat(data_iso.strip())
+        except (ValueError, AttributeError):
+            pass
+        else:
+            return min(agora, data.timestamp())
+
+    texto = normalizar_texto(tempo or '')
+
+    if 'ontem' in texto or 'yesterday' in texto:
+        return agora - _DIA
+    if texto in ('agora', 'agora mesmo', 'just now', 'now'):
+        return agora
+    encontrado = _PADRAO_TEMPO.search(texto)
+    if encontrado:
+        quantidade, unidade = encontrado.groups()
+        return agora - int(quantidade) * _SEGUNDOS_UNIDADE[unidade]
+    encontrado = _PADRAO_DATA_EXTENSO.search(texto)
+    if encontrado:
+        dia, mes, ano = encontrado.groups()
+        return _instante_data(int(dia), _MESES[mes], ano and int(ano), agora)
+    encontrado = _PADRAO_DATA_NUMERICA.search(texto)
+    if encontrado:
+        dia, mes, ano = encontrado.groups()
+        return _instante_data(int(dia), int(mes), int(ano), agora)
+    return None
+
+
+def tempo_relativo(publicado_em, agora=None):
+    """Instante (epoch) → texto no estilo das fontes: "Há 5 minutos", "Há 2 horas", "Ontem", "Há 3 meses"."""
+    agora = time.time() if agora is None else agora
+    segundos = max(0, agora - publicado_em)
+
+    if segundos < 60:
+        return "Agora"
+    if segundos < 3600:
+        minutos = int(segundos // 60)
+        return f"Há {minutos} minuto{'s' if minutos > 1 else ''}"
+    if segundos < 86400:
+        horas = int(segundos // 3600)
+        return f"Há {horas} hora{'s' if horas > 1 else ''}"
+    if segundos < 2 * 86400:
+        return "Ontem"
+    if segundos < _MES:
+        return f"Há {int(segundos // 86400)} dias"
+    if segundos < _ANO:
+        meses = int(segundos // _MES)
+        return f"Há {meses} {'mês' if meses == 1 else 'meses'}"
+    anos = int(segundos // _ANO)
+    return f"Há {anos} ano{'s' if anos > 1 else ''}"
+
+
+class _NoticiasTicker:
+    """Vistas e recentes de um ticker."""
+
+    __slots__ = ('vistas', 'recentes', 'versao', 'formatado')
+
+    def __init__(self):
+        self.vistas = OrderedDict()  # chave → None (conjunto com ordem de chegada)
+        self.recentes = []           # (-publicado_em ou SEM_DATA, sequência, notícia), mais nova primeiro
+        self.versao = 0
+        self.formatado = {}          # limite → ((versão, tempos exibidos), texto)
+
+
+class IndiceNoticias:
+    """
+    Índice incremental de notícias por ticker, seguro para várias threads.
+    """
+
+    def __init__(self, max_vistas=MAX_VISTAS_POR_TICKER, max_recentes=MAX_RECENTES_POR_TICKER):
+        self.max_vistas = max_vistas
+        self.max_recentes = max_recentes
+        self._tickers = {}
+        self._sequencia = itertools.count()
+        self._trava = threading.Lock()
+
+        # Contadores
+        self.recebidas = 0
+        self.duplicadas = 0
+        self.formatacoes = 0
+        self.formatacoes_evitadas = 0
+
+    def mesclar(self, ticker, noticias, agora=None):
+        """
+        Insere as notícias ainda não vistas deste ticker entre as
+        recentes (na posição pela data) e devolve só as novas.
+        """
+        agora = time.time() if agora is None else agora
+        novas = []
+
+        with self._trava:
+            estado = self._tickers.get(ticker)
+            if estado is None:
+                estado = self._tickers[ticker] = _NoticiasTicker()
+
+            for noticia in noticias:
+                self.recebidas += 1
+                chaves = chaves_noticia(noticia)
+                if not chaves or any(chave in estado.vistas for chave in chaves):
+                    self.duplicadas += 1
+                    continue
+
+                for chave in chaves:
+                    estado.vistas[chave] = None
+                while len(estado.vistas) > self.max_vistas:
+                    estado.vistas.popitem(last=False)
+
+                publicado_em = estimar_publicacao(noticia.get('tempo'), agora, noticia.get('publicado_em'))
+                ordem = SEM_DATA if publicado_em is None else -publicado_em
+                item = (ordem, next(self._sequencia), noticia)
+                bisect.insort(estado.recentes, item)
+                novas.append(noticia)
+
+            if len(estado.recentes) > self.max_recentes:
+                del estado.recentes[self.max_recentes:]
+            if novas:
+                estado.versao += 1
+
+        return novas
+
+    def _recentes(self, estado, limite, agora):
+        """
+        Cópias das recentes com 'tempo' reescrito a partir do instante
+        estimado (as sem data conhecida mantêm o texto da fonte).
+        """
+        return [dict(noticia) if ordem == SEM_DATA else dict(noticia, tempo=tempo_relativo(-ordem, agora))
+                for ordem, _, noticia in estado.recentes[:limite]]
+
+    def recentes(self, ticker, limite=None, agora=None):
+        """As notícias mais novas do ticker (mais nova primeiro), com o tempo atualizado."""
+        agora = time.time() if agora is None else agora
+        with self._trava:
+            estado = self._tickers.get(ticker)
+            if estado is None:
+                return []
+            return self._recentes(estado, limite, agora)
+
+    def formatar(self, ticker, limite, formatador, agora=None):
+        """
+        formatador(noticias, ticker) aplicado às recentes, reaproveitando
+        o texto anterior se nenhuma notícia nova entrou e nenhum tempo
+        exibido mudou desde então.
+        """
+        agora = time.time() if agora is None else agora
+        with self._trava:
+            estado = self._tickers.get(ticker)
+            if estado is None:
+                noticias, versao = [], None
+            else:
+                noticias = self._recentes(estado, limite, agora)
+                versao = (estado.versao, tuple(noticia['tempo'] for noticia in noticias))
+                guardado = estado.formatado.get(limite)
+                if guardado is not None and guardado[0] == versao:
+                    self.formatacoes_evitadas += 1
+                    return guardado[1]
+
+        texto = formatador(noticias, ticker)
+
+        with self._trava:
+            self.formatacoes += 1
+            if estado is not None:
+                estado.formatado[limite] = (versao, texto)
+        return texto
+
+    def limpar(self, ticker=None):
+        """Esquece um ticker (ou todos)."""
+        with self._trava:
+            if ticker is None:
+                self._tickers.clear()
+            else:
+                self._tickers.pop(ticker, None)
+
+    def estatisticas(self):
+        """Notícias recebidas, duplicadas descartadas e formatações evitadas."""
+        with self._trava:
+            return {
+                'tickers': len(self._tickers),
+                'recebidas': self.recebidas,
+                'duplicadas': self.duplicadas,
+                'taxa_duplicadas': (self.duplicadas / self.recebidas) if self.recebidas else 0.0,
+                'vistas': sum(len(e.vistas) for e in self._tickers.values()),
+                'formatacoes': self.formatacoes,
+                'formatacoes_evitadas': self.formatacoes_evitadas
+            }
+
+
+# ====== ÍNDICE PADRÃO ======
+_indice_padrao = None
+_trava_indice = threading.Lock()
+
+
+def obter_indice_noticias():
+    """Retorna o índice compartilhado (criado na primeira chamada)."""
+    global _indice_padrao
+
+    if _indice_padrao is None:
+        with _trava_indice:
+            if _indice_padrao is None:
+                _indice_padrao = IndiceNoticias()
+    return _indice_padrao
+
+
+# ====== FUNÇÃO DE TESTE ======
+def testar_deduplicacao():
+    """Simula atualizações repetidas de 3 fontes com manchetes repetidas"""
+
+    import random
+
+    try:
+        from .news_fetcher import formatar_noticias_para_whatsapp
+    except ImportError:
+        from news_fetcher import formatar_noticias_para_whatsapp
+
+    print("🧪 TESTANDO DEDUPLICAÇÃO DE NOTÍCIAS")
+    print("=" * 50)
+
+    print("\n1️⃣ URL canônica:")
+    for link in ["https://WWW.InfoMoney.com.br/mercados/petr4/?utm_source=x#topo",
+                 "https://news.google.com/articles/CBMi0001?hl=pt-BR&gl=BR&ceid=BR:pt-419"]:
+        print(f"   {link}\n   → {url_canonica(link)}")
+
+    aleatorio = random.Random(3)
+    manchetes = [f"Petrobras (PETR4) anuncia resultado número {i}" for i in range(60)]
+
+    def busca(rodada):
+        """3 fontes; cada rodada traz as 8 manchetes mais novas, com variações."""
+        noticias = []
+        for fonte, host in [('Google', 'news.google.com'), ('InfoMoney', 'www.infomoney.com.br'),
+                            ('Investing', 'br.investing.com')]:
+            for idade, i in enumerate(range(rodada + 7, rodada - 1, -1)):
+                titulo = manchetes[i % len(manchetes)]
+                if aleatorio.random() < 0.3:
+                    titulo = titulo.upper() + "!"
+                noticias.append({
+                    'titulo': titulo,
+                    'link': f"https://{host}/n/{i}?utm_source=rodada{rodada}",
+                    'fonte': fonte,
+                    'tempo': f"Há {idade + 1} horas"
+                })
+        return noticias
+
+    print("\n2️⃣ 40 atualizações (3 fontes × 8 manchetes cada):")
+    indice = IndiceNoticias()
+    tamanho_bruto = tamanho_indice = 0
+    inicio = time.perf_counter()
+    for rodada in range(40):
+        noticias = busca(rodada)
+        tamanho_bruto += len(formatar_noticias_para_whatsapp(noticias, 'PETR4'))
+        indice.mesclar('PETR4', noticias)
+        tamanho_indice += len(indice.formatar('PETR4', 5, formatar_noticias_para_whatsapp))
+        # Pedidos repetidos entre uma atualização e outra
+        for _ in range(9):
+            indice.formatar('PETR4', 5, formatar_noticias_para_whatsapp)
+    duracao = time.perf_counter() - inicio
+
+    print(f"   Mensagem média: {tamanho_bruto / 40:.0f} → {tamanho_indice / 40:.0f} caracteres")
+    print(f"   Tempo total: {duracao * 1000:.1f} ms")
+    print(f"   Mais recentes: {[n['titulo'][-12:] for n in indice.recentes('PETR4', 3)]}")
+
+    print("\n3️⃣ O tempo exibido acompanha o relógio:")
+    indice_tempo = IndiceNoticias()
+    chegada = time.time()
+    indice_tempo.mesclar('VALE3', [{'titulo': 'Vale anuncia recompra', 'link': 'https://x/1',
+                                    'fonte': 'X', 'tempo': 'Há 2 horas'}], agora=chegada)
+    for horas_depois in (0, 3, 30):
+        noticia = indice_tempo.recentes('VALE3', agora=chegada + horas_depois * 3600)[0]
+        print(f"   {horas_depois:2d}h depois: {noticia['tempo']}")
+
+    print("\n4️⃣ Datas absolutas, notícias antigas e tempo desconhecido:")
+    indice_datas = IndiceNoticias()
+    chegada = datetime(2026, 3, 15, 12).timestamp()
+    tempos = [('Há algum tempo', None), ('12 de jan.', None), ('Há 1 ano', None),
+              ('3 days ago', None), ('Há 2 horas', None), ('05/03/2025', None),
+              ('Recente', '2026-03-15T11:30:00'), ('12 de dez.', None)]
+    indice_datas.mesclar('ITUB4', [{'titulo': f'Itaú notícia {i}', 'link': f'https://x/{i}',
+                                    'fonte': 'X', 'tempo': tempo, 'publicado_em': data_iso}
+                                   for i, (tempo, data_iso) in enumerate(tempos)], agora=chegada)
+    exibidos = [n['tempo'] for n in indice_datas.recentes('ITUB4', agora=chegada)]
+    print(f"   {exibidos}")
+    assert exibidos == ['Há 30 minutos', 'Há 2 horas', 'Há 3 dias', 'Há 2 meses', 'Há 3 meses',
+                        'Há 1 ano', 'Há 1 ano', 'Há algum tempo'], exibidos
+    assert estimar_publicacao('12 de jan. de 2024', chegada) == datetime(2024, 1, 12).timestamp()
+    assert estimar_publicacao('Há algum tempo', chegada) is None
+    print(f"\n📊 Estatísticas: {indice.estatisticas()}")
+
+
+# Executar teste se rodar arquivo diretamente
+if __name__ == "__main__":
+    testar_deduplicacao()
@@ -6,10 +6,32 @@ ATENÇÃO: Para uso comercial, substitua por APIs oficiais como:
 - NewsAPI, Alpha Vantage, Yahoo Finance API, etc.
 """
 
+import asyncio
 import requests
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import time
 from bs4 import BeautifulSoup
+import lxml.html
 import re
+from itertools import islice
+from urllib.parse import urljoin, urlsplit
+
+try:
+    from .news_cache import CacheNoticias
+    from .single_flight import SingleFlight
+    from .http_client import obter_cliente_http
+    from .circuit_breaker import obter_disjuntor, estatisticas_disjuntores, CircuitoAberto
+    from .rate_limiter import obter_limitador
+    from .news_dedup import obter_indice_noticias, chaves_noticia
+    from .utils.ticker_registry import obter_registro
+except ImportError:
+    from news_cache import CacheNoticias
+    from single_flight import SingleFlight
+    from http_client import obter_cliente_http
+    from circuit_breaker import obter_disjuntor, estatisticas_disjuntores, CircuitoAberto
+    from rate_limiter import obter_limitador
+    from news_dedup import obter_indice_noticias, chaves_noticia
+    from utils.ticker_registry import obter_registro
 
 # Configurações importantes
 HEADERS = {
@@ -23,6 +45,159 @@ SITES_BUSCA = {
     'infomoney': 'https://www.infomoney.com.br/?s={query}'
 }
 
+# Timeout máximo de uma requisição; o disjuntor de cada fonte reduz
+# conforme a latência observada (p99)
+TIMEOUT_MAXIMO_SEGUNDOS = 10
+
+# Espera máxima na fila do limite de requisições do host (rate_limiter)
+PRAZO_FILA_HOST_SEGUNDOS = 5.0
+
+# Prazo global da busca assíncrona em todas as fontes
+PRAZO_MULTIFONTES_SEGUNDOS = 5.0
+
+# Máximo de buscas simultâneas em buscar_noticias_em_lote: threads
+# compartilhadas por todas as chamadas (criadas uma vez, não a cada lote)
+MAX_WORKERS_LOTE = 4
+EXECUTOR_LOTE = ThreadPoolExecutor(max_workers=MAX_WORKERS_LOTE,
+                                   thread_name_prefix='lote-noticias')
+
+# Threads próprias da busca em várias fontes (fora do executor padrão do
+# event loop): uma fonte lenta ocupa no máximo uma delas até o prazo
+MAX_WORKERS_FONTES = 8
+EXECUTOR_FONTES = ThreadPoolExecutor(max_workers=MAX_WORKERS_FONTES,
+                                     thread_name_prefix='fontes-noticias')
+
+# Nome da fonte no Google News: primeiro <div> cujo texto começa com letra
+_PADRAO_FONTE = re.compile(r'^\w')
+
+# Parser HTML do lxml reaproveitado (páginas em UTF-8, o caso comum)
+_PARSER_HTML_UTF8 = lxml.html.HTMLParser(encoding='utf-8')
+
+# Entradas vencidas continuam guardadas por mais este tempo, para servir
+# quando a fonte estiver fora do ar (ou enquanto o atualizador renova)
+TOLERANCIA_VENCIDO_SEGUNDOS = 3600
+
+# Cache de resultados (evita repetir a mesma busca em pouco tempo)
+CACHE_NOTICIAS = CacheNoticias(tolerancia_vencido_segundos=TOLERANCIA_VENCIDO_SEGUNDOS)
+
+# Notícias simuladas (fallback) ficam pouco tempo no cache,
+# para tentar a busca real de novo logo
+TTL_FALLBACK_SEGUNDOS = 30
+
+
+def configurar_cache(ttl_segundos=300, max_itens=256, arquivo_sqlite=None,
+                     tolerancia_vencido_segundos=TOLERANCIA_VENCIDO_SEGUNDOS):
+    """
+    Reconfigura o cache de notícias.
+    
+    Exemplo (cache que sobrevive a reinícios):
+        configurar_cache(ttl_segundos=600, arquivo_sqlite='logs/cache_noticias.sqlite3')
+    """
+    global CACHE_NOTICIAS
+    
+    CACHE_NOTICIAS.fechar()
+    CACHE_NOTICIAS = CacheNoticias(ttl_segundos, max_itens, arquivo_sqlite,
+                                   tolerancia_vencido_segundos)
+    return CACHE_NOTICIAS
+
+
+def estatisticas_cache():
+    """Retorna acertos, falhas e tamanho do cache de notícias."""
+    return CACHE_NOTICIAS.estatisticas()
+
+
+# Buscas simultâneas pelo mesmo (ticker, max_noticias) viram uma só
+VOOS_NOTICIAS = SingleFlight()
+
+
+def estatisticas_coalescencia():
+    """Retorna quantas buscas foram executadas e quantas foram coalescidas."""
+    return VOOS_NOTICIAS.estatisticas()
+
+
+def estatisticas_http():
+    """Retorna as métricas do pool HTTP (handshakes, reaproveitamento, p95)."""
+    return obter_cliente_http().estatisticas()
+
+
+def estatisticas_fontes():
+    """Estado (fechado/aberto/meio_aberto), aberturas e timeout atual de cada fonte."""
+    return estatisticas_disjuntores()
+
+
+def estatisticas_limites():
+    """Histograma das esperas pelo limite de requisições de cada host."""
+    return obter_limitador().estatisticas()
+
+
+def estatisticas_deduplicacao():
+    """Notícias repetidas descartadas e mensagens reaproveitadas (news_dedup)."""
+    return obter_indice_noticias().estatisticas()
+
+
+def _baixar_pagina(nome_fonte, url, timeout_maximo=TIMEOUT_MAXIMO_SEGUNDOS,
+                   prazo_fila=PRAZO_FILA_HOST_SEGUNDOS, prazo_final=None):
+    """
+    GET pelo pool compartilhado, protegido pelo disjuntor da fonte:
+    timeout adaptado à latência da fonte e CircuitoAberto na hora se a
+    fonte estiver fora do ar. Status de erro (4xx/5xx) contam como falha.
+    
+    Antes de sair, a requisição espera a vez no limite do host (até
+    prazo_fila segundos; depois disso, LimiteExcedido).
+    
+    Com prazo_final (time.monotonic), o tempo que sobra depois da fila é
+    recalculado e limita o timeout e as novas tentativas do cliente HTTP;
+    se não sobrar nada, TimeoutError sem fazer a requisição.
+    """
+    disjuntor = obter_disjuntor(nome_fonte)
+    if not disjuntor.aberto():
+        # Com o circuito aberto não vale a pena esperar: chamar() recusa na hora
+        obter_limitador().aguardar(urlsplit(url).hostname, prazo=prazo_fila)
+    
+    tempo_retry = None
+    if prazo_final is not None:
+        tempo_retry = prazo_final - time.monotonic()
+        if tempo_retry <= 0:
+            raise TimeoutError(f"Prazo esgotado antes da requisição a {nome_fonte}")
+        timeout_maximo = min(timeout_maximo, tempo_retry)
+    
+    def baixar(timeout):
+        resposta = obter_cliente_http().get(url, headers=HEADERS, timeout=timeout,
+                                            tempo_retry=tempo_retry)
+        resposta.raise_for_status()
+        return resposta
+    
+    return disjuntor.chamar(baixar, timeout_maximo=timeout_maximo)
+
+
+# Pool de processos opcional: com ele, o HTML baixado vai em bytes para
+# outro processo ser analisado, em vez de disputar o GIL com o resto
+POOL_EXTRACAO = None
+
+
+# Atualizador em segundo plano opcional (news_refresher.AtualizadorNoticias):
+# conta os pedidos e serve entradas vencidas enquanto atualiza
+ATUALIZADOR = None
+
+
+def configurar_atualizador(atualizador):
+    """Liga (ou desliga, com None) o atualizador de notícias em segundo plano."""
+    global ATUALIZADOR
+    
+    ATUALIZADOR = atualizador
+    return atualizador
+
+
+def configurar_pool_extracao(pool):
+    """
+    Define o pool (process_pool.PoolProcessos) que extrai as notícias do
+    HTML, ou None para extrair no próprio processo.
+    """
+    global POOL_EXTRACAO
+    
+    POOL_EXTRACAO = pool
+    return pool
+
 
 def criar_query_noticias(ticker, empresa=None):
     """
@@ -31,113 +206,362 @@ def criar_query_noticias(ticker, empresa=None):
     Exemplo: PETR4 → "Petrobras OR PETR4 OR PETR3 notícias"
     """
     
-    # Mapeamento de alguns tickers comuns para nomes de empresas
-    ticker_para_empresa = {
-        'PETR4': 'Petrobras', 'PETR3': 'Petrobras',
-        'VALE3': 'Vale', 'VALE5': 'Vale',
-        'ITUB4': 'Itaú Unibanco', 'ITUB3': 'Itaú',
-        'BBDC4': 'Bradesco', 'BBDC3': 'Bradesco',
-        'BBAS3': 'Banco do Brasil',
-        'WEGE3': 'WEG',
-        'B3SA3': 'B3 Bolsa Balcão',
-        'ABEV3': 'Ambev',
-        'MGLU3': 'Magazine Luiza',
-        'VIIA3': 'Via'
-    }
+    # Empresa informada: monta na hora
+    if empresa:
+        return f'{empresa} OR {ticker} "ações" OR "resultados" OR "dividendos"'
     
-    # Usar empresa fornecida ou buscar no mapeamento
-    nome_empresa = empresa if empresa else ticker_para_empresa.get(ticker, ticker)
+    # Ticker cadastrado: query já montada na carga do cadastro
+    query = obter_registro().query_noticias(ticker)
     
-    # Criar query de busca
-    query = f'{nome_empresa} OR {ticker} "ações" OR "resultados" OR "dividendos"'
+    # Fora do cadastro: usa o próprio ticker
+    if query is None:
+        query = f'{ticker} OR {ticker} "ações" OR "resultados" OR "dividendos"'
     
     return query
 
 
-def buscar_noticias_google(query, max_noticias=5):
+def extrair_noticias_google(html, query, max_noticias=5):
     """
-    Busca notícias no Google News (APENAS PARA FINS EDUCACIONAIS).
-    Retorna lista de dicionários com {titulo, link, fonte, data_relativa}
+    Extrai as notícias de uma página de resultados do Google News.
+    Retorna lista de dicionários com {titulo, link, fonte, tempo, publicado_em, query}
+    (publicado_em: atributo datetime da tag <time>, ou None)
+    """
+    
+    noticias = []
+    
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Encontrar notícias (seletores do Google News)
+    artigos = soup.find_all('article', limit=max_noticias+5)
+    
+    for artigo in artigos[:max_noticias]:
+        try:
+            # Tentar encontrar título e link
+            link_tag = artigo.find('a', href=True)
+            if not link_tag:
+                continue
+            
+            titulo = link_tag.get_text(strip=True)
+            link_relativo = link_tag['href']
+            
+            # Converter link relativo para absoluto
+            if link_relativo.startswith('./'):
+                link = 'https://news.google.com' + link_relativo[1:]
+            elif link_relativo.startswith('/'):
+                link = 'https://news.google.com' + link_relativo
+            else:
+                link = link_relativo
+            
+            # Tentar encontrar fonte e tempo
+            fonte_tag = artigo.find('div', string=_PADRAO_FONTE)
+            fonte = fonte_tag.get_text(strip=True) if fonte_tag else "Fonte desconhecida"
+            
+            tempo_tag = artigo.find('time')
+            tempo = tempo_tag.get_text(strip=True) if tempo_tag else "Há algum tempo"
+            
+            # Adicionar à lista
+            noticias.append({
+                'titulo': titulo,
+                'link': link,
+                'fonte': fonte,
+                'tempo': tempo,
+                'publicado_em': tempo_tag.get('datetime') if tempo_tag else None,
+                'query': query
+            })
+            
+        except Exception as e:
+            # Ignorar erros em artigos individuais
+            continue
+    
+    # Se não encontrou notícias no formato esperado, tentar método alternativo
+    if not noticias:
+        # Buscar por headings
+        for h3 in soup.find_all('h3', limit=max_noticias):
+            link_tag = h3.find_parent('a', href=True)
+            if link_tag:
+                noticias.append({
+                    'titulo': h3.get_text(strip=True),
+                    'link': 'https://news.google.com' + link_tag['href'] if link_tag['href'].startswith('./') else link_tag['href'],
+                    'fonte': 'Google News',
+                    'tempo': 'Recente',
+                    'query': query
+                })
+    
+    return noticias
+
+
+def _texto_limpo(elemento):
+    """Equivalente a get_text(strip=True) do BeautifulSoup para um elemento lxml."""
+    return ''.join(parte.strip() for parte in elemento.itertext())
+
+
+def _texto_unico(elemento):
+    """
+    Equivalente ao atributo .string do BeautifulSoup: o texto do elemento
+    quando ele tem um único filho (texto, ou uma tag com texto único).
+    """
+    filhos = list(elemento)
+    texto = elemento.text
+    
+    if not filhos:
+        return texto
+    if len(filhos) == 1 and not texto and not filhos[0].tail:
+        return _texto_unico(filhos[0])
+    return None
+
+
+def _link_absoluto_google(link_relativo):
+    """Converte link relativo do Google News para absoluto."""
+    if link_relativo.startswith('./'):
+        return 'https://news.google.com' + link_relativo[1:]
+    if link_relativo.startswith('/'):
+        return 'https://news.google.com' + link_relativo
+    return link_relativo
+
+
+def extrair_noticias_google_rapido(conteudo, query, max_noticias=5, codificacao='utf-8'):
+    """
+    Versão rápida de extrair_noticias_google, com o mesmo resultado:
+    - usa o parser do lxml (em C) direto sobre os bytes da resposta
+    - só percorre os nós que interessam (article, a, div, time e h3)
+    - regex da fonte pré-compilada no módulo
+    
+    Aceita bytes (preferível) ou texto.
     """
     
     noticias = []
     
+    if isinstance(conteudo, str):
+        conteudo = conteudo.encode('utf-8')
+        codificacao = 'utf-8'
+    
+    parser = _PARSER_HTML_UTF8 if codificacao.lower() in ('utf-8', 'utf8') \
+        else lxml.html.HTMLParser(encoding=codificacao)
+    
     try:
-        # Montar URL
-        url = SITES_BUSCA['google_news'].format(query=requests.utils.quote(query))
-        
-        print(f"🔍 Buscando: {url}")
-        
-        # Fazer requisição (com timeout para não travar)
-        resposta = requests.get(url, headers=HEADERS, timeout=10)
-        resposta.raise_for_status()  # Verificar se deu erro
+        raiz = lxml.html.fromstring(conteudo, parser=parser)
+    except Exception:
+        # Documento vazio ou ilegível: nenhuma notícia
+        return noticias
+    
+    # Mesmo critério da versão original: só os primeiros max_noticias artigos
+    for artigo in islice(raiz.iter('article'), max_noticias):
+        link_tag = next((a for a in artigo.iter('a') if a.get('href') is not None), None)
+        if link_tag is None:
+            continue
         
-        # Analisar HTML
-        soup = BeautifulSoup(resposta.text, 'html.parser')
+        fonte = "Fonte desconhecida"
+        for div in artigo.iter('div'):
+            texto = _texto_unico(div)
+            if texto and _PADRAO_FONTE.search(texto):
+                fonte = _texto_limpo(div)
+                break
         
-        # Encontrar notícias (seletores do Google News)
-        artigos = soup.find_all('article', limit=max_noticias+5)
+        tempo_tag = next(artigo.iter('time'), None)
         
-        for artigo in artigos[:max_noticias]:
-            try:
-                # Tentar encontrar título e link
-                link_tag = artigo.find('a', href=True)
-                if not link_tag:
-                    continue
-                
-                titulo = link_tag.get_text(strip=True)
-                link_relativo = link_tag['href']
-                
-                # Converter link relativo para absoluto
-                if link_relativo.startswith('./'):
-                    link = 'https://news.google.com' + link_relativo[1:]
-                elif link_relativo.startswith('/'):
-                    link = 'https://news.google.com' + link_relativo
-                else:
-                    link = link_relativo
-                
-                # Tentar encontrar fonte e tempo
-                fonte_tag = artigo.find('div', string=re.compile(r'^\w'))
-                fonte = fonte_tag.get_text(strip=True) if fonte_tag else "Fonte desconhecida"
-                
-                tempo_tag = artigo.find('time')
-                tempo = tempo_tag.get_text(strip=True) if tempo_tag else "Há algum tempo"
-                
-                # Adicionar à lista
+        noticias.append({
+            'titulo': _texto_limpo(link_tag),
+            'link': _link_absoluto_google(link_tag.get('href')),
+            'fonte': fonte,
+            'tempo': _texto_limpo(tempo_tag) if tempo_tag is not None else "Há algum tempo",
+            'publicado_em': tempo_tag.get('datetime') if tempo_tag is not None else None,
+            'query': query
+        })
+    
+    # Se não encontrou notícias no formato esperado, tentar método alternativo
+    if not noticias:
+        for h3 in islice(raiz.iter('h3'), max_noticias):
+            link_tag = next((a for a in h3.iterancestors('a') if a.get('href') is not None), None)
+            if link_tag is not None:
+                href = link_tag.get('href')
                 noticias.append({
-                    'titulo': titulo,
-                    'link': link,
-                    'fonte': fonte,
-                    'tempo': tempo,
+                    'titulo': _texto_limpo(h3),
+                    'link': 'https://news.google.com' + href if href.startswith('./') else href,
+                    'fonte': 'Google News',
+                    'tempo': 'Recente',
                     'query': query
                 })
-                
-            except Exception as e:
-                # Ignorar erros em artigos individuais
-                continue
+    
+    return noticias
+
+
+def buscar_noticias_google(query, max_noticias=5, exibir=True):
+    """
+    Busca notícias no Google News (APENAS PARA FINS EDUCACIONAIS).
+    Retorna lista de dicionários com {titulo, link, fonte, data_relativa}
+    
+    Com exibir=False nada é impresso (uso em servidor ou lote).
+    """
+    
+    noticias = []
+    
+    try:
+        # Montar URL
+        url = SITES_BUSCA['google_news'].format(query=requests.utils.quote(query))
         
-        # Se não encontrou notícias no formato esperado, tentar método alternativo
-        if not noticias:
-            # Buscar por headings
-            for h3 in soup.find_all('h3', limit=max_noticias):
-                link_tag = h3.find_parent('a', href=True)
-                if link_tag:
-                    noticias.append({
-                        'titulo': h3.get_text(strip=True),
-                        'link': 'https://news.google.com' + link_tag['href'] if link_tag['href'].startswith('./') else link_tag['href'],
-                        'fonte': 'Google News',
-                        'tempo': 'Recente',
-                        'query': query
-                    })
+        if exibir:
+            print(f"🔍 Buscando: {url}")
+        
+        # Fazer requisição pelo pool compartilhado (timeout adaptativo; com o
+        # circuito aberto falha na hora, sem esperar)
+        resposta = _baixar_pagina('google_news', url)
+        
+        # Analisar HTML direto dos bytes (sem decodificar a página inteira antes),
+        # num processo do pool se houver um configurado
+        extrair = extrair_noticias_google_rapido if POOL_EXTRACAO is None \
+            else POOL_EXTRACAO.extrair_noticias_google
+        noticias = extrair(resposta.content, query, max_noticias, resposta.encoding or 'utf-8')
                 
+    except CircuitoAberto:
+        if exibir:
+            print("⚡ Google News fora do ar (circuito aberto): sem esperar o timeout")
+        noticias = criar_noticias_fallback(query, max_noticias)
     except Exception as e:
-        print(f"⚠️ Erro ao buscar no Google News: {e}")
+        if exibir:
+            print(f"⚠️ Erro ao buscar no Google News: {e}")
         # Retornar notícias de fallback (simuladas)
         noticias = criar_noticias_fallback(query, max_noticias)
     
     return noticias
 
 
+def extrair_noticias_genericas(html, query, max_noticias=5, url_base='', fonte='Web'):
+    """
+    Extrator simples para portais de notícias (InfoMoney, Investing...):
+    procura títulos (h2/h3) com link e monta a mesma estrutura do Google News.
+    """
+    
+    noticias = []
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    for titulo_tag in soup.find_all(['h2', 'h3']):
+        if len(noticias) >= max_noticias:
+            break
+        
+        # O link pode estar dentro do título ou envolvendo o título
+        link_tag = titulo_tag.find('a', href=True) or titulo_tag.find_parent('a', href=True)
+        titulo = titulo_tag.get_text(strip=True)
+        if not link_tag or not titulo:
+            continue
+        
+        tempo_tag = titulo_tag.find_next('time')
+        
+        noticias.append({
+            'titulo': titulo,
+            'link': urljoin(url_base, link_tag['href']),
+            'fonte': fonte,
+            'tempo': tempo_tag.get_text(strip=True) if tempo_tag else 'Recente',
+            'publicado_em': tempo_tag.get('datetime') if tempo_tag else None,
+            'query': query
+        })
+    
+    return noticias
+
+
+def _extrair_por_fonte(nome_fonte, html, query, max_noticias, url):
+    """Escolhe o extrator certo para cada site de SITES_BUSCA."""
+    if nome_fonte == 'google_news':
+        return extrair_noticias_google_rapido(html, query, max_noticias)
+    
+    nomes = {'investing_br': 'Investing.com', 'infomoney': 'InfoMoney'}
+    return extrair_noticias_genericas(html, query, max_noticias, url_base=url,
+                                      fonte=nomes.get(nome_fonte, nome_fonte))
+
+
+def _buscar_em_fonte(nome_fonte, modelo_url, query, max_noticias, prazo_final):
+    """
+    Busca (bloqueante) em uma única fonte. Usada pelas threads de
+    EXECUTOR_FONTES na busca assíncrona; erros sobem para quem chamou.
+    
+    prazo_final (time.monotonic) vale para tudo: se a vez desta fonte
+    chegar depois dele, nada é feito; a espera no limite do host fica
+    dentro do tempo que sobrou, e o timeout e as novas tentativas da
+    requisição, dentro do que sobrou depois dessa espera.
+    """
+    restante = prazo_final - time.monotonic()
+    if restante <= 0:
+        return []
+    
+    url = modelo_url.format(query=requests.utils.quote(query))
+    resposta = _baixar_pagina(nome_fonte, url, timeout_maximo=restante,
+                              prazo_fila=min(PRAZO_FILA_HOST_SEGUNDOS, restante),
+                              prazo_final=prazo_final)
+    codificacao = resposta.encoding or 'utf-8'
+    
+    if nome_fonte == 'google_news':
+        # Extração rápida (lxml) direto dos bytes, como em buscar_noticias_google
+        extrair = extrair_noticias_google_rapido if POOL_EXTRACAO is None \
+            else POOL_EXTRACAO.extrair_noticias_google
+        return extrair(resposta.content, query, max_noticias, codificacao)
+    
+    if POOL_EXTRACAO is not None:
+        return POOL_EXTRACAO.extrair_por_fonte(nome_fonte, resposta.content, query, max_noticias,
+                                               url, codificacao)
+    return _extrair_por_fonte(nome_fonte, resposta.text, query, max_noticias, url)
+
+
+def mesclar_noticias(listas, max_noticias=5):
+    """
+    Junta as listas de várias fontes, na ordem recebida, sem repetir
+    notícias (mesmo título normalizado ou mesmo link canônico).
+    """
+    vistos = set()
+    mescladas = []
+    
+    for noticias in listas:
+        for noticia in noticias:
+            chaves = chaves_noticia(noticia)
+            if any(chave in vistos for chave in chaves):
+                continue
+            
+            vistos.update(chaves)
+            mescladas.append(noticia)
+            
+            if len(mescladas) >= max_noticias:
+                return mescladas
+    
+    return mescladas
+
+
+async def buscar_noticias_multifontes_async(query, max_noticias=5, prazo_segundos=PRAZO_MULTIFONTES_SEGUNDOS,
+                                            sites=None):
+    """
+    Consulta todas as fontes de SITES_BUSCA ao mesmo tempo e espera no
+    máximo prazo_segundos. Fontes que não responderem a tempo (ou que
+    falharem) são ignoradas; o que chegou é mesclado sem duplicatas.
+    
+    Retorna (noticias, fontes_que_responderam).
+    """
+    sites = sites or SITES_BUSCA
+    loop = asyncio.get_running_loop()
+    prazo_final = time.monotonic() + prazo_segundos
+    
+    tarefas = {
+        loop.run_in_executor(EXECUTOR_FONTES, _buscar_em_fonte, nome, modelo_url,
+                             query, max_noticias, prazo_final): nome
+        for nome, modelo_url in sites.items()
+    }
+    
+    concluidas, pendentes = await asyncio.wait(tarefas, timeout=prazo_segundos)
+    
+    # Buscas que nem começaram são canceladas; as que já estão rodando
+    # terminam sozinhas perto do prazo (timeout = tempo restante) e o
+    # resultado delas é descartado
+    for tarefa in pendentes:
+        tarefa.cancel()
+    
+    por_fonte = {}
+    for tarefa in concluidas:
+        if tarefa.exception() is None:
+            por_fonte[tarefas[tarefa]] = tarefa.result()
+    
+    # Mantém a ordem de prioridade das fontes (a ordem de SITES_BUSCA)
+    fontes = [nome for nome in sites if por_fonte.get(nome)]
+    noticias = mesclar_noticias([por_fonte[nome] for nome in fontes], max_noticias)
+    
+    return noticias, fontes
+
+
 def criar_noticias_fallback(query, max_noticias=3):
     """
     Cria notícias simuladas quando a busca real falha.
@@ -218,28 +642,279 @@ def formatar_noticias_para_whatsapp(noticias, ticker):
     return mensagem
 
 
-def buscar_noticias_por_ticker(ticker, max_noticias=5):
+def formatar_resumo_noticias_whatsapp(resultados):
+    """
+    Junta as mensagens de vários tickers (já formatadas por
+    formatar_noticias_para_whatsapp) em um único resumo para WhatsApp.
+    """
+    
+    if not resultados:
+        return "📭 Nenhum ticker informado para buscar notícias."
+    
+    mensagem = f"🗞️ *RESUMO DE NOTÍCIAS - {len(resultados)} ATIVOS*\n"
+    mensagem += f"📌 {', '.join(resultados)}\n"
+    
+    for resultado in resultados.values():
+        mensagem += "\n" + "─" * 20 + "\n\n"
+        mensagem += resultado['formatado_whatsapp'] + "\n"
+    
+    return mensagem
+
+
+def buscar_noticias_por_ticker(ticker, max_noticias=5, exibir=True, usar_cache=True):
     """
     Função principal: busca notícias para um ticker específico.
+    
+    Com exibir=False nada é impresso (uso em servidor ou lote).
+    Com usar_cache=True (padrão), pedidos repetidos dentro do prazo do
+    cache devolvem o resultado já pronto, sem nova requisição.
+    
+    Pedidos simultâneos para a mesma chave esperam pela mesma busca
+    (single-flight) em vez de cada um fazer a sua.
+    
+    Com um atualizador ligado (configurar_atualizador), uma entrada
+    recém-vencida é devolvida na hora e atualizada em segundo plano.
+    """
+    
+    chave = (ticker, max_noticias)
+    
+    if usar_cache:
+        em_cache = _obter_do_cache(chave)
+        if em_cache is not None:
+            if exibir:
+                print(f"⚡ Notícias de {ticker} vindas do cache")
+            return em_cache
+    
+    return VOOS_NOTICIAS.executar(
+        chave, _buscar_e_guardar, ticker, max_noticias, exibir, usar_cache
+    )
+
+
+def buscar_noticias_em_lote(tickers, max_noticias=3, max_workers=MAX_WORKERS_LOTE):
+    """
+    Busca notícias de vários tickers ao mesmo tempo (ex: uma carteira
+    inteira) nas threads de EXECUTOR_LOTE, com no máximo max_workers
+    buscas deste lote em andamento (e MAX_WORKERS_LOTE somando todos os
+    lotes). Cada busca passa pelo mesmo cache, single-flight e pool HTTP
+    de buscar_noticias_por_ticker.
+    
+    Retorna:
+    {
+        'tickers': [...],
+        'resultados': {ticker: resultado de buscar_noticias_por_ticker},
+        'total_noticias': soma de todas as notícias,
+        'formatado_whatsapp': resumo único para enviar no WhatsApp
+    }
+    """
+    # Remove repetidos mantendo a ordem pedida
+    tickers = list(dict.fromkeys(tickers))
+    por_ticker = {}
+    
+    def enviar(ticker):
+        futuro = EXECUTOR_LOTE.submit(buscar_noticias_por_ticker, ticker, max_noticias, exibir=False)
+        em_andamento[futuro] = ticker
+    
+    a_enviar = iter(tickers)
+    em_andamento = {}
+    for ticker in islice(a_enviar, max(max_workers, 1)):
+        enviar(ticker)
+    
+    while em_andamento:
+        prontos, _ = wait(em_andamento, return_when=FIRST_COMPLETED)
+        for futuro in prontos:
+            por_ticker[em_andamento.pop(futuro)] = futuro.result()
+            for ticker in islice(a_enviar, 1):
+                enviar(ticker)
+    
+    # Mantém a ordem pedida
+    resultados = {ticker: por_ticker[ticker] for ticker in tickers}
+    
+    return {
+        'tickers': tickers,
+        'resultados': resultados,
+        'total_noticias': sum(r['total_noticias'] for r in resultados.values()),
+        'formatado_whatsapp': formatar_resumo_noticias_whatsapp(resultados)
+    }
+
+
+async def buscar_noticias_por_ticker_async(ticker, max_noticias=5, usar_cache=True,
+                                           prazo_segundos=PRAZO_MULTIFONTES_SEGUNDOS):
+    """
+    Versão asyncio de buscar_noticias_por_ticker (nunca imprime nada).
+    
+    Consulta todas as fontes de SITES_BUSCA em paralelo com um prazo
+    global: a demora total é a da fonte mais lenta dentro do prazo, não a
+    soma das fontes. Corrotinas pedindo a mesma chave aguardam a mesma
+    tarefa, que também se junta a buscas iguais feitas por threads
+    (buscar_noticias_por_ticker); o resultado vai para o mesmo cache.
+    """
+    chave = (ticker, max_noticias)
+    
+    if usar_cache:
+        em_cache = _obter_do_cache(chave)
+        if em_cache is not None:
+            return em_cache
+    
+    async def buscar():
+        resultado = await _buscar_noticias_multifontes(ticker, max_noticias, prazo_segundos)
+        if usar_cache:
+            vencido = _preferir_vencido(chave, resultado)
+            if vencido is not resultado:
+                return vencido
+            _guardar_no_cache(chave, resultado)
+        return resultado
+    
+    return await VOOS_NOTICIAS.executar_async(chave, buscar)
+
+
+async def _buscar_noticias_multifontes(ticker, max_noticias, prazo_segundos):
+    """
+    Busca assíncrona completa (query → todas as fontes → fallback → formatação).
+    """
+    query = criar_query_noticias(ticker)
+    noticias, fontes = await buscar_noticias_multifontes_async(query, max_noticias, prazo_segundos)
+    
+    if noticias:
+        noticias, formatado = _mesclar_no_indice(ticker, noticias, max_noticias)
+    else:
+        noticias = criar_noticias_fallback(query, max_noticias)
+        formatado = formatar_noticias_para_whatsapp(noticias, ticker)
+    
+    return {
+        'ticker': ticker,
+        'query': query,
+        'total_noticias': len(noticias),
+        'noticias': noticias,
+        'fontes': fontes,
+        'formatado_whatsapp': formatado
+    }
+
+
+def _mesclar_no_indice(ticker, noticias, max_noticias):
+    """
+    Junta as notícias da busca às já vistas deste ticker (news_dedup):
+    repetidas são descartadas e ficam as max_noticias mais recentes. A
+    mensagem só é montada de novo quando entrou alguma notícia nova.
+    
+    Retorna (noticias, formatado_whatsapp).
+    """
+    if any(noticia.get('simulado') for noticia in noticias):
+        # Notícias simuladas (fallback) não entram no índice
+        return noticias, formatar_noticias_para_whatsapp(noticias, ticker)
+    
+    indice = obter_indice_noticias()
+    indice.mesclar(ticker, noticias)
+    return (indice.recentes(ticker, max_noticias),
+            indice.formatar(ticker, max_noticias, formatar_noticias_para_whatsapp))
+
+
+def _obter_do_cache(chave):
+    """Consulta o cache; com atualizador, registra o pedido e aceita entrada vencida."""
+    if ATUALIZADOR is None:
+        return CACHE_NOTICIAS.obter(chave)
+    
+    ATUALIZADOR.registrar_pedido(chave)
+    return ATUALIZADOR.obter(chave)
+
+
+def atualizar_noticias(ticker, max_noticias=5):
+    """
+    Busca de novo ignorando o que está no cache e guarda o resultado
+    (usado pelo atualizador em segundo plano). Passa pelo mesmo
+    single-flight dos pedidos normais.
+    """
+    return VOOS_NOTICIAS.executar(
+        (ticker, max_noticias), _buscar_e_guardar, ticker, max_noticias, False, True
+    )
+
+
+def _sem_noticias_reais(resultado):
+    """True para erro ou notícias simuladas (fallback)."""
+    return 'erro' in resultado or any(noticia.get('simulado') for noticia in resultado['noticias'])
+
+
+def _guardar_no_cache(chave, resultado):
     """
+    Erros não vão para o cache; notícias simuladas ficam só por pouco
+    tempo e nunca substituem notícias reais ainda guardadas (mesmo vencidas).
+    """
+    if 'erro' in resultado:
+        return
     
-    print(f"🔎 Iniciando busca por notícias de {ticker}...")
+    if _sem_noticias_reais(resultado):
+        antigo, _ = CACHE_NOTICIAS.obter_vencido(chave)
+        if antigo is not None and not _sem_noticias_reais(antigo):
+            return
+        CACHE_NOTICIAS.guardar(chave, resultado, TTL_FALLBACK_SEGUNDOS)
+    else:
+        CACHE_NOTICIAS.guardar(chave, resultado)
+
+
+def _preferir_vencido(chave, resultado, exibir=False):
+    """
+    Se a busca não trouxe notícias reais (fonte fora do ar, circuito
+    aberto ou meio aberto recusando, erro), um resultado real antigo
+    ainda guardado no cache vale mais que as notícias simuladas.
+    """
+    if not _sem_noticias_reais(resultado):
+        return resultado
+    
+    antigo, _ = CACHE_NOTICIAS.obter_vencido(chave)
+    if antigo is None or _sem_noticias_reais(antigo):
+        return resultado
+    
+    if exibir:
+        print(f"⚡ Fontes fora do ar: notícias de {chave[0]} do cache (vencidas)")
+    return antigo
+
+
+def _buscar_e_guardar(ticker, max_noticias, exibir, usar_cache):
+    """
+    Executa a busca real e guarda o resultado no cache (ou devolve o
+    resultado antigo do cache, se a busca só conseguiu notícias simuladas).
+    """
+    resultado = _buscar_noticias_sem_cache(ticker, max_noticias, exibir)
+    
+    if usar_cache:
+        vencido = _preferir_vencido((ticker, max_noticias), resultado, exibir)
+        if vencido is not resultado:
+            # Fica guardado como vencido: a próxima busca tenta a fonte de novo
+            return vencido
+        _guardar_no_cache((ticker, max_noticias), resultado)
+    
+    return resultado
+
+
+def _buscar_noticias_sem_cache(ticker, max_noticias, exibir):
+    """
+    Faz a busca completa (query → Google News → fallback → formatação).
+    """
+    
+    if exibir:
+        print(f"🔎 Iniciando busca por notícias de {ticker}...")
     
     try:
         # 1. Criar query de busca
         query = criar_query_noticias(ticker)
-        print(f"   Query: {query}")
+        if exibir:
+            print(f"   Query: {query}")
         
         # 2. Buscar notícias (Google News - fins educacionais)
-        print("   Buscando no Google News...")
-        noticias = buscar_noticias_google(query, max_noticias)
+        if exibir:
+            print("   Buscando no Google News...")
+        noticias = buscar_noticias_google(query, max_noticias, exibir=exibir)
         
-        # 3. Se não encontrou, usar fallback
+        # 3. Se não encontrou, usar fallback; senão, juntar às já vistas do ticker
         if not noticias:
-            print("   Usando notícias simuladas para desenvolvimento...")
+            if exibir:
+                print("   Usando notícias simuladas para desenvolvimento...")
             noticias = criar_noticias_fallback(query, max_noticias)
+            formatado = formatar_noticias_para_whatsapp(noticias, ticker)
+        else:
+            noticias, formatado = _mesclar_no_indice(ticker, noticias, max_noticias)
         
-        print(f"   ✅ Encontradas {len(noticias)} notícias")
+        if exibir:
+            print(f"   ✅ Encontradas {len(noticias)} notícias")
         
         # 4. Formatar para retorno
         resultado = {
@@ -247,13 +922,14 @@ def buscar_noticias_por_ticker(ticker, max_noticias=5):
             'query': query,
             'total_noticias': len(noticias),
             'noticias': noticias,
-            'formatado_whatsapp': formatar_noticias_para_whatsapp(noticias, ticker)
+            'formatado_whatsapp': formatado
         }
         
         return resultado
         
     except Exception as e:
-        print(f"❌ Erro na busca de notícias: {e}")
+        if exibir:
+            print(f"❌ Erro na busca de notícias: {e}")
         
         # Retornar fallback em caso de erro
         return {
@@ -300,9 +976,161 @@ def testar_busca_noticias():
         print("\n" + "=" * 50)
 
 
+def testar_busca_multifontes():
+    """
+    Testa a busca assíncrona em várias fontes contra um servidor HTTP
+    local (sem internet): fontes rápidas, uma lenta e uma notícia repetida.
+    """
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    print("🧪 TESTANDO BUSCA ASSÍNCRONA EM VÁRIAS FONTES (servidor local)")
+    print("=" * 50)
+    
+    paginas = {
+        '/google': (0.3, '<article><a href="./articles/1">Petrobras aprova dividendos</a>'
+                         '<div>Valor</div><time>Há 1 hora</time></article>'),
+        '/investing': (0.5, '<h3><a href="/news/2">Petrobras aprova dividendos</a></h3>'
+                            '<h3><a href="/news/3">Petróleo sobe no exterior</a></h3>'),
+        '/infomoney': (0.4, '<h2><a href="/mercados/4">PETR4 lidera altas do Ibovespa</a></h2>'),
+        '/lento': (3.0, '<h2><a href="/5">Notícia que chega tarde</a></h2>'),
+    }
+    
+    class ServidorFalso(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith('/ocupado'):
+                self.send_response(503)
+                self.send_header('Retry-After', '3600')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            atraso, corpo = paginas[self.path.split('?')[0]]
+            time.sleep(atraso)
+            conteudo = f"<html><body>{corpo}</body></html>".encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(conteudo)))
+            self.end_headers()
+            try:
+                self.wfile.write(conteudo)
+            except BrokenPipeError:
+                pass  # o cliente desistiu (prazo esgotado)
+        
+        def log_message(self, *args):
+            pass
+    
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), ServidorFalso)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{servidor.server_address[1]}"
+    
+    sites = {
+        'google_news': base + '/google?q={query}',
+        'investing_br': base + '/investing?q={query}',
+        'infomoney': base + '/infomoney?q={query}',
+    }
+    
+    try:
+        print("\n1️⃣ Três fontes rápidas (0.3s, 0.5s e 0.4s), prazo de 2s:")
+        inicio = time.perf_counter()
+        noticias, fontes = asyncio.run(buscar_noticias_multifontes_async('PETR4', 5, 2.0, sites))
+        print(f"   Tempo total: {time.perf_counter() - inicio:.2f}s (soma das fontes seria 1.2s)")
+        print(f"   Fontes: {fontes} | Notícias sem repetição: {len(noticias)}")
+        
+        print("\n2️⃣ Uma fonte lenta (3s), prazo de 1s:")
+        sites['infomoney'] = base + '/lento?q={query}'
+        inicio = time.perf_counter()
+        noticias, fontes = asyncio.run(buscar_noticias_multifontes_async('PETR4', 5, 1.0, sites))
+        print(f"   Tempo total: {time.perf_counter() - inicio:.2f}s")
+        print(f"   Fontes que responderam a tempo: {fontes}")
+        for noticia in noticias:
+            print(f"   • {noticia['titulo']} ({noticia['fonte']})")
+        
+        print("\n3️⃣ Fonte sempre 503 com 'Retry-After: 3600', prazo de 1s:")
+        inicio = time.perf_counter()
+        try:
+            _buscar_em_fonte('ocupado', base + '/ocupado?q={query}', 'PETR4', 5,
+                             time.monotonic() + 1.0)
+        except requests.RequestException as erro:
+            print(f"   Erro: {type(erro).__name__}")
+        duracao = time.perf_counter() - inicio
+        print(f"   A thread da fonte ficou ocupada {duracao:.2f}s (novas tentativas param no prazo)")
+        assert duracao < 1.5
+    finally:
+        servidor.shutdown()
+
+
+def gerar_html_exemplo(total_artigos=100):
+    """
+    Gera uma página no formato do Google News (fixture para testes e
+    benchmark, sem depender da internet).
+    """
+    artigos = []
+    for i in range(total_artigos):
+        artigos.append(
+            f'<article class="IBr9hb"><div class="XlKvRb"><a href="./articles/CBMi{i:04d}?hl=pt-BR"'
+            f' class="WwrzSb"></a></div><div class="m5k28"><div class="oovtQ">'
+            f'<img src="https://news.google.com/api/attachments/{i}" alt=""><div class="vr1PYe">'
+            f'Fonte {i % 7}</div></div><a class="JtKRv" href="./articles/CBMi{i:04d}">'
+            f'Petrobras (PETR4) anuncia resultado número {i} e ações sobem</a>'
+            f'<div class="UOVeFe"><time class="hvbAAd" datetime="2026-01-30T12:00:00Z">Há {i % 23 + 1} horas</time>'
+            f'</div></div></article>'
+        )
+    
+    cabecalho = '<div class="menu">' + '<a href="./topics/x">Tópico</a>' * 200 + '</div>'
+    rodape = '<script>' + 'var x = 1;' * 2000 + '</script>'
+    
+    return (
+        '<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8"><title>Google News</title></head>'
+        f'<body>{cabecalho}<main>{"".join(artigos)}</main>{rodape}</body></html>'
+    ).encode('utf-8')
+
+
+def benchmark_extracao(repeticoes=30, total_artigos=100, max_noticias=5):
+    """
+    Compara o caminho original (BeautifulSoup + html.parser sobre texto)
+    com o rápido (lxml sobre bytes): confere se o resultado é igual e mede
+    tempo médio e pico de memória alocada pelo Python (tracemalloc; a
+    memória interna da libxml2 não entra nessa conta).
+    """
+    import tracemalloc
+    
+    print("🧪 BENCHMARK DA EXTRAÇÃO DE HTML")
+    print("=" * 50)
+    
+    conteudo = gerar_html_exemplo(total_artigos)
+    texto = conteudo.decode('utf-8')
+    print(f"   Página de exemplo: {len(conteudo) / 1024:.0f} KB, {total_artigos} artigos")
+    
+    caminhos = [
+        ("BeautifulSoup (original)", lambda: extrair_noticias_google(texto, 'PETR4', max_noticias)),
+        ("lxml (rápido)", lambda: extrair_noticias_google_rapido(conteudo, 'PETR4', max_noticias)),
+    ]
+    
+    resultados = [funcao() for _, funcao in caminhos]
+    print(f"   Resultados iguais: {resultados[0] == resultados[1]} ({len(resultados[0])} notícias)")
+    
+    for nome, funcao in caminhos:
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            funcao()
+        duracao = (time.perf_counter() - inicio) / repeticoes
+        
+        tracemalloc.start()
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        print(f"   ⏱️  {nome}: {duracao * 1000:.2f} ms por página | pico de memória: {pico / 1024:.0f} KB")
+
+
 # Executar teste se rodar arquivo diretamente
 if __name__ == "__main__":
     testar_busca_noticias()
+    print()
+    testar_busca_multifontes()
+    print()
+    benchmark_extracao()
     
     # Mostrar aviso importante
     print("\n" + "⚠️" * 30)
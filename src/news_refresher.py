@@ -0,0 +1,408 @@
+"""
+ATUALIZAÇÃO DE NOTÍCIAS EM SEGUNDO PLANO (STALE-WHILE-REVALIDATE)
+
+Mesmo com cache, o primeiro pedido depois que a entrada vence paga a
+busca inteira (até 10s). Com o atualizador ligado:
+
+- cada pedido conta num contador com decaimento (ContadorDecaimento):
+  um pedido de agora vale 1, um de meia_vida_segundos atrás vale 0.5
+- a cada intervalo_segundos, os top_k tickers mais pedidos que vencem
+  em menos de antecedencia_segundos são buscados de novo, antes de vencer
+  (só os que ainda têm contagem de pelo menos contagem_minima: um ticker
+  pedido uma vez semana passada não é renovado para sempre)
+- uma entrada já vencida (há menos de tolerancia_vencido_segundos) é
+  devolvida na hora e atualizada em segundo plano
+- antes da abertura do pregão (horario_aquecimento, dias úteis), a
+  carteira do Ibovespa (dados/carteira_ibov.txt) é buscada inteira
+
+Exemplo:
+    atualizador = AtualizadorNoticias(top_k=20)
+    atualizador.iniciar()          # liga no news_fetcher
+    buscar_noticias_por_ticker('PETR4')
+    atualizador.aquecer()          # aquecimento manual da carteira
+    atualizador.parar()
+"""
+
+import heapq
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+try:
+    from . import news_fetcher
+    from .utils.ticker_registry import obter_registro
+except ImportError:
+    import news_fetcher
+    from utils.ticker_registry import obter_registro
+
+# Arquivo padrão com a carteira aquecida antes da abertura
+ARQUIVO_CARTEIRA_IBOV = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                     'dados', 'carteira_ibov.txt')
+
+# Configurações padrão
+TOP_K = 20
+MEIA_VIDA_SEGUNDOS = 600
+MAX_CHAVES_CONTADOR = 2000
+CONTAGEM_MINIMA = 0.5  # um único pedido deixa de contar depois de uma meia-vida
+ANTECEDENCIA_SEGUNDOS = 60
+INTERVALO_SEGUNDOS = 10
+TOLERANCIA_VENCIDO_SEGUNDOS = 3600
+WORKERS_ATUALIZACAO = 2
+HORARIO_AQUECIMENTO = "09:30"  # pregão da B3 abre às 10:00
+MAX_NOTICIAS_PADRAO = 5
+
+
+class ContadorDecaimento:
+    """
+    Contador em que cada pedido perde metade do peso a cada meia_vida.
+
+    Em vez de reduzir todos os contadores com o tempo, cada pedido novo
+    entra com peso 2^(t / meia_vida), que cresce com o tempo; comparar os
+    totais dá a mesma ordem. Quando os pesos ficam grandes demais, tudo é
+    dividido de uma vez (renormalização).
+    """
+
+    def __init__(self, meia_vida_segundos=MEIA_VIDA_SEGUNDOS, max_chaves=MAX_CHAVES_CONTADOR):
+        self.meia_vida_segundos = meia_vida_segundos
+        self.max_chaves = max_chaves
+        self._base = time.time()
+        self._pesos = {}
+        self._trava = threading.Lock()
+
+    def _peso(self, agora):
+        return 2.0 ** ((agora - self._base) / self.meia_vida_segundos)
+
+    def registrar(self, chave, agora=None):
+        """Conta um pedido para a chave."""
+        agora = time.time() if agora is None else agora
+
+        with self._trava:
+            peso = self._peso(agora)
+            if peso > 1e100:
+                self._pesos = {c: p / peso for c, p in self._pesos.items()}
+                self._base = agora
+                peso = 1.0
+
+            self._pesos[chave] = self._pesos.get(chave, 0.0) + peso
+
+            # Esquece as chaves menos pedidas quando passar do limite
+            if len(self._pesos) > self.max_chaves:
+                manter = heapq.nlargest(self.max_chaves // 2, self._pesos.items(),
+                                        key=lambda item: item[1])
+                self._pesos = dict(manter)
+
+    def valor(self, chave, agora=None):
+        """Contagem atual da chave (pedidos com decaimento)."""
+        agora = time.time() if agora is None else agora
+        with self._trava:
+            return self._pesos.get(chave, 0.0) / self._peso(agora)
+
+    def maiores(self, k, agora=None, minimo=0.0):
+        """
+        As k chaves mais pedidas com contagem de pelo menos minimo:
+        [(chave, contagem), ...] em ordem decrescente.
+        """
+        agora = time.time() if agora is None else agora
+        with self._trava:
+            peso = self._peso(agora)
+            maiores = heapq.nlargest(k, self._pesos.items(), key=lambda item: item[1])
+        return [(chave, total / peso) for chave, total in maiores if total / peso >= minimo]
+
+    def __len__(self):
+        return len(self._pesos)
+
+
+def carregar_carteira(caminho=ARQUIVO_CARTEIRA_IBOV):
+    """
+    Lê a carteira (um ticker por linha, # para comentários) e devolve só
+    os tickers listados no cadastro, sem repetidos.
+    """
+    registro = obter_registro()
+    with open(caminho, 'r', encoding='utf-8') as arquivo:
+        tickers = (linha.strip().upper() for linha in arquivo)
+        return [t for t in dict.fromkeys(tickers) if t and not t.startswith('#')
+                and registro.esta_listado(t)]
+
+
+class AtualizadorNoticias:
+    """
+    Mantém as notícias mais pedidas sempre frescas no cache do
+    news_fetcher e serve entradas vencidas enquanto atualiza.
+
+    - atualizar(ticker, max_noticias): busca que ignora e regrava o
+      cache (padrão: news_fetcher.atualizar_noticias)
+    - carteira: tickers do aquecimento (padrão: carteira do Ibovespa)
+    - horario_aquecimento: "HH:MM" local, ou None para só aquecer
+      manualmente com aquecer()
+    - contagem_minima: chaves com contagem (com decaimento) menor que
+      isso não são renovadas
+    """
+
+    def __init__(self, top_k=TOP_K, antecedencia_segundos=ANTECEDENCIA_SEGUNDOS,
+                 intervalo_segundos=INTERVALO_SEGUNDOS, meia_vida_segundos=MEIA_VIDA_SEGUNDOS,
+                 tolerancia_vencido_segundos=TOLERANCIA_VENCIDO_SEGUNDOS,
+                 workers=WORKERS_ATUALIZACAO, carteira=None,
+                 horario_aquecimento=HORARIO_AQUECIMENTO, max_noticias=MAX_NOTICIAS_PADRAO,
+                 atualizar=None, contagem_minima=CONTAGEM_MINIMA):
+        self.top_k = top_k
+        self.contagem_minima = contagem_minima
+        self.antecedencia_segundos = antecedencia_segundos
+        self.intervalo_segundos = intervalo_segundos
+        self.tolerancia_vencido_segundos = tolerancia_vencido_segundos
+        self.workers = workers
+        self.carteira = carteira
+        self.horario_aquecimento = horario_aquecimento
+        self.max_noticias = max_noticias
+        self.atualizar = atualizar or news_fetcher.atualizar_noticias
+
+        self.contador = ContadorDecaimento(meia_vida_segundos)
+        self._trava = threading.Lock()
+        self._em_andamento = set()
+        self._executor = None
+        self._thread = None
+        self._parar = threading.Event()
+        self._aquecido_em = None  # data do último aquecimento automático
+        self._tolerancia_anterior = None  # (cache, tolerância) para restaurar em parar()
+
+        # Contadores
+        self.pedidos = 0
+        self.vencidos_servidos = 0
+        self.atualizacoes = 0
+        self.antecipadas = 0  # atualizadas antes de vencer
+        self.falhas = 0
+
+    # ====== CICLO DE VIDA ======
+
+    def iniciar(self):
+        """Liga o atualizador no news_fetcher e começa a verificação periódica."""
+        if self._thread is not None:
+            return self
+
+        cache = news_fetcher.CACHE_NOTICIAS
+        self._tolerancia_anterior = (cache, cache.tolerancia_vencido_segundos)
+        cache.tolerancia_vencido_segundos = max(cache.tolerancia_vencido_segundos,
+                                                self.tolerancia_vencido_segundos)
+
+        self._parar.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix='atualizador-noticias')
+        news_fetcher.configurar_atualizador(self)
+        self._thread = threading.Thread(target=self._laco, name='atualizador-noticias',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self, esperar=True):
+        """
+        Desliga do news_fetcher, devolve ao cache a tolerância de antes de
+        iniciar() e para a thread e as buscas pendentes.
+        """
+        if self._thread is None:
+            return
+
+        if news_fetcher.ATUALIZADOR is self:
+            news_fetcher.configurar_atualizador(None)
+        cache, tolerancia = self._tolerancia_anterior
+        cache.tolerancia_vencido_segundos = tolerancia
+        self._tolerancia_anterior = None
+        self._parar.set()
+        self._thread.join(timeout=5)
+        self._executor.shutdown(wait=esperar, cancel_futures=True)
+        self._thread = None
+
+    # ====== PEDIDOS (chamados pelo news_fetcher) ======
+
+    def registrar_pedido(self, chave):
+        """Conta um pedido de (ticker, max_noticias)."""
+        self.contador.registrar(chave)
+        with self._trava:
+            self.pedidos += 1
+
+    def obter(self, chave):
+        """
+        Valor do cache para a chave, mesmo vencido (dentro da tolerância).
+        Se estiver vencido, agenda a atualização e devolve o antigo na hora.
+        """
+        valor, expira_em = news_fetcher.CACHE_NOTICIAS.obter_vencido(chave)
+        if valor is None:
+            return None
+
+        if expira_em <= time.time():
+            with self._trava:
+                self.vencidos_servidos += 1
+            self._agendar(chave)
+        return valor
+
+    # ====== ATUALIZAÇÃO ======
+
+    def _agendar(self, chave, antecipada=False):
+        """Agenda a busca da chave (uma de cada vez por chave). Retorna o futuro ou None."""
+        with self._trava:
+            if chave in self._em_andamento or self._executor is None or self._parar.is_set():
+                return None
+            self._em_andamento.add(chave)
+            self.antecipadas += antecipada
+
+        try:
+            return self._executor.submit(self._atualizar, chave)
+        except RuntimeError:
+            # Executor já encerrado (parar() em andamento)
+            with self._trava:
+                self._em_andamento.discard(chave)
+            return None
+
+    def _atualizar(self, chave):
+        try:
+            self.atualizar(*chave)
+            with self._trava:
+                self.atualizacoes += 1
+        except Exception:
+            with self._trava:
+                self.falhas += 1
+        finally:
+            with self._trava:
+                self._em_andamento.discard(chave)
+
+    def verificar(self, agora=None):
+        """
+        Agenda a atualização dos top_k mais pedidos (com contagem de pelo
+        menos contagem_minima) que vencem em menos de antecedencia_segundos
+        (ou que nem estão no cache). Retorna quantos foram agendados.
+        """
+        agora = time.time() if agora is None else agora
+        cache = news_fetcher.CACHE_NOTICIAS
+        agendados = 0
+
+        for chave, _ in self.contador.maiores(self.top_k, agora, self.contagem_minima):
+            expira_em = cache.expira_em(chave)
+            if expira_em is None or expira_em - agora <= self.antecedencia_segundos:
+                agendados += self._agendar(chave, antecipada=expira_em is not None
+                                           and expira_em > agora) is not None
+        return agendados
+
+    def aquecer(self, tickers=None, esperar=False):
+        """
+        Busca as notícias de todos os tickers (padrão: a carteira do
+        Ibovespa) usando os workers do atualizador. Retorna quantos
+        foram agendados; com esperar=True, só volta quando terminarem.
+        """
+        if tickers is None:
+            if self.carteira is None:
+                self.carteira = carregar_carteira()
+            tickers = self.carteira
+
+        futuros = [self._agendar((ticker, self.max_noticias)) for ticker in tickers]
+        futuros = [futuro for futuro in futuros if futuro is not None]
+        if esperar:
+            for futuro in futuros:
+                futuro.result()
+        return len(futuros)
+
+    def _hora_de_aquecer(self, agora):
+        """True uma vez por dia útil, a partir de horario_aquecimento."""
+        if not self.horario_aquecimento:
+            return False
+
+        momento = datetime.fromtimestamp(agora)
+        hora, minuto = (int(parte) for parte in self.horario_aquecimento.split(':'))
+        return (momento.weekday() < 5
+                and (momento.hour, momento.minute) >= (hora, minuto)
+                and self._aquecido_em != momento.date())
+
+    def _laco(self):
+        """Thread em segundo plano: aquecimento diário e verificação periódica."""
+        while not self._parar.wait(self.intervalo_segundos):
+            agora = time.time()
+            if self._hora_de_aquecer(agora):
+                self._aquecido_em = datetime.fromtimestamp(agora).date()
+                self.aquecer()
+            self.verificar(agora)
+
+    def estatisticas(self):
+        """Pedidos, entradas vencidas servidas, atualizações e os mais pedidos."""
+        with self._trava:
+            dados = {
+                'pedidos': self.pedidos,
+                'vencidos_servidos': self.vencidos_servidos,
+                'atualizacoes': self.atualizacoes,
+                'antecipadas': self.antecipadas,
+                'falhas': self.falhas,
+                'em_andamento': len(self._em_andamento),
+                'aquecido_em': self._aquecido_em.isoformat() if self._aquecido_em else None
+            }
+        dados['mais_pedidos'] = [
+            {'ticker': chave[0], 'max_noticias': chave[1], 'contagem': round(contagem, 2)}
+            for chave, contagem in self.contador.maiores(self.top_k)
+        ]
+        return dados
+
+
+# ====== FUNÇÃO DE TESTE ======
+def testar_atualizador():
+    """Testa a entrega de entradas vencidas, a antecipação e o aquecimento (sem rede)"""
+
+    print("🧪 TESTANDO ATUALIZADOR DE NOTÍCIAS")
+    print("=" * 50)
+
+    def busca_lenta(ticker, max_noticias):
+        time.sleep(0.3)  # simula a busca na web
+        news_fetcher.CACHE_NOTICIAS.guardar(
+            (ticker, max_noticias), {'ticker': ticker, 'buscado_em': time.time()}
+        )
+
+    news_fetcher.configurar_cache(ttl_segundos=1, tolerancia_vencido_segundos=0)
+    atualizador = AtualizadorNoticias(top_k=3, antecedencia_segundos=0.5, intervalo_segundos=0.2,
+                                      horario_aquecimento=None, atualizar=busca_lenta)
+    atualizador.iniciar()
+
+    try:
+        print("\n1️⃣ Entrada vencida é servida na hora e atualizada em segundo plano:")
+        busca_lenta('PETR4', 5)
+        time.sleep(1.1)
+        inicio = time.perf_counter()
+        resultado = news_fetcher.buscar_noticias_por_ticker('PETR4', exibir=False)
+        print(f"   Resposta em {(time.perf_counter() - inicio) * 1000:.2f} ms "
+              f"(buscado há {time.time() - resultado['buscado_em']:.1f}s)")
+        time.sleep(0.5)
+        resultado = news_fetcher.buscar_noticias_por_ticker('PETR4', exibir=False)
+        print(f"   Depois da atualização: buscado há {time.time() - resultado['buscado_em']:.1f}s")
+
+        print("\n2️⃣ Mais pedidos são renovados antes de vencer:")
+        for ticker, vezes in [('VALE3', 5), ('ITUB4', 3), ('WEGE3', 1)]:
+            busca_lenta(ticker, 5)
+            for _ in range(vezes):
+                news_fetcher.buscar_noticias_por_ticker(ticker, exibir=False)
+        time.sleep(2.5)
+        for ticker in ('VALE3', 'ITUB4', 'WEGE3'):
+            expira_em = news_fetcher.CACHE_NOTICIAS.expira_em((ticker, 5))
+            print(f"   {ticker}: vence em {expira_em - time.time():+.1f}s")
+
+        print("\n3️⃣ Ticker pedido uma vez há muito tempo não é mais renovado:")
+        contador = ContadorDecaimento(meia_vida_segundos=600)
+        semana_depois = time.time() + 7 * 86400
+        contador.registrar('PETR4')
+        contador.registrar('VALE3', agora=semana_depois - 60)
+        print(f"   Top 2 uma semana depois: {[c for c, _ in contador.maiores(2, semana_depois)]} | "
+              f"com contagem >= {CONTAGEM_MINIMA}: "
+              f"{[c for c, _ in contador.maiores(2, semana_depois, CONTAGEM_MINIMA)]}")
+
+        print("\n4️⃣ Aquecimento da carteira do Ibovespa:")
+        carteira = carregar_carteira()
+        inicio = time.perf_counter()
+        atualizador.aquecer(carteira[:8], esperar=True)
+        print(f"   {len(carteira)} tickers na carteira; 8 aquecidos em "
+              f"{time.perf_counter() - inicio:.2f}s com {atualizador.workers} workers")
+
+        print(f"\n📊 Estatísticas: {atualizador.estatisticas()}")
+    finally:
+        atualizador.parar()
+        print(f"   Tolerância do cache depois de parar(): "
+              f"{news_fetcher.CACHE_NOTICIAS.tolerancia_vencido_segundos}s (antes de iniciar: 0s)")
+        news_fetcher.configurar_cache()
+
+
+# Executar teste se rodar arquivo diretamente
+if __name__ == "__main__":
+    testar_atualizador()
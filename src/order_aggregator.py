@@ -0,0 +1,322 @@
+"""
+CONSOLIDAÇÃO DE ORDENS ANTES DO ENVIO AO BROKER
+
+Em vez de uma "ORDEM URGENTE" por comando, as ordens válidas ficam
+guardadas por alguns segundos (janela) e são compensadas por
+(conta, ticker): "compra 100 PETR4" + "venda 40 PETR4" na mesma conta
+viram um único "COMPRA 60 PETR4". Ao fim da janela sai UMA mensagem por
+conta com todos os tickers dela.
+
+Cada ordem original continua registrada (LoteConta.ordens e, se
+informado, no log de auditoria com o número do lote).
+
+Ordens sem conta não são agregadas (não dá para saber se são do mesmo
+cliente): quem chama confere com aceita() e envia a ordem como veio.
+
+Exemplo:
+    agregador = AgregadorOrdens(janela_segundos=5, ao_emitir=enviar_ao_broker)
+    agregador.adicionar(executar_comando("compra 100 PETR4 conta 12345"))
+    agregador.adicionar(executar_comando("venda 40 PETR4 conta 12345"))
+    # 5s depois: enviar_ao_broker(LoteConta(conta='12345', liquido={'PETR4': 60}, ...))
+"""
+
+import itertools
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+try:
+    from .order_templates import obter_modelo
+except ImportError:
+    from order_templates import obter_modelo
+
+JANELA_PADRAO_SEGUNDOS = 5.0
+
+
+@dataclass
+class LoteConta:
+    """
+    Ordens de uma conta consolidadas numa janela.
+
+    - liquido: ticker → quantidade líquida (positiva = compra, negativa = venda)
+    - ordens: cada ordem recebida (comando, acao, ticker, quantidade, recebida_em)
+    - mensagem_broker: mensagem única da conta, ou None se tudo se compensou
+    """
+    lote: int
+    conta: str
+    ordens: List[dict] = field(default_factory=list)
+    liquido: Dict[str, int] = field(default_factory=dict)
+    mensagem_broker: Optional[str] = None
+    aberto_em: float = 0.0
+    fechado_em: float = 0.0
+
+    def para_dict(self):
+        """Versão serializável (JSON)."""
+        return {
+            'lote': self.lote,
+            'conta': self.conta,
+            'ordens': self.ordens,
+            'liquido': self.liquido,
+            'mensagem_broker': self.mensagem_broker,
+            'aberto_em': self.aberto_em,
+            'fechado_em': self.fechado_em
+        }
+
+
+class _JanelaConta:
+    """Ordens de uma conta ainda dentro da janela."""
+
+    __slots__ = ('inicio', 'prazo', 'ordens', 'liquido')
+
+    def __init__(self, inicio, prazo):
+        self.inicio = inicio
+        self.prazo = prazo
+        self.ordens = []
+        self.liquido = {}
+
+
+class AgregadorOrdens:
+    """
+    Guarda ordens válidas por conta durante janela_segundos (contados a
+    partir da primeira ordem da conta) e emite um LoteConta por conta.
+
+    - automatico=True: uma thread em segundo plano fecha as janelas
+      vencidas e chama ao_emitir(lote)
+    - automatico=False: as janelas vencidas são fechadas dentro de
+      adicionar() (útil em processamento sequencial, ex: streaming)
+    """
+
+    def __init__(self, janela_segundos=JANELA_PADRAO_SEGUNDOS, ao_emitir=None,
+                 auditoria=None, automatico=True):
+        self.janela_segundos = janela_segundos
+        self.ao_emitir = ao_emitir
+        self.auditoria = auditoria
+        self.automatico = automatico
+
+        self._condicao = threading.Condition()
+        self._janelas = {}  # conta → _JanelaConta
+        self._numeros = itertools.count(1)
+        self._encerrado = False
+
+        # Contadores
+        self.ordens_recebidas = 0
+        self.lotes_emitidos = 0
+        self.mensagens_emitidas = 0
+        self.compensadas = 0  # (conta, ticker) cujo líquido deu zero
+
+        self._thread = None
+        if automatico:
+            self._thread = threading.Thread(target=self._laco, name='agregador-ordens', daemon=True)
+            self._thread.start()
+
+    # ====== ENTRADA ======
+
+    @staticmethod
+    def aceita(ordem):
+        """
+        True se a ordem pode ser agregada: compra/venda com ticker,
+        quantidade e conta. As demais seguem para o broker como vieram.
+        """
+        dados = ordem.para_dict() if hasattr(ordem, 'para_dict') else ordem
+        return dados.get('acao') in ('compra', 'venda') and bool(dados.get('ticker')) \
+            and bool(dados.get('quantidade')) and bool(dados.get('conta'))
+
+    def adicionar(self, ordem):
+        """
+        Coloca uma ordem válida na janela da sua conta. Aceita um
+        ResultadoComando ou um dicionário com acao, ticker, quantidade e conta.
+
+        Retorna os lotes fechados nesta chamada (só no modo não automático).
+        """
+        dados = ordem.para_dict() if hasattr(ordem, 'para_dict') else ordem
+        if not self.aceita(dados):
+            raise ValueError("Só ordens de compra/venda com ticker, quantidade e conta podem ser agregadas")
+
+        conta = dados['conta']
+        sinal = 1 if dados['acao'] == 'compra' else -1
+        agora = time.time()
+
+        vencidas = [] if self.automatico else self._retirar_janelas(agora)
+
+        with self._condicao:
+            if self._encerrado:
+                raise RuntimeError("Agregador encerrado")
+
+            janela = self._janelas.get(conta)
+            if janela is None:
+                janela = _JanelaConta(agora, agora + self.janela_segundos)
+                self._janelas[conta] = janela
+                self._condicao.notify()
+
+            janela.ordens.append({
+                'comando': dados.get('comando'),
+                'acao': dados['acao'],
+                'ticker': dados['ticker'],
+                'quantidade': dados['quantidade'],
+                'recebida_em': agora
+            })
+            janela.liquido[dados['ticker']] = janela.liquido.get(dados['ticker'], 0) \
+                + sinal * dados['quantidade']
+            self.ordens_recebidas += 1
+
+        return self._emitir(vencidas)
+
+    # ====== FECHAMENTO DAS JANELAS ======
+
+    def _retirar_janelas(self, agora=None):
+        """Tira do buffer as janelas vencidas (ou todas, se agora=None)."""
+        with self._condicao:
+            contas = [conta for conta, janela in self._janelas.items()
+                      if agora is None or janela.prazo <= agora]
+            return [(conta, self._janelas.pop(conta)) for conta in contas]
+
+    def _laco(self):
+        """Thread em segundo plano: dorme até o próximo prazo e fecha as janelas."""
+        while True:
+            with self._condicao:
+                while not self._encerrado:
+                    if not self._janelas:
+                        self._condicao.wait()
+                        continue
+                    espera = min(j.prazo for j in self._janelas.values()) - time.time()
+                    if espera <= 0:
+                        break
+                    self._condicao.wait(espera)
+                encerrado = self._encerrado
+
+            if encerrado:
+                return
+            self._emitir(self._retirar_janelas(time.time()))
+
+    def _emitir(self, janelas):
+        """Consolida as janelas em lotes, registra a auditoria e chama ao_emitir."""
+        lotes = []
+        for conta, janela in janelas:
+            lote = self._consolidar(conta, janela)
+            lotes.append(lote)
+
+            if self.auditoria is not None:
+                for ordem in lote.ordens:
+                    self.auditoria.registrar(
+                        ordem['acao'], ordem['ticker'], ordem['quantidade'], conta,
+                        True, "✅ Ordem válida", usuario='AGREGADOR', comando=ordem['comando'],
+                        lote=lote.lote, liquido=lote.liquido[ordem['ticker']]
+                    )
+
+            if self.ao_emitir is not None:
+                self.ao_emitir(lote)
+        return lotes
+
+    def _consolidar(self, conta, janela):
+        """Monta o LoteConta e a mensagem única da conta."""
+        linhas = []
+        liquido = {}
+        for ticker, quantidade in janela.liquido.items():
+            liquido[ticker] = quantidade
+            if quantidade == 0:
+                continue
+            acao = "COMPRA" if quantidade > 0 else "VENDA"
+            linhas.append(f"{acao} {abs(quantidade)} {ticker}")
+
+        mensagem = None
+        if linhas:
+            mensagem = obter_modelo('broker_consolidado').renderizar({
+                'linhas': "\n".join(linhas),
+                'conta': conta,
+                'total_ordens': len(janela.ordens)
+            })
+
+        with self._condicao:
+            self.lotes_emitidos += 1
+            self.compensadas += len(liquido) - len(linhas)
+            if mensagem is not None:
+                self.mensagens_emitidas += 1
+
+        return LoteConta(
+            lote=next(self._numeros),
+            conta=conta,
+            ordens=janela.ordens,
+            liquido=liquido,
+            mensagem_broker=mensagem,
+            aberto_em=janela.inicio,
+            fechado_em=time.time()
+        )
+
+    def descarregar(self):
+        """Fecha agora todas as janelas abertas e devolve os lotes."""
+        return self._emitir(self._retirar_janelas())
+
+    def encerrar(self):
+        """Fecha as janelas pendentes e para a thread (se houver)."""
+        with self._condicao:
+            if self._encerrado:
+                return []
+            self._encerrado = True
+            self._condicao.notify()
+
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        return self.descarregar()
+
+    def estatisticas(self):
+        """Contadores: ordens recebidas x mensagens realmente enviadas."""
+        with self._condicao:
+            pendentes = sum(len(j.ordens) for j in self._janelas.values())
+            return {
+                'ordens_recebidas': self.ordens_recebidas,
+                'ordens_pendentes': pendentes,
+                'lotes_emitidos': self.lotes_emitidos,
+                'mensagens_emitidas': self.mensagens_emitidas,
+                'compensadas': self.compensadas
+            }
+
+
+# ====== FUNÇÃO DE TESTE ======
+def testar_agregador():
+    """Testa a compensação por (conta, ticker) e a janela automática"""
+
+    import random
+
+    print("🧪 TESTANDO CONSOLIDAÇÃO DE ORDENS")
+    print("=" * 50)
+
+    emitidos = []
+    agregador = AgregadorOrdens(janela_segundos=0.3, ao_emitir=emitidos.append)
+
+    print("\n1️⃣ Compra 100 + venda 40 PETR4 e venda 10 VALE3 na conta 12345:")
+    agregador.adicionar({"acao": "compra", "ticker": "PETR4", "quantidade": 100, "conta": "12345"})
+    agregador.adicionar({"acao": "venda", "ticker": "PETR4", "quantidade": 40, "conta": "12345"})
+    agregador.adicionar({"acao": "venda", "ticker": "VALE3", "quantidade": 10, "conta": "12345"})
+    time.sleep(0.5)
+    for lote in emitidos:
+        print(f"   Lote {lote.lote} (conta {lote.conta}): {lote.liquido} "
+              f"a partir de {len(lote.ordens)} ordens")
+        print(lote.mensagem_broker)
+
+    print("2️⃣ 5000 ordens aleatórias em 50 contas (modo sequencial):")
+    agregador_lote = AgregadorOrdens(janela_segundos=60, automatico=False)
+    aleatorio = random.Random(5)
+    for _ in range(5000):
+        agregador_lote.adicionar({
+            "acao": aleatorio.choice(['compra', 'venda']),
+            "ticker": aleatorio.choice(['PETR4', 'VALE3', 'ITUB4']),
+            "quantidade": aleatorio.choice([100, 200, 300]),
+            "conta": str(aleatorio.randint(1, 50))
+        })
+    lotes = agregador_lote.descarregar()
+    total_ordens = sum(len(l.ordens) for l in lotes)
+    print(f"   Ordens: {total_ordens} → mensagens ao broker: "
+          f"{agregador_lote.estatisticas()['mensagens_emitidas']}")
+
+    print("3️⃣ Compra e venda de 100 PETR4 sem conta (clientes diferentes?):")
+    sem_conta = {"acao": "compra", "ticker": "PETR4", "quantidade": 100, "conta": None}
+    print(f"   aceita: {agregador_lote.aceita(sem_conta)} → enviadas como vieram")
+
+    agregador.encerrar()
+    print(f"\n📊 Estatísticas: {agregador.estatisticas()}")
+
+
+# Executar teste se rodar arquivo diretamente
+if __name__ == "__main__":
+    testar_agregador()
@@ -3,7 +3,26 @@ Módulo que formata ordens financeiras para envio ao broker.
 Transforma dados técnicos em mensagens claras e profissionais.
 """
 
-def formatar_ordem(dados_ordem):
+from array import array
+from numbers import Integral
+from operator import or_
+
+try:
+    import numpy as np  # opcional: acelera validar_ordens com arrays NumPy
+except ImportError:
+    np = None
+
+try:
+    from .utils.helpers import validar_ticker, ticker_no_cadastro
+    from .utils.ticker_registry import codificar_ticker
+    from .order_templates import renderizar_ordem
+except ImportError:
+    from utils.helpers import validar_ticker, ticker_no_cadastro
+    from utils.ticker_registry import codificar_ticker
+    from order_templates import renderizar_ordem
+
+
+def formatar_ordem(dados_ordem, modelo='whatsapp'):
     """
     Recebe um dicionário com dados da ordem e retorna texto formatado.
     
@@ -16,54 +35,16 @@ def formatar_ordem(dados_ordem):
         "tipo": "mercado"  # opcional
     }
     
-    Retorna uma string formatada para envio ao broker.
+    Retorna uma string formatada para envio ao broker. O modelo pode ser
+    'whatsapp' (padrão), 'caixa' (com moldura) ou 'broker'.
     """
     
     # Validação básica
     if not dados_ordem.get("ticker") or not dados_ordem.get("quantidade"):
         return "❌ ERRO: Dados incompletos para formatar ordem."
     
-    # Pegar valores ou usar padrões
-    acao = dados_ordem.get("acao", "compra").upper()
-    ticker = dados_ordem.get("ticker", "DESCONHECIDO")
-    quantidade = dados_ordem.get("quantidade", 0)
-    conta = dados_ordem.get("conta", "NÃO INFORMADA")
-    tipo_ordem = dados_ordem.get("tipo", "mercado").upper()
-    
-    # Construir mensagem formatada
-    mensagem = f"""
-╔══════════════════════════════════════════╗
-║          📊 ORDEM FINANCEIRA              ║
-╠══════════════════════════════════════════╣
-║                                          ║
-║  🔹 AÇÃO: {acao:<30} ║
-║  🔹 ATIVO: {ticker:<29} ║
-║  🔹 QUANTIDADE: {quantidade:<23} ║
-║  🔹 TIPO: {tipo_ordem:<28} ║
-║  🔹 CONTA: {conta:<28} ║
-║                                          ║
-║  📅 Data/Hora: AGORA                     ║
-║  👤 Origem: Sistema Automático           ║
-║                                          ║
-╠══════════════════════════════════════════╣
-║   ✅ CONFIRMAR EXECUÇÃO?                  ║
-╚══════════════════════════════════════════╝
-"""
-    
-    # Versão simples (sem bordas) para WhatsApp
-    mensagem_simples = f"""
-📊 *ORDEM {acao}*
-
-• *Ativo:* {ticker}
-• *Quantidade:* {quantidade}
-• *Tipo:* {tipo_ordem}
-• *Conta:* {conta}
-• *Origem:* Sistema Automático
-
-_Esta ordem está pronta para execução._
-"""
-    
-    return mensagem_simples
+    # Só o modelo pedido é montado (compilado uma vez em order_templates)
+    return renderizar_ordem(dados_ordem, modelo)
 
 
 def criar_mensagem_broker(dados_ordem):
@@ -72,47 +53,44 @@ def criar_mensagem_broker(dados_ordem):
     Mais direta e objetiva.
     """
     
-    acao = "COMPRA" if dados_ordem.get("acao") == "compra" else "VENDA"
-    ticker = dados_ordem.get("ticker", "ERRO")
-    quantidade = dados_ordem.get("quantidade", 0)
-    conta = dados_ordem.get("conta", "NÃO INFORMADA")
-    
-    mensagem = f"""
-🚨 *ORDEM URGENTE - EXECUTAR IMEDIATAMENTE*
-
-{acao} {quantidade} {ticker}
+    return renderizar_ordem(dados_ordem, 'broker')
 
-📋 Detalhes:
-• Conta cliente: {conta}
-• Tipo: Mercado
-• Prazo: Dia
-• Origem: Sistema Automático
 
-⚠️ Confirmar execução em até 2 minutos.
-"""
-    
-    return mensagem
+def _quantidade_inteira(quantidade):
+    """
+    Regra única de "quantidade inteira" (validar_ordem e validar_ordens):
+    qualquer inteiro, inclusive os do NumPy, mas nunca bool.
+    """
+    return isinstance(quantidade, Integral) and not isinstance(quantidade, bool)
 
 
 def validar_ordem(dados_ordem):
     """
     Valida se uma ordem tem todos os dados necessários.
-    Retorna (True, "") se válida, ou (False, mensagem_erro) se inválida.
+    Retorna (True, mensagem) se válida, ou (False, mensagem_erro) se inválida.
+    Ticker com formato certo mas fora do cadastro local (lista parcial) não
+    bloqueia a ordem: a mensagem de válida leva um aviso para confirmar.
     """
     
     erros = []
+    avisos = []
     
     # Verificar ticker
     if not dados_ordem.get("ticker"):
         erros.append("❌ Ticker não especificado")
-    elif len(dados_ordem["ticker"]) < 4:
-        erros.append("❌ Ticker inválido")
+    elif not validar_ticker(dados_ordem["ticker"])[0]:
+        if codificar_ticker(dados_ordem["ticker"]) is None:
+            erros.append("❌ Ticker inválido")
+        else:
+            erros.append("❌ Ticker não listado na B3")
+    elif not ticker_no_cadastro(dados_ordem["ticker"]):
+        avisos.append("⚠️ Ticker fora do cadastro local - confirmar?")
     
     # Verificar quantidade
     quantidade = dados_ordem.get("quantidade")
     if not quantidade:
         erros.append("❌ Quantidade não especificada")
-    elif not isinstance(quantidade, int):
+    elif not _quantidade_inteira(quantidade):
         erros.append("❌ Quantidade deve ser número inteiro")
     elif quantidade <= 0:
         erros.append("❌ Quantidade deve ser maior que zero")
@@ -127,7 +105,154 @@ def validar_ordem(dados_ordem):
     if erros:
         return False, " | ".join(erros)
     else:
-        return True, "✅ Ordem válida"
+        return True, " | ".join(["✅ Ordem válida"] + avisos)
+
+
+# ====== VALIDAÇÃO EM LOTE (COLUNAS) ======
+
+# Bits da máscara de erros devolvida por validar_ordens
+ERRO_SEM_TICKER = 1
+ERRO_TICKER_INVALIDO = 2
+ERRO_TICKER_NAO_LISTADO = 4
+ERRO_SEM_QUANTIDADE = 8
+ERRO_QUANTIDADE_NAO_INTEIRA = 16
+ERRO_QUANTIDADE_NAO_POSITIVA = 32
+ERRO_QUANTIDADE_ALTA = 64
+ERRO_ACAO_INVALIDA = 128
+
+# Mesmos textos de validar_ordem, na mesma ordem
+MENSAGENS_ERRO = (
+    (ERRO_SEM_TICKER, "❌ Ticker não especificado"),
+    (ERRO_TICKER_INVALIDO, "❌ Ticker inválido"),
+    (ERRO_TICKER_NAO_LISTADO, "❌ Ticker não listado na B3"),
+    (ERRO_SEM_QUANTIDADE, "❌ Quantidade não especificada"),
+    (ERRO_QUANTIDADE_NAO_INTEIRA, "❌ Quantidade deve ser número inteiro"),
+    (ERRO_QUANTIDADE_NAO_POSITIVA, "❌ Quantidade deve ser maior que zero"),
+    (ERRO_QUANTIDADE_ALTA, "⚠️ Quantidade muito alta - confirmar?"),
+    (ERRO_ACAO_INVALIDA, "❌ Ação deve ser 'compra' ou 'venda'"),
+)
+
+QUANTIDADE_MAXIMA = 100000
+
+
+def _erro_ticker(ticker):
+    """Bit de erro de um ticker (mesmas regras de validar_ordem)."""
+    if not ticker:
+        return ERRO_SEM_TICKER
+    if validar_ticker(ticker)[0]:
+        return 0
+    if codificar_ticker(ticker) is None:
+        return ERRO_TICKER_INVALIDO
+    return ERRO_TICKER_NAO_LISTADO
+
+
+def _erro_quantidade(quantidade):
+    """Bit de erro de uma quantidade (mesmas regras de validar_ordem)."""
+    if not quantidade:
+        return ERRO_SEM_QUANTIDADE
+    if not _quantidade_inteira(quantidade):
+        return ERRO_QUANTIDADE_NAO_INTEIRA
+    if quantidade <= 0:
+        return ERRO_QUANTIDADE_NAO_POSITIVA
+    if quantidade > QUANTIDADE_MAXIMA:
+        return ERRO_QUANTIDADE_ALTA
+    return 0
+
+
+def _erro_acao(acao):
+    """Bit de erro de uma ação (mesmas regras de validar_ordem)."""
+    if isinstance(acao, str) and acao.lower() in ("compra", "venda"):
+        return 0
+    return ERRO_ACAO_INVALIDA
+
+
+def _erros_por_valor(coluna, regra):
+    """
+    Aplica a regra uma vez por valor distinto da coluna (tickers e ações
+    se repetem muito) e devolve a lista de bits linha a linha. A chave
+    inclui o tipo: 100, 100.0 e True são iguais num dicionário, mas não
+    para as regras.
+    """
+    cache = {}
+    bits = []
+    for valor in coluna:
+        chave = (type(valor), valor)
+        try:
+            erro = cache[chave]
+        except KeyError:
+            erro = cache[chave] = regra(valor)
+        except TypeError:  # valor não "hashable": sem cache
+            erro = regra(valor)
+        bits.append(erro)
+    return bits
+
+
+def _erros_quantidade_numpy(quantidades):
+    """Regras de quantidade aplicadas no array inteiro de uma vez (NumPy)."""
+    if quantidades.dtype.kind in 'iu':
+        return np.select(
+            [quantidades == 0, quantidades < 0, quantidades > QUANTIDADE_MAXIMA],
+            [ERRO_SEM_QUANTIDADE, ERRO_QUANTIDADE_NAO_POSITIVA, ERRO_QUANTIDADE_ALTA],
+            0
+        ).astype(np.uint16)
+    
+    if quantidades.dtype.kind in 'fb':
+        # Como em _quantidade_inteira: zero/False é "não especificada",
+        # qualquer outro float ou bool não é inteiro
+        return np.where(quantidades == 0, ERRO_SEM_QUANTIDADE,
+                        ERRO_QUANTIDADE_NAO_INTEIRA).astype(np.uint16)
+    
+    return np.array([_erro_quantidade(q) for q in quantidades], dtype=np.uint16)
+
+
+def texto_erros(mascara):
+    """Converte uma máscara de erros no texto de validar_ordem."""
+    return " | ".join(texto for bit, texto in MENSAGENS_ERRO if mascara & bit)
+
+
+def validar_ordens(tickers, quantidades, acoes):
+    """
+    Valida muitas ordens de uma vez, recebendo colunas (listas,
+    array.array ou arrays NumPy) em vez de um dicionário por ordem.
+    
+    Retorna (mascaras, mensagens):
+    - mascaras: um inteiro por linha com os bits ERRO_* (0 = ordem válida);
+      array NumPy uint16 se alguma coluna for NumPy, senão array('H')
+    - mensagens: {linha: texto} só para as linhas com erro, com os mesmos
+      textos de validar_ordem (o aviso de ticker fora do cadastro local
+      não é erro: a linha fica com máscara 0)
+    
+    Tickers e ações são validados uma vez por valor distinto; com NumPy as
+    regras de quantidade rodam sobre o array inteiro.
+    """
+    total = len(tickers)
+    if len(quantidades) != total or len(acoes) != total:
+        raise ValueError("tickers, quantidades e acoes devem ter o mesmo tamanho")
+    
+    usar_numpy = np is not None and any(
+        isinstance(coluna, np.ndarray) for coluna in (tickers, quantidades, acoes)
+    )
+    
+    erros_ticker = _erros_por_valor(tickers, _erro_ticker)
+    erros_acao = _erros_por_valor(acoes, _erro_acao)
+    
+    if usar_numpy:
+        mascaras = (np.asarray(erros_ticker, dtype=np.uint16)
+                    | _erros_quantidade_numpy(np.asarray(quantidades))
+                    | np.asarray(erros_acao, dtype=np.uint16))
+        linhas_com_erro = np.flatnonzero(mascaras).tolist()
+        distintas = np.unique(mascaras).tolist()
+    else:
+        erros_quantidade = _erros_por_valor(quantidades, _erro_quantidade)
+        mascaras = array('H', map(or_, map(or_, erros_ticker, erros_quantidade), erros_acao))
+        linhas_com_erro = [linha for linha, mascara in enumerate(mascaras) if mascara]
+        distintas = set(mascaras)
+    
+    # Um texto por combinação de erros (muitas linhas repetem a mesma)
+    textos = {mascara: texto_erros(mascara) for mascara in distintas if mascara}
+    mensagens = {linha: textos[int(mascaras[linha])] for linha in linhas_com_erro}
+    
+    return mascaras, mensagens
 
 
 # ====== FUNÇÃO DE TESTE ======
@@ -154,6 +279,9 @@ def testar_formatador():
     formatado = formatar_ordem(ordem_teste)
     print(formatado)
     
+    print("\n2️⃣.1 Testando modelo com moldura:")
+    print(formatar_ordem(ordem_teste, 'caixa'))
+    
     print("\n3️⃣ Testando mensagem para broker:")
     msg_broker = criar_mensagem_broker(ordem_teste)
     print(msg_broker)
@@ -162,8 +290,60 @@ def testar_formatador():
     ordem_invalida = {"acao": "compra", "ticker": "PET"}
     valido, mensagem = validar_ordem(ordem_invalida)
     print(f"   Resultado: {mensagem}")
+    
+    print("\n5️⃣ Testando quantidades int/float/bool misturadas:")
+    for quantidades in ([100, 100.0, True, 1], [100.0, 100, 1, True, False, 0]):
+        mascaras, _ = validar_ordens(['PETR4'] * len(quantidades), quantidades,
+                                     ['compra'] * len(quantidades))
+        esperado = [_erro_quantidade(q) for q in quantidades]
+        print(f"   {quantidades} → {list(mascaras)}")
+        assert list(mascaras) == esperado, (quantidades, list(mascaras), esperado)
+        assert [m == 0 for m in mascaras] == [
+            validar_ordem({"ticker": "PETR4", "quantidade": q, "acao": "compra"})[0]
+            for q in quantidades
+        ]
+
+
+def benchmark_validacao(total=100000):
+    """Compara validar_ordem linha a linha com validar_ordens por colunas."""
+    import random
+    import time
+    
+    print("🧪 VALIDAÇÃO EM LOTE: EQUIVALÊNCIA E DESEMPENHO")
+    print("=" * 50)
+    
+    aleatorio = random.Random(3)
+    tickers = [aleatorio.choice(['PETR4', 'VALE3', 'ITUB4', 'XYZW9', 'PET', '', 'B3SA3'])
+               for _ in range(total)]
+    quantidades = [aleatorio.choice([0, -5, 100, 500, 250000, aleatorio.randint(1, 99999)])
+                   for _ in range(total)]
+    acoes = [aleatorio.choice(['compra', 'venda', 'VENDA', 'cancela'])
+             for _ in range(total)]
+    
+    inicio = time.perf_counter()
+    esperado = [validar_ordem({"ticker": t, "quantidade": q, "acao": a})
+                for t, q, a in zip(tickers, quantidades, acoes)]
+    duracao_linha = time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    mascaras, mensagens = validar_ordens(tickers, array('q', quantidades), acoes)
+    duracao_colunas = time.perf_counter() - inicio
+    
+    diferentes = sum(
+        valido != (mascaras[linha] == 0) or (not valido and mensagens[linha] != texto)
+        for linha, (valido, texto) in enumerate(esperado)
+    )
+    print(f"\n   Linhas: {total} | com erro: {len(mensagens)} | diferenças: {diferentes}")
+    print(f"   ⏱️  validar_ordem (linha a linha): {duracao_linha * 1000:.1f} ms")
+    print(f"   ⏱️  validar_ordens (colunas):      {duracao_colunas * 1000:.1f} ms")
+    
+    if np is not None:
+        inicio = time.perf_counter()
+        validar_ordens(np.array(tickers), np.array(quantidades), np.array(acoes))
+        print(f"   ⏱️  validar_ordens (NumPy):        {(time.perf_counter() - inicio) * 1000:.1f} ms")
 
 
 # Executar testes se arquivo rodado diretamente
 if __name__ == "__main__":
     testar_formatador()
+    benchmark_validacao()
@@ -0,0 +1,293 @@
+"""
+MODELOS DE MENSAGENS DE ORDEM (COMPILADOS UMA VEZ)
+
+Cada modelo de texto é lido uma única vez e dividido em trechos fixos e
+"lacunas" ({ticker}, {quantidade:<23}, ...). Para montar a mensagem de
+uma ordem basta preencher as lacunas e fazer um único ''.join.
+
+Modelos disponíveis (por nome):
+- 'whatsapp': ordem resumida para o WhatsApp (usada por formatar_ordem)
+- 'broker':   mensagem urgente para o broker (criar_mensagem_broker)
+- 'caixa':    ordem com moldura, para terminal
+- 'broker_consolidado': várias ordens já compensadas de uma conta
+  (usada por order_aggregator)
+
+Só o modelo pedido é montado.
+
+Exemplo:
+    renderizar_ordem({"acao": "compra", "ticker": "PETR4", "quantidade": 100}, 'broker')
+    renderizar_ordens(lista_de_ordens, 'whatsapp')
+"""
+
+import threading
+from string import Formatter
+
+MODELO_CAIXA = """
+╔══════════════════════════════════════════╗
+║          📊 ORDEM FINANCEIRA              ║
+╠══════════════════════════════════════════╣
+║                                          ║
+║  🔹 AÇÃO: {acao:<30} ║
+║  🔹 ATIVO: {ticker:<29} ║
+║  🔹 QUANTIDADE: {quantidade:<23} ║
+║  🔹 TIPO: {tipo:<28} ║
+║  🔹 CONTA: {conta:<28} ║
+║                                          ║
+║  📅 Data/Hora: AGORA                     ║
+║  👤 Origem: Sistema Automático           ║
+║                                          ║
+╠══════════════════════════════════════════╣
+║   ✅ CONFIRMAR EXECUÇÃO?                  ║
+╚══════════════════════════════════════════╝
+"""
+
+MODELO_WHATSAPP = """
+📊 *ORDEM {acao}*
+
+• *Ativo:* {ticker}
+• *Quantidade:* {quantidade}
+• *Tipo:* {tipo}
+• *Conta:* {conta}
+• *Origem:* Sistema Automático
+
+_Esta ordem está pronta para execução._
+"""
+
+MODELO_BROKER = """
+🚨 *ORDEM URGENTE - EXECUTAR IMEDIATAMENTE*
+
+{acao_broker} {quantidade} {ticker_broker}
+
+📋 Detalhes:
+• Conta cliente: {conta}
+• Tipo: Mercado
+• Prazo: Dia
+• Origem: Sistema Automático
+
+⚠️ Confirmar execução em até 2 minutos.
+"""
+
+MODELO_BROKER_CONSOLIDADO = """
+🚨 *ORDENS CONSOLIDADAS - EXECUTAR IMEDIATAMENTE*
+
+{linhas}
+
+📋 Detalhes:
+• Conta cliente: {conta}
+• Ordens recebidas: {total_ordens}
+• Tipo: Mercado
+• Prazo: Dia
+• Origem: Sistema Automático
+
+⚠️ Confirmar execução em até 2 minutos.
+"""
+
+
+class ModeloMensagem:
+    """
+    Modelo compilado: lista de trechos fixos com posições reservadas para
+    as lacunas. renderizar() copia a lista, preenche as lacunas e junta.
+    """
+
+    __slots__ = ('nome', 'campos', '_partes', '_lacunas')
+
+    def __init__(self, nome, texto):
+        self.nome = nome
+        self._partes = []
+        self._lacunas = []  # (posição em _partes, campo, formato)
+
+        for fixo, campo, formato, conversao in Formatter().parse(texto):
+            if fixo:
+                self._partes.append(fixo)
+            if campo is not None:
+                if conversao:
+                    raise ValueError(f"Conversão !{conversao} não suportada no modelo '{nome}'")
+                self._lacunas.append((len(self._partes), campo, formato or ''))
+                self._partes.append('')
+
+        self.campos = tuple(sorted({campo for _, campo, _ in self._lacunas}))
+
+    def renderizar(self, valores):
+        """Preenche as lacunas com valores (dicionário) e devolve o texto."""
+        partes = self._partes.copy()
+        for posicao, campo, formato in self._lacunas:
+            partes[posicao] = format(valores[campo], formato)
+        return ''.join(partes)
+
+
+# ====== REGISTRO DE MODELOS ======
+_modelos = {}
+_trava_modelos = threading.Lock()
+
+
+def registrar_modelo(nome, texto):
+    """
+    Compila e registra um modelo (substitui se o nome já existir).
+    Campos disponíveis: acao, acao_broker, ticker, ticker_broker, quantidade,
+    conta, tipo
+    ('broker_consolidado' usa linhas, conta e total_ordens).
+    """
+    modelo = ModeloMensagem(nome, texto)
+    with _trava_modelos:
+        _modelos[nome] = modelo
+    return modelo
+
+
+def obter_modelo(nome):
+    """Retorna o modelo compilado com esse nome."""
+    try:
+        return _modelos[nome]
+    except KeyError:
+        raise ValueError(f"Modelo de ordem desconhecido: '{nome}' "
+                         f"(disponíveis: {', '.join(sorted(_modelos))})") from None
+
+
+registrar_modelo('caixa', MODELO_CAIXA)
+registrar_modelo('whatsapp', MODELO_WHATSAPP)
+registrar_modelo('broker', MODELO_BROKER)
+registrar_modelo('broker_consolidado', MODELO_BROKER_CONSOLIDADO)
+
+
+# ====== RENDERIZAÇÃO ======
+
+def preparar_valores(dados_ordem):
+    """
+    Converte o dicionário da ordem nos valores usados pelos modelos.
+    Conta ausente (ou None) vira "NÃO INFORMADA". Os campos do broker
+    mantêm os padrões de sempre de criar_mensagem_broker: só "compra"
+    vira COMPRA (ação ausente ou desconhecida é VENDA) e ticker ausente
+    aparece como ERRO.
+    """
+    acao = dados_ordem.get("acao")
+    conta = dados_ordem.get("conta")
+    return {
+        'acao': (acao or "compra").upper(),
+        'acao_broker': "COMPRA" if acao == "compra" else "VENDA",
+        'ticker': dados_ordem.get("ticker", "DESCONHECIDO"),
+        'ticker_broker': dados_ordem.get("ticker", "ERRO"),
+        'quantidade': dados_ordem.get("quantidade", 0),
+        'conta': "NÃO INFORMADA" if conta is None else conta,
+        'tipo': (dados_ordem.get("tipo") or "mercado").upper()
+    }
+
+
+def renderizar_ordem(dados_ordem, modelo='whatsapp'):
+    """Monta a mensagem de uma ordem com o modelo escolhido pelo nome."""
+    return obter_modelo(modelo).renderizar(preparar_valores(dados_ordem))
+
+
+def renderizar_ordens(ordens, modelo='whatsapp'):
+    """
+    Monta as mensagens de várias ordens com o mesmo modelo (procurado
+    uma única vez). Retorna uma lista na mesma ordem da entrada.
+    """
+    renderizar = obter_modelo(modelo).renderizar
+    return [renderizar(preparar_valores(ordem)) for ordem in ordens]
+
+
+# ====== FUNÇÕES DE TESTE ======
+
+def _formatar_referencia(dados_ordem):
+    """Versão anterior de formatar_ordem (duas f-strings por chamada)."""
+    acao = dados_ordem.get("acao", "compra").upper()
+    ticker = dados_ordem.get("ticker", "DESCONHECIDO")
+    quantidade = dados_ordem.get("quantidade", 0)
+    conta = dados_ordem.get("conta", "NÃO INFORMADA")
+    tipo_ordem = dados_ordem.get("tipo", "mercado").upper()
+
+    mensagem = MODELO_CAIXA.format(acao=acao, ticker=ticker, quantidade=quantidade,
+                                   tipo=tipo_ordem, conta=conta)
+    mensagem_simples = f"""
+📊 *ORDEM {acao}*
+
+• *Ativo:* {ticker}
+• *Quantidade:* {quantidade}
+• *Tipo:* {tipo_ordem}
+• *Conta:* {conta}
+• *Origem:* Sistema Automático
+
+_Esta ordem está pronta para execução._
+"""
+    return mensagem_simples
+
+
+def _broker_referencia(dados_ordem):
+    """Versão anterior de criar_mensagem_broker."""
+    acao = "COMPRA" if dados_ordem.get("acao") == "compra" else "VENDA"
+    ticker = dados_ordem.get("ticker", "ERRO")
+    quantidade = dados_ordem.get("quantidade", 0)
+    conta = dados_ordem.get("conta", "NÃO INFORMADA")
+
+    return f"""
+🚨 *ORDEM URGENTE - EXECUTAR IMEDIATAMENTE*
+
+{acao} {quantidade} {ticker}
+
+📋 Detalhes:
+• Conta cliente: {conta}
+• Tipo: Mercado
+• Prazo: Dia
+• Origem: Sistema Automático
+
+⚠️ Confirmar execução em até 2 minutos.
+"""
+
+
+def gerar_ordens_exemplo(total, semente=7):
+    """Gera ordens variadas para testes e benchmarks."""
+    import random
+
+    aleatorio = random.Random(semente)
+    tickers = ['PETR4', 'VALE3', 'ITUB4', 'BBDC4', 'WEGE3', 'B3SA3', 'TAEE11']
+    return [
+        {
+            "acao": aleatorio.choice(['compra', 'venda']),
+            "ticker": aleatorio.choice(tickers),
+            "quantidade": aleatorio.randint(1, 100000),
+            "conta": str(aleatorio.randint(10000, 99999)),
+            "tipo": aleatorio.choice(['mercado', 'limitada'])
+        }
+        for _ in range(total)
+    ]
+
+
+def benchmark_renderizacao(total=20000):
+    """Compara o custo por ordem: f-strings antigas x modelos compilados."""
+    import time
+
+    print("🧪 MODELOS DE ORDEM: EQUIVALÊNCIA E CUSTO POR ORDEM")
+    print("=" * 50)
+
+    ordens = gerar_ordens_exemplo(total)
+    # Ordens incompletas: os padrões antigos (ação, ticker) também valem
+    ordens += [{"ticker": "PETR4", "quantidade": 100, "conta": "1"},
+               {"acao": "cancela", "ticker": "VALE3", "quantidade": 5, "conta": "1"},
+               {"acao": "compra", "quantidade": 5, "conta": "1"}]
+
+    diferentes = sum(
+        renderizar_ordem(o, 'whatsapp') != _formatar_referencia(o) or
+        renderizar_ordem(o, 'broker') != _broker_referencia(o)
+        for o in ordens
+    )
+    print(f"\n   Ordens comparadas: {len(ordens)} | diferenças: {diferentes}")
+
+    medicoes = [
+        ("formatar_ordem antigo (caixa + whatsapp)", lambda: [_formatar_referencia(o) for o in ordens]),
+        ("criar_mensagem_broker antigo", lambda: [_broker_referencia(o) for o in ordens]),
+        ("renderizar_ordem(..., 'whatsapp')", lambda: [renderizar_ordem(o, 'whatsapp') for o in ordens]),
+        ("renderizar_ordem(..., 'broker')", lambda: [renderizar_ordem(o, 'broker') for o in ordens]),
+        ("renderizar_ordens(lista, 'whatsapp')", lambda: renderizar_ordens(ordens, 'whatsapp')),
+        ("renderizar_ordens(lista, 'caixa')", lambda: renderizar_ordens(ordens, 'caixa')),
+    ]
+
+    print()
+    for nome, funcao in medicoes:
+        inicio = time.perf_counter()
+        funcao()
+        duracao = (time.perf_counter() - inicio) / total
+        print(f"   ⏱️  {nome:<42} {duracao * 1e6:6.2f} µs/ordem")
+
+
+# Executar teste se rodar arquivo diretamente
+if __name__ == "__main__":
+    benchmark_renderizacao()
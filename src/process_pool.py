@@ -0,0 +1,262 @@
+"""
+POOL DE PROCESSOS PARA O TRABALHO PESADO DE CPU
+
+Analisar comandos (regex), validar, montar mensagens e extrair notícias
+do HTML são trabalhos de CPU. Numa thread só, tudo disputa o mesmo GIL;
+aqui esse trabalho vai para vários processos:
+
+- comandos: enviados em lotes (tamanho_lote) e executados nos workers
+  com executar_comando(..., buscar_noticias=False); a rede (notícias)
+  continua no processo principal, onde ficam o cache e o pool HTTP
+- HTML: a página baixada vai como bytes para um worker, que extrai as
+  notícias (news_fetcher.configurar_pool_extracao liga isso)
+- encerramento: Ctrl+C não mata os workers no meio de um lote; o
+  processo principal decide (encerrar() termina ou cancela o que falta)
+
+Exemplo:
+    with PoolProcessos(workers=4, tamanho_lote=256) as pool:
+        for comando, resultado in pool.executar_comandos(comandos):
+            ...
+"""
+
+import os
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from .command_processor import executar_comando, completar_noticias
+    from .news_fetcher import configurar_pool_extracao, extrair_noticias_google_rapido, _extrair_por_fonte
+    from .ticker_resolver import obter_resolvedor
+except ImportError:
+    from command_processor import executar_comando, completar_noticias
+    from news_fetcher import configurar_pool_extracao, extrair_noticias_google_rapido, _extrair_por_fonte
+    from ticker_resolver import obter_resolvedor
+
+# Configurações padrão
+WORKERS_PADRAO = os.cpu_count() or 1
+TAMANHO_LOTE_PADRAO = 256
+# Lotes em andamento por worker (limita a memória com entradas enormes)
+LOTES_POR_WORKER = 2
+
+
+# ====== FUNÇÕES EXECUTADAS NOS WORKERS ======
+
+def _preparar_worker():
+    """Roda uma vez em cada worker: ignora Ctrl+C e monta os índices."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    obter_resolvedor()
+
+
+def _executar_lote(comandos):
+    """
+    Executa um lote de comandos sem acessar a rede. Um comando com
+    problema vira a exceção na sua posição, sem perder o resto do lote.
+    """
+    resultados = []
+    for comando in comandos:
+        try:
+            resultados.append(executar_comando(comando, buscar_noticias=False))
+        except Exception as e:
+            resultados.append(e)
+    return resultados
+
+
+def _extrair_google(conteudo, query, max_noticias, codificacao):
+    """Extração do Google News a partir dos bytes da página."""
+    return extrair_noticias_google_rapido(conteudo, query, max_noticias, codificacao)
+
+
+def _extrair_fonte(nome_fonte, conteudo, query, max_noticias, url, codificacao):
+    """Extração de outra fonte: decodifica os bytes aqui, no worker."""
+    html = conteudo.decode(codificacao, errors='replace')
+    return _extrair_por_fonte(nome_fonte, html, query, max_noticias, url)
+
+
+# ====== POOL ======
+
+class PoolProcessos:
+    """
+    ProcessPoolExecutor com lotes, contadores e encerramento controlado.
+
+    - workers: número de processos (padrão: núcleos da máquina)
+    - tamanho_lote: comandos enviados de uma vez a um worker (lotes
+      maiores diluem o custo de serializar; menores equilibram melhor)
+    - extrair_html: se True, o news_fetcher passa a mandar o HTML baixado
+      para este pool enquanto ele estiver aberto
+    """
+
+    def __init__(self, workers=None, tamanho_lote=TAMANHO_LOTE_PADRAO, extrair_html=True):
+        if tamanho_lote < 1:
+            raise ValueError("tamanho_lote deve ser pelo menos 1")
+
+        self.workers = workers or WORKERS_PADRAO
+        self.tamanho_lote = tamanho_lote
+        self.extrair_html = extrair_html
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_preparar_worker)
+        self._trava = threading.Lock()
+        self._encerrado = False
+
+        # Contadores
+        self.lotes = 0
+        self.comandos = 0
+        self.paginas = 0
+        self.falhas = 0
+
+        if extrair_html:
+            configurar_pool_extracao(self)
+
+    # ====== COMANDOS ======
+
+    def executar_comandos(self, comandos, buscar_noticias=True):
+        """
+        Gerador: processa os comandos (qualquer iterável, lido aos poucos)
+        nos workers e devolve (comando, resultado) na ordem de entrada.
+
+        resultado é um ResultadoComando, ou a exceção levantada por aquele
+        comando. Com buscar_noticias=True, as notícias são buscadas aqui,
+        no processo principal, depois que o worker analisou o pedido.
+        """
+        pendentes = deque()  # (lote, futuro)
+        limite = self.workers * LOTES_POR_WORKER
+        iterador = iter(comandos)
+
+        while True:
+            while len(pendentes) < limite:
+                lote = [c for _, c in zip(range(self.tamanho_lote), iterador)]
+                if not lote:
+                    break
+                pendentes.append((lote, self._executor.submit(_executar_lote, lote)))
+
+            if not pendentes:
+                return
+
+            lote, futuro = pendentes.popleft()
+            resultados = futuro.result()
+            with self._trava:
+                self.lotes += 1
+                self.comandos += len(lote)
+                self.falhas += sum(isinstance(r, Exception) for r in resultados)
+
+            for comando, resultado in zip(lote, resultados):
+                if buscar_noticias and not isinstance(resultado, Exception):
+                    try:
+                        completar_noticias(resultado)
+                    except Exception as e:
+                        resultado = e
+                yield comando, resultado
+
+    # ====== HTML ======
+
+    def extrair_noticias_google(self, conteudo, query, max_noticias=5, codificacao='utf-8'):
+        """Mesma interface de extrair_noticias_google_rapido, rodando num worker."""
+        with self._trava:
+            self.paginas += 1
+        return self._executor.submit(_extrair_google, conteudo, query, max_noticias,
+                                     codificacao).result()
+
+    def extrair_por_fonte(self, nome_fonte, conteudo, query, max_noticias, url, codificacao='utf-8'):
+        """Extrator de uma fonte de SITES_BUSCA, rodando num worker (HTML em bytes)."""
+        with self._trava:
+            self.paginas += 1
+        return self._executor.submit(_extrair_fonte, nome_fonte, conteudo, query, max_noticias,
+                                     url, codificacao).result()
+
+    # ====== CONTROLE ======
+
+    def encerrar(self, cancelar_pendentes=False):
+        """
+        Fecha o pool esperando os lotes em andamento. Com
+        cancelar_pendentes=True, lotes que ainda não começaram são descartados.
+        """
+        with self._trava:
+            if self._encerrado:
+                return
+            self._encerrado = True
+
+        if self.extrair_html:
+            configurar_pool_extracao(None)
+        self._executor.shutdown(wait=True, cancel_futures=cancelar_pendentes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, rastro):
+        # Saída por erro ou Ctrl+C: não vale a pena terminar o que falta
+        self.encerrar(cancelar_pendentes=tipo is not None)
+
+    def estatisticas(self):
+        """Workers, tamanho do lote e quanto já foi processado."""
+        with self._trava:
+            return {
+                'workers': self.workers,
+                'tamanho_lote': self.tamanho_lote,
+                'lotes': self.lotes,
+                'comandos': self.comandos,
+                'paginas_html': self.paginas,
+                'falhas': self.falhas
+            }
+
+
+# ====== BENCHMARK ======
+def benchmark_processos(total=60000, tamanho_lote=TAMANHO_LOTE_PADRAO, paginas=200):
+    """
+    Vazão de comandos e de extração de HTML: um processo só x pool com
+    1, 2, 4... workers (até o número de núcleos).
+    """
+    try:
+        from .news_fetcher import gerar_html_exemplo
+    except ImportError:
+        from news_fetcher import gerar_html_exemplo
+
+    print("🧪 BENCHMARK DO POOL DE PROCESSOS")
+    print("=" * 50)
+    print(f"   Núcleos disponíveis: {WORKERS_PADRAO}")
+
+    modelos = [
+        "compra 100 PETR4 conta 12345",
+        "venda 50 VALE3",
+        "notícias ITUB4",
+        "compra 200 petrobras",
+        "vender 30 BBDC4 conta 777",
+        "xyz comando estranho",
+    ]
+    comandos = [modelos[i % len(modelos)] for i in range(total)]
+    pagina = gerar_html_exemplo(100)
+
+    inicio = time.perf_counter()
+    sequencial = [executar_comando(c, buscar_noticias=False) for c in comandos]
+    base = total / (time.perf_counter() - inicio)
+    inicio = time.perf_counter()
+    for _ in range(paginas):
+        extrair_noticias_google_rapido(pagina, 'PETR4', 5)
+    base_html = paginas / (time.perf_counter() - inicio)
+    print(f"\n   1 processo: {base:9.0f} comandos/s | {base_html:6.0f} páginas/s")
+
+    contagens = sorted({n for n in (1, 2, 4) if n <= WORKERS_PADRAO} | {WORKERS_PADRAO})
+    for workers in contagens:
+        with PoolProcessos(workers=workers, tamanho_lote=tamanho_lote) as pool:
+            # Aquece os workers (fork + índices) fora da medição
+            list(pool.executar_comandos(comandos[:workers * tamanho_lote], buscar_noticias=False))
+
+            inicio = time.perf_counter()
+            resultados = [r for _, r in pool.executar_comandos(comandos, buscar_noticias=False)]
+            vazao = total / (time.perf_counter() - inicio)
+
+            inicio = time.perf_counter()
+            futuros = [pool._executor.submit(_extrair_google, pagina, 'PETR4', 5, 'utf-8')
+                       for _ in range(paginas)]
+            for futuro in futuros:
+                futuro.result()
+            vazao_html = paginas / (time.perf_counter() - inicio)
+
+        iguais = all(a == b for a, b in zip(resultados, sequencial))
+        print(f"   {workers} worker(s): {vazao:7.0f} comandos/s ({vazao / base:.2f}x) | "
+              f"{vazao_html:6.0f} páginas/s ({vazao_html / base_html:.2f}x) | iguais: {iguais}")
+
+
+# Executar benchmark se rodar arquivo diretamente
+if __name__ == "__main__":
+    benchmark_processos()
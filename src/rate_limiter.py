@@ -0,0 +1,353 @@
+"""
+LIMITE DE REQUISIÇÕES POR HOST (TOKEN BUCKET)
+
+Sem limite, uma rajada de pedidos de notícias bate nos sites de
+SITES_BUSCA ao mesmo tempo, o site nos bloqueia (429) e tudo cai nas
+notícias simuladas. Cada host tem um balde de tokens:
+
+- o balde enche taxa_por_segundo tokens por segundo, até capacidade
+  (rajadas curtas de até "capacidade" requisições passam direto)
+- cada requisição reserva um token; se o balde está vazio, a reserva
+  fica na fila e a requisição espera a sua vez (ordem de chegada)
+- se a espera passar do prazo, LimiteExcedido na hora (sem esperar à toa)
+
+Funciona com threads (aguardar) e asyncio (aguardar_async). Com
+pasta_compartilhada, o balde fica num arquivo travado com fcntl.flock e
+vale para todos os processos da máquina (ex: PoolProcessos, vários
+servidores).
+
+Exemplo:
+    limitador = obter_limitador()
+    limitador.aguardar('news.google.com', prazo=5)   # bloqueia até poder
+    await limitador.aguardar_async('news.google.com', prazo=5)
+    limitador.estatisticas()  # histograma das esperas por host
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: sem balde compartilhado entre processos
+    fcntl = None
+
+# Configurações padrão
+TAXA_POR_SEGUNDO_PADRAO = 2.0
+CAPACIDADE_PADRAO = 5
+PRAZO_PADRAO_SEGUNDOS = 5.0
+
+# Limites específicos por host: (taxa_por_segundo, capacidade)
+LIMITES_POR_HOST = {
+    'news.google.com': (1.0, 5),
+    'br.investing.com': (0.5, 2),
+    'www.infomoney.com.br': (1.0, 3),
+}
+
+# Limites das faixas do histograma de espera (segundos); acima do último
+# vai para uma faixa extra
+FAIXAS_HISTOGRAMA = (0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class LimiteExcedido(Exception):
+    """A espera pela vez de fazer a requisição passaria do prazo."""
+
+
+# ====== BALDES ======
+
+class BaldeTokens:
+    """Balde em memória (threads do mesmo processo)."""
+
+    def __init__(self, taxa_por_segundo, capacidade):
+        self.taxa_por_segundo = taxa_por_segundo
+        self.capacidade = capacidade
+        self._tokens = float(capacidade)
+        self._atualizado_em = time.monotonic()
+        self._trava = threading.Lock()
+
+    def reservar(self, prazo):
+        """
+        Reserva um token e devolve quantos segundos esperar por ele, ou
+        None (sem reservar nada) se a espera passaria do prazo.
+        """
+        with self._trava:
+            agora = time.monotonic()
+            tokens, espera = _reservar(self._tokens, self._atualizado_em, agora,
+                                       self.taxa_por_segundo, self.capacidade, prazo)
+            if espera is not None:
+                self._tokens, self._atualizado_em = tokens, agora
+            return espera
+
+
+class BaldeArquivo:
+    """
+    Balde guardado num arquivo pequeno ("tokens instante"), travado com
+    fcntl.flock a cada reserva: vale para todos os processos que usarem
+    o mesmo caminho.
+    """
+
+    def __init__(self, caminho, taxa_por_segundo, capacidade):
+        if fcntl is None:
+            raise RuntimeError("Balde compartilhado entre processos precisa de fcntl (Linux/macOS)")
+
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self.caminho = caminho
+        self.taxa_por_segundo = taxa_por_segundo
+        self.capacidade = capacidade
+        self._trava = threading.Lock()  # flock não separa threads do mesmo processo
+
+    def reservar(self, prazo):
+        """Mesmo contrato de BaldeTokens.reservar, com o estado no arquivo."""
+        with self._trava, open(self.caminho, 'a+', encoding='ascii') as arquivo:
+            fcntl.flock(arquivo, fcntl.LOCK_EX)
+            try:
+                arquivo.seek(0)
+                agora = time.time()  # relógio comum a todos os processos
+                try:
+                    tokens, atualizado_em = (float(parte) for parte in arquivo.read().split())
+                except ValueError:
+                    tokens, atualizado_em = float(self.capacidade), agora
+
+                tokens, espera = _reservar(tokens, atualizado_em, agora,
+                                           self.taxa_por_segundo, self.capacidade, prazo)
+                if espera is not None:
+                    arquivo.seek(0)
+                    arquivo.truncate()
+                    arquivo.write(f"{tokens!r} {agora!r}")
+                    arquivo.flush()
+                return espera
+            finally:
+                fcntl.flock(arquivo, fcntl.LOCK_UN)
+
+
+def _reservar(tokens, atualizado_em, agora, taxa_por_segundo, capacidade, prazo):
+    """
+    Conta comum aos baldes: enche o balde pelo tempo passado e tira um
+    token. Tokens negativos são reservas na fila; a espera é o tempo até
+    o balde voltar a zero. Retorna (tokens, espera) ou (tokens, None).
+    """
+    tokens = min(float(capacidade), tokens + (agora - atualizado_em) * taxa_por_segundo)
+    tokens -= 1
+    espera = max(0.0, -tokens / taxa_por_segundo)
+    if prazo is not None and espera > prazo:
+        return tokens + 1, None
+    return tokens, espera
+
+
+# ====== HISTOGRAMA ======
+
+class HistogramaEspera:
+    """Contagem das esperas por faixa, mais total, soma e máximo."""
+
+    def __init__(self, faixas=FAIXAS_HISTOGRAMA):
+        self.faixas = faixas
+        self.contagens = [0] * (len(faixas) + 1)
+        self.total = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, segundos):
+        posicao = len(self.faixas)
+        for indice, limite in enumerate(self.faixas):
+            if segundos <= limite:
+                posicao = indice
+                break
+        self.contagens[posicao] += 1
+        self.total += 1
+        self.soma += segundos
+        self.maximo = max(self.maximo, segundos)
+
+    def para_dict(self):
+        rotulos = [f"<={limite * 1000:g}ms" for limite in self.faixas]
+        rotulos.append(f">{self.faixas[-1] * 1000:g}ms")
+        return {
+            'esperas': dict(zip(rotulos, self.contagens)),
+            'total': self.total,
+            'media_ms': round(self.soma / self.total * 1000, 3) if self.total else None,
+            'max_ms': round(self.maximo * 1000, 3)
+        }
+
+
+# ====== LIMITADOR ======
+
+class LimitadorTaxa:
+    """
+    Um balde por host, criado no primeiro uso com LIMITES_POR_HOST (ou o
+    padrão taxa_por_segundo/capacidade).
+
+    - pasta_compartilhada: se informada, os baldes ficam em arquivos
+      nessa pasta e valem para todos os processos
+    """
+
+    def __init__(self, taxa_por_segundo=TAXA_POR_SEGUNDO_PADRAO, capacidade=CAPACIDADE_PADRAO,
+                 limites_por_host=None, pasta_compartilhada=None):
+        self.taxa_por_segundo = taxa_por_segundo
+        self.capacidade = capacidade
+        self.limites_por_host = LIMITES_POR_HOST if limites_por_host is None else limites_por_host
+        self.pasta_compartilhada = pasta_compartilhada
+
+        self._trava = threading.Lock()
+        self._baldes = {}
+        self._histogramas = {}
+        self._recusadas = {}
+
+    def _balde(self, host):
+        balde = self._baldes.get(host)
+        if balde is None:
+            with self._trava:
+                balde = self._baldes.get(host)
+                if balde is None:
+                    taxa, capacidade = self.limites_por_host.get(
+                        host, (self.taxa_por_segundo, self.capacidade)
+                    )
+                    if self.pasta_compartilhada:
+                        caminho = os.path.join(self.pasta_compartilhada, f"{host}.balde")
+                        balde = BaldeArquivo(caminho, taxa, capacidade)
+                    else:
+                        balde = BaldeTokens(taxa, capacidade)
+                    self._baldes[host] = balde
+                    self._histogramas[host] = HistogramaEspera()
+                    self._recusadas[host] = 0
+        return balde
+
+    def reservar(self, host, prazo=PRAZO_PADRAO_SEGUNDOS):
+        """
+        Reserva a vez do host e devolve quantos segundos esperar (sem
+        esperar). Levanta LimiteExcedido se a espera passar do prazo.
+        """
+        espera = self._balde(host).reservar(prazo)
+
+        with self._trava:
+            if espera is None:
+                self._recusadas[host] += 1
+            else:
+                self._histogramas[host].registrar(espera)
+
+        if espera is None:
+            raise LimiteExcedido(f"Limite de requisições para {host}: espera maior que {prazo}s")
+        return espera
+
+    def aguardar(self, host, prazo=PRAZO_PADRAO_SEGUNDOS):
+        """Bloqueia a thread até a vez do host. Retorna a espera em segundos."""
+        espera = self.reservar(host, prazo)
+        if espera > 0:
+            time.sleep(espera)
+        return espera
+
+    async def aguardar_async(self, host, prazo=PRAZO_PADRAO_SEGUNDOS):
+        """Versão asyncio de aguardar (não bloqueia o event loop)."""
+        espera = self.reservar(host, prazo)
+        if espera > 0:
+            await asyncio.sleep(espera)
+        return espera
+
+    def estatisticas(self):
+        """Por host: limite, histograma das esperas e requisições recusadas por prazo."""
+        with self._trava:
+            return {
+                host: {
+                    'taxa_por_segundo': balde.taxa_por_segundo,
+                    'capacidade': balde.capacidade,
+                    'compartilhado': isinstance(balde, BaldeArquivo),
+                    'recusadas': self._recusadas[host],
+                    **self._histogramas[host].para_dict()
+                }
+                for host, balde in self._baldes.items()
+            }
+
+
+# ====== LIMITADOR PADRÃO DO MÓDULO ======
+_limitador_padrao = None
+_trava_limitador = threading.Lock()
+
+
+def obter_limitador():
+    """Retorna o limitador compartilhado (criado na primeira chamada)."""
+    global _limitador_padrao
+
+    if _limitador_padrao is None:
+        with _trava_limitador:
+            if _limitador_padrao is None:
+                _limitador_padrao = LimitadorTaxa()
+    return _limitador_padrao
+
+
+def configurar_limitador(**opcoes):
+    """
+    Substitui o limitador compartilhado por um novo com outras opções.
+
+    Exemplo (vale para todos os processos da máquina):
+        configurar_limitador(pasta_compartilhada='logs/limites')
+    """
+    global _limitador_padrao
+
+    with _trava_limitador:
+        _limitador_padrao = LimitadorTaxa(**opcoes)
+        return _limitador_padrao
+
+
+# ====== FUNÇÃO DE TESTE ======
+def _rajada_em_processo(pasta, quantidade):
+    """Usada por testar_limitador: uma rajada vinda de outro processo."""
+    limitador = LimitadorTaxa(taxa_por_segundo=10, capacidade=2, pasta_compartilhada=pasta)
+    for _ in range(quantidade):
+        limitador.aguardar('exemplo.com', prazo=10)
+
+
+def testar_limitador():
+    """Testa rajadas com threads, asyncio, prazo e o balde entre processos"""
+
+    import multiprocessing
+    import tempfile
+
+    print("🧪 TESTANDO LIMITE DE REQUISIÇÕES POR HOST")
+    print("=" * 50)
+
+    print("\n1️⃣ 20 threads ao mesmo tempo, 10/s com rajada de 5:")
+    limitador = LimitadorTaxa(taxa_por_segundo=10, capacidade=5)
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=limitador.aguardar, args=('exemplo.com', 10))
+               for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"   Levou {time.perf_counter() - inicio:.2f}s (esperado ~1.5s: 5 na hora + 15 a 10/s)")
+    print(f"   {limitador.estatisticas()['exemplo.com']}")
+
+    print("\n2️⃣ asyncio: 10 corrotinas, prazo de 0.3s:")
+    limitador = LimitadorTaxa(taxa_por_segundo=10, capacidade=2)
+
+    async def cenario():
+        async def uma():
+            try:
+                await limitador.aguardar_async('exemplo.com', prazo=0.3)
+                return 'ok'
+            except LimiteExcedido:
+                return 'recusada'
+        return await asyncio.gather(*[uma() for _ in range(10)])
+
+    resultados = asyncio.run(cenario())
+    print(f"   ok: {resultados.count('ok')} | recusadas: {resultados.count('recusada')}")
+
+    if fcntl is not None:
+        print("\n3️⃣ Balde em arquivo, 3 processos com 10 requisições cada (10/s, rajada de 2):")
+        with tempfile.TemporaryDirectory() as pasta:
+            inicio = time.perf_counter()
+            processos = [multiprocessing.Process(target=_rajada_em_processo, args=(pasta, 10))
+                         for _ in range(3)]
+            for processo in processos:
+                processo.start()
+            for processo in processos:
+                processo.join()
+            print(f"   Levou {time.perf_counter() - inicio:.2f}s "
+                  f"(esperado ~2.8s se o limite vale para os 3 juntos)")
+
+
+# Executar teste se rodar arquivo diretamente
+if __name__ == "__main__":
+    testar_limitador()
@@ -0,0 +1,314 @@
+"""
+ESCALONADOR COM FAIXAS DE PRIORIDADE
+
+Ordens (compra/venda) e pedidos de notícias entram em faixas separadas,
+cada uma com a sua fila limitada e o seu grupo de workers (threads):
+
+- a faixa 'ordens' tem workers próprios, então uma busca de notícias
+  lenta (timeout de 10s + fallback) nunca fica na frente de uma ordem
+- os workers de 'noticias' olham primeiro a fila de ordens: se houver
+  ordem esperando, eles a atendem antes de pegar a próxima notícia
+- fila cheia → queue.Full na hora (o chamador decide: 503, esperar...)
+
+Métricas por faixa: profundidade da fila, espera na fila (p50/p95/máx),
+tempo de execução e contadores.
+
+Exemplo:
+    escalonador = EscalonadorPrioridade(workers_ordens=2, workers_noticias=4)
+    futuro = escalonador.enviar_comando("compra 100 PETR4 conta 12345")
+    resultado = futuro.result()
+    print(escalonador.estatisticas())
+    escalonador.encerrar()
+"""
+
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+try:
+    from .command_processor import executar_comando
+    from .intent_parser import analisar_comando
+    from .utils.helpers import percentil
+except ImportError:
+    from command_processor import executar_comando
+    from intent_parser import analisar_comando
+    from utils.helpers import percentil
+
+# Faixas, da mais prioritária para a menos prioritária
+FAIXA_ORDENS = 'ordens'
+FAIXA_NOTICIAS = 'noticias'
+
+# Configurações padrão
+WORKERS_ORDENS = 2
+WORKERS_NOTICIAS = 4
+MAX_FILA_ORDENS = 1000
+MAX_FILA_NOTICIAS = 100
+AMOSTRAS_METRICAS = 5000
+
+
+class _Tarefa:
+    """Uma chamada na fila, com o futuro onde o resultado será entregue."""
+
+    __slots__ = ('funcao', 'args', 'kwargs', 'futuro', 'chegada')
+
+    def __init__(self, funcao, args, kwargs):
+        self.funcao = funcao
+        self.args = args
+        self.kwargs = kwargs
+        self.futuro = Future()
+        self.chegada = time.perf_counter()
+
+
+class _Faixa:
+    """Fila e métricas de uma faixa de prioridade."""
+
+    __slots__ = ('nome', 'max_fila', 'workers', 'fila', 'esperas', 'execucoes',
+                 'enviadas', 'concluidas', 'rejeitadas', 'falhas', 'em_execucao')
+
+    def __init__(self, nome, workers, max_fila):
+        self.nome = nome
+        self.workers = workers
+        self.max_fila = max_fila
+        self.fila = deque()
+        self.esperas = deque(maxlen=AMOSTRAS_METRICAS)
+        self.execucoes = deque(maxlen=AMOSTRAS_METRICAS)
+        self.enviadas = 0
+        self.concluidas = 0
+        self.rejeitadas = 0
+        self.falhas = 0
+        self.em_execucao = 0
+
+
+def _percentis(valores):
+    """p50, p95 e máximo (em ms) de uma amostra."""
+    if not valores:
+        return {'p50_ms': None, 'p95_ms': None, 'max_ms': None}
+    ordenados = sorted(valores)
+    return {
+        'p50_ms': round(percentil(ordenados, 50) * 1000, 3),
+        'p95_ms': round(percentil(ordenados, 95) * 1000, 3),
+        'max_ms': round(ordenados[-1] * 1000, 3)
+    }
+
+
+class EscalonadorPrioridade:
+    """
+    Grupo de workers por faixa de prioridade.
+
+    - workers_ordens / workers_noticias: threads dedicadas a cada faixa
+    - max_fila_ordens / max_fila_noticias: tamanho máximo de cada fila
+    - emprestar_workers: workers de notícias também atendem ordens
+      quando houver ordens esperando (nunca o contrário)
+    """
+
+    def __init__(self, workers_ordens=WORKERS_ORDENS, workers_noticias=WORKERS_NOTICIAS,
+                 max_fila_ordens=MAX_FILA_ORDENS, max_fila_noticias=MAX_FILA_NOTICIAS,
+                 emprestar_workers=True):
+        if workers_ordens < 1 or workers_noticias < 1:
+            raise ValueError("Cada faixa precisa de pelo menos 1 worker")
+
+        self.emprestar_workers = emprestar_workers
+        self._faixas = {
+            FAIXA_ORDENS: _Faixa(FAIXA_ORDENS, workers_ordens, max_fila_ordens),
+            FAIXA_NOTICIAS: _Faixa(FAIXA_NOTICIAS, workers_noticias, max_fila_noticias),
+        }
+        self._condicao = threading.Condition()
+        self._encerrado = False
+
+        # Cada worker atende uma lista de faixas, na ordem de prioridade
+        atendidas = {
+            FAIXA_ORDENS: [self._faixas[FAIXA_ORDENS]],
+            FAIXA_NOTICIAS: ([self._faixas[FAIXA_ORDENS]] if emprestar_workers else [])
+            + [self._faixas[FAIXA_NOTICIAS]],
+        }
+        self._threads = []
+        numeros = itertools.count(1)
+        for nome, faixa in self._faixas.items():
+            for _ in range(faixa.workers):
+                thread = threading.Thread(target=self._worker, args=(atendidas[nome],),
+                                          name=f'escalonador-{nome}-{next(numeros)}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    # ====== ENTRADA ======
+
+    def enviar(self, faixa, funcao, *args, **kwargs):
+        """
+        Coloca funcao(*args, **kwargs) na faixa indicada e devolve um
+        concurrent.futures.Future. Levanta queue.Full se a fila estiver cheia.
+        """
+        try:
+            destino = self._faixas[faixa]
+        except KeyError:
+            raise ValueError(f"Faixa desconhecida: '{faixa}' "
+                             f"(disponíveis: {', '.join(self._faixas)})") from None
+
+        tarefa = _Tarefa(funcao, args, kwargs)
+        with self._condicao:
+            if self._encerrado:
+                raise RuntimeError("Escalonador encerrado")
+            if len(destino.fila) >= destino.max_fila:
+                destino.rejeitadas += 1
+                raise queue.Full(f"Fila de {faixa} cheia")
+            destino.fila.append(tarefa)
+            destino.enviadas += 1
+            # notify_all: o worker acordado pode não atender esta faixa
+            self._condicao.notify_all()
+        return tarefa.futuro
+
+    @staticmethod
+    def faixa_do_comando(comando):
+        """'noticias' para pedidos de notícias, 'ordens' para o resto."""
+        if analisar_comando(comando)['acao'] == 'noticias':
+            return FAIXA_NOTICIAS
+        return FAIXA_ORDENS
+
+    def enviar_comando(self, comando, funcao=executar_comando, **kwargs):
+        """Classifica o comando e envia funcao(comando, **kwargs) para a faixa certa."""
+        return self.enviar(self.faixa_do_comando(comando), funcao, comando, **kwargs)
+
+    # ====== WORKERS ======
+
+    def _proxima(self, faixas):
+        """Retira a tarefa da faixa mais prioritária com fila (ou None)."""
+        for faixa in faixas:
+            if faixa.fila:
+                faixa.em_execucao += 1
+                return faixa, faixa.fila.popleft()
+        return None, None
+
+    def _worker(self, faixas):
+        """Laço de um worker: pega a tarefa mais prioritária e executa."""
+        while True:
+            with self._condicao:
+                faixa, tarefa = self._proxima(faixas)
+                while tarefa is None:
+                    if self._encerrado:
+                        return
+                    self._condicao.wait()
+                    faixa, tarefa = self._proxima(faixas)
+
+            inicio = time.perf_counter()
+            falhou = False
+            if tarefa.futuro.set_running_or_notify_cancel():
+                try:
+                    tarefa.futuro.set_result(tarefa.funcao(*tarefa.args, **tarefa.kwargs))
+                except BaseException as e:
+                    falhou = True
+                    tarefa.futuro.set_exception(e)
+            fim = time.perf_counter()
+
+            with self._condicao:
+                faixa.em_execucao -= 1
+                faixa.concluidas += 1
+                faixa.falhas += falhou
+                faixa.esperas.append(inicio - tarefa.chegada)
+                faixa.execucoes.append(fim - inicio)
+
+    # ====== CONTROLE E MÉTRICAS ======
+
+    def profundidade(self, faixa):
+        """Quantas tarefas esperam na fila da faixa."""
+        with self._condicao:
+            return len(self._faixas[faixa].fila)
+
+    def encerrar(self, esperar=True, cancelar_pendentes=False):
+        """
+        Para de aceitar tarefas. Por padrão termina as que já estão na
+        fila; com cancelar_pendentes=True os futuros pendentes são cancelados.
+        """
+        with self._condicao:
+            if cancelar_pendentes:
+                for faixa in self._faixas.values():
+                    while faixa.fila:
+                        faixa.fila.popleft().futuro.cancel()
+            self._encerrado = True
+            self._condicao.notify_all()
+
+        if esperar:
+            for thread in self._threads:
+                thread.join()
+
+    def estatisticas(self):
+        """Por faixa: workers, fila, espera na fila e tempo de execução."""
+        with self._condicao:
+            resultado = {
+                nome: {
+                    'workers': faixa.workers,
+                    'fila': len(faixa.fila),
+                    'max_fila': faixa.max_fila,
+                    'em_execucao': faixa.em_execucao,
+                    'enviadas': faixa.enviadas,
+                    'concluidas': faixa.concluidas,
+                    'rejeitadas': faixa.rejeitadas,
+                    'falhas': faixa.falhas,
+                    'espera': list(faixa.esperas),
+                    'execucao': list(faixa.execucoes)
+                }
+                for nome, faixa in self._faixas.items()
+            }
+
+        # Percentis fora da trava (ordenar 5000 amostras não deve travar workers)
+        for dados in resultado.values():
+            dados['espera'] = _percentis(dados['espera'])
+            dados['execucao'] = _percentis(dados['execucao'])
+        return resultado
+
+
+# ====== FUNÇÃO DE TESTE ======
+def testar_escalonador():
+    """Mede a espera das ordens sem e com muitas notícias lentas na fila"""
+
+    print("🧪 TESTANDO ESCALONADOR COM PRIORIDADE")
+    print("=" * 50)
+
+    def ordem_rapida(comando):
+        return executar_comando(comando, buscar_noticias=False)
+
+    def noticia_lenta(comando):
+        time.sleep(0.2)  # simula a busca de notícias na rede
+        return comando
+
+    def medir(noticias):
+        escalonador = EscalonadorPrioridade(workers_ordens=2, workers_noticias=4,
+                                            max_fila_noticias=1000)
+        for _ in range(noticias):
+            escalonador.enviar(FAIXA_NOTICIAS, noticia_lenta, "notícias PETR4")
+
+        futuros = []
+        for i in range(500):
+            futuros.append(escalonador.enviar_comando(f"compra {i + 1} PETR4 conta 12345",
+                                                      funcao=ordem_rapida))
+            if i % 50 == 0:
+                time.sleep(0.01)
+        for futuro in futuros:
+            futuro.result()
+
+        estatisticas = escalonador.estatisticas()
+        escalonador.encerrar(cancelar_pendentes=True)
+        return estatisticas
+
+    for noticias in (0, 200):
+        estatisticas = medir(noticias)
+        ordens = estatisticas[FAIXA_ORDENS]
+        print(f"\n   {noticias} notícias lentas na fila → 500 ordens:")
+        print(f"   Espera das ordens: {ordens['espera']}")
+        print(f"   Fila de notícias no fim: {estatisticas[FAIXA_NOTICIAS]['fila']}")
+
+    print("\n   Fila cheia:")
+    escalonador = EscalonadorPrioridade(workers_ordens=1, workers_noticias=1,
+                                        max_fila_noticias=2, emprestar_workers=False)
+    try:
+        for _ in range(5):
+            escalonador.enviar(FAIXA_NOTICIAS, noticia_lenta, "notícias VALE3")
+    except queue.Full as e:
+        print(f"   ⚠️  {e} → rejeitadas: {escalonador.estatisticas()[FAIXA_NOTICIAS]['rejeitadas']}")
+    escalonador.encerrar(cancelar_pendentes=True)
+
+
+# Executar teste se rodar arquivo diretamente
+if __name__ == "__main__":
+    testar_escalonador()
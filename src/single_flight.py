@@ -0,0 +1,300 @@
+"""
+COALESCÊNCIA DE REQUISIÇÕES (SINGLE-FLIGHT)
+
+Quando vários pedidos iguais chegam ao mesmo tempo (ex: 50 assessores
+pedindo "notícias PETR4" na abertura do pregão), só o primeiro executa a
+busca; os demais esperam por ela e recebem o mesmo resultado.
+
+Funciona com threads (executar) e com asyncio (executar_async).
+
+Exemplo:
+    voos = SingleFlight()
+    resultado = voos.executar(('PETR4', 5), buscar, 'PETR4')
+"""
+
+import asyncio
+import threading
+
+
+class _Voo:
+    """Uma execução em andamento, compartilhada pelos pedidos com a mesma chave."""
+
+    __slots__ = ('evento', 'resultado', 'erro', '_trava', '_ouvintes')
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro = None
+        self._trava = threading.Lock()
+        self._ouvintes = []
+
+    def ao_concluir(self, ouvinte):
+        """Chama ouvinte() quando a execução terminar (na hora, se já terminou)."""
+        with self._trava:
+            if not self.evento.is_set():
+                self._ouvintes.append(ouvinte)
+                return
+        ouvinte()
+
+    def concluir(self):
+        """Libera as threads que esperam e avisa os ouvintes (corrotinas)."""
+        with self._trava:
+            self.evento.set()
+            ouvintes, self._ouvintes = self._ouvintes, []
+        for ouvinte in ouvintes:
+            ouvinte()
+
+
+def _avisar_loop(loop, futuro):
+    """Ouvinte de _Voo que completa um Future de outro event loop."""
+    def completar():
+        if not futuro.done():
+            futuro.set_result(None)
+
+    def ouvinte():
+        try:
+            loop.call_soon_threadsafe(completar)
+        except RuntimeError:
+            pass  # event loop já fechado: ninguém mais espera
+
+    return ouvinte
+
+
+class SingleFlight:
+    """
+    Garante no máximo uma execução em andamento por chave.
+    Pedidos que chegam durante a execução são "coalescidos".
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._voos = {}        # chave → _Voo (threads)
+        self._voos_async = {}  # (loop, chave) → Task (asyncio)
+
+        # Contadores
+        self.execucoes = 0
+        self.coalescidos = 0
+
+    def executar(self, chave, funcao, *args, **kwargs):
+        """
+        Executa funcao(*args, **kwargs), a menos que já exista uma execução
+        em andamento para a mesma chave: nesse caso espera por ela e devolve
+        o mesmo resultado (ou a mesma exceção).
+        """
+        with self._trava:
+            voo = self._voos.get(chave)
+            lider = voo is None
+            if lider:
+                voo = _Voo()
+                self._voos[chave] = voo
+                self.execucoes += 1
+            else:
+                self.coalescidos += 1
+
+        if not lider:
+            voo.evento.wait()
+            if voo.erro is not None:
+                raise voo.erro
+            return voo.resultado
+
+        try:
+            voo.resultado = funcao(*args, **kwargs)
+            return voo.resultado
+        except BaseException as e:
+            voo.erro = e
+            raise
+        finally:
+            with self._trava:
+                del self._voos[chave]
+            voo.concluir()
+
+    async def executar_async(self, chave, fabrica_corrotina):
+        """
+        Versão asyncio: fabrica_corrotina() cria a corrotina que faz o
+        trabalho. Só é chamada se não houver execução em andamento para a
+        chave; os demais pedidos aguardam a mesma tarefa.
+
+        Threads e corrotinas se juntam: uma busca em andamento numa thread
+        (executar) atende a corrotina, que espera por ela sem travar o
+        event loop, e vice-versa.
+
+        Cancelar um pedido não cancela a tarefa compartilhada.
+        """
+        loop = asyncio.get_running_loop()
+        chave_loop = (loop, chave)
+
+        with self._trava:
+            tarefa = self._voos_async.get(chave_loop)
+            voo = None
+            if tarefa is not None:
+                self.coalescidos += 1
+            elif chave in self._voos:
+                # Mesma busca em andamento numa thread (ou em outro event loop)
+                voo = self._voos[chave]
+                self.coalescidos += 1
+            else:
+                voo_lider = _Voo()
+                self._voos[chave] = voo_lider
+                tarefa = loop.create_task(self._liderar_async(voo_lider, fabrica_corrotina))
+                self._voos_async[chave_loop] = tarefa
+                self.execucoes += 1
+                tarefa.add_done_callback(
+                    lambda t: self._finalizar_async(chave_loop, voo_lider, t)
+                )
+
+        if voo is not None:
+            # Um Future do loop completado pela thread que termina a busca
+            # (nenhuma thread fica bloqueada esperando por corrotina)
+            futuro = loop.create_future()
+            voo.ao_concluir(_avisar_loop(loop, futuro))
+            await futuro
+            if voo.erro is not None:
+                raise voo.erro
+            return voo.resultado
+
+        return await asyncio.shield(tarefa)
+
+    async def _liderar_async(self, voo, fabrica_corrotina):
+        """Executa a corrotina e guarda o resultado também para as threads."""
+        try:
+            voo.resultado = await fabrica_corrotina()
+            return voo.resultado
+        except BaseException as e:
+            voo.erro = e
+            raise
+
+    def _finalizar_async(self, chave_loop, voo, tarefa):
+        """
+        Limpa a execução e publica o resultado para as threads. Fica no
+        callback da tarefa (e não no finally de _liderar_async) porque uma
+        tarefa cancelada antes do primeiro passo nunca executa o finally.
+        """
+        chave = chave_loop[1]
+        with self._trava:
+            if self._voos_async.get(chave_loop) is tarefa:
+                del self._voos_async[chave_loop]
+            if self._voos.get(chave) is voo:
+                del self._voos[chave]
+
+        if tarefa.cancelled() and voo.erro is None:
+            voo.erro = asyncio.CancelledError()
+        voo.concluir()
+
+        # Marca a exceção como lida, caso todos os pedidos tenham sido cancelados
+        if not tarefa.cancelled():
+            tarefa.exception()
+
+    def em_andamento(self):
+        """Quantidade de execuções em andamento (threads + asyncio)."""
+        with self._trava:
+            return len(self._voos)
+
+    def estatisticas(self):
+        """Retorna os contadores em um dicionário."""
+        with self._trava:
+            return {
+                'execucoes': self.execucoes,
+                'coalescidos': self.coalescidos,
+                'em_andamento': len(self._voos)
+            }
+
+
+# ====== FUNÇÃO DE TESTE ======
+def testar_single_flight():
+    """Testa a coalescência com threads e com asyncio"""
+
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    print("🧪 TESTANDO SINGLE-FLIGHT")
+    print("=" * 50)
+
+    chamadas = []
+
+    def busca_lenta(ticker):
+        chamadas.append(ticker)
+        time.sleep(0.2)
+        return f"notícias de {ticker}"
+
+    voos = SingleFlight()
+
+    print("\n1️⃣ 20 threads pedindo PETR4 ao mesmo tempo:")
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        resultados = list(executor.map(
+            lambda _: voos.executar('PETR4', busca_lenta, 'PETR4'), range(20)
+        ))
+    print(f"   Buscas reais: {len(chamadas)} | Resultados iguais: {len(set(resultados)) == 1}")
+
+    print("\n2️⃣ 20 corrotinas pedindo VALE3 ao mesmo tempo:")
+
+    async def busca_lenta_async():
+        chamadas.append('VALE3')
+        await asyncio.sleep(0.2)
+        return "notícias de VALE3"
+
+    async def varios_pedidos():
+        return await asyncio.gather(*[
+            voos.executar_async('VALE3', busca_lenta_async) for _ in range(20)
+        ])
+
+    resultados = asyncio.run(varios_pedidos())
+    print(f"   Buscas reais: {chamadas.count('VALE3')} | Resultados iguais: {len(set(resultados)) == 1}")
+
+    print("\n3️⃣ 10 threads e 10 corrotinas pedindo ITUB4 ao mesmo tempo:")
+
+    async def busca_itub4_async():
+        return await asyncio.to_thread(busca_lenta, 'ITUB4')
+
+    async def misturados():
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            de_threads = [executor.submit(voos.executar, 'ITUB4', busca_lenta, 'ITUB4') for _ in range(10)]
+            de_corrotinas = await asyncio.gather(*[
+                voos.executar_async('ITUB4', busca_itub4_async) for _ in range(10)
+            ])
+            return de_corrotinas + [futuro.result() for futuro in de_threads]
+
+    resultados = asyncio.run(misturados())
+    print(f"   Buscas reais: {chamadas.count('ITUB4')} | Resultados iguais: {len(set(resultados)) == 1}")
+
+    print("\n4️⃣ 200 corrotinas esperando uma busca de BBDC4 que roda numa thread:")
+
+    async def esperando_thread():
+        threads_antes = threading.active_count()
+        lider = asyncio.get_running_loop().run_in_executor(None, voos.executar, 'BBDC4', busca_lenta, 'BBDC4')
+        await asyncio.sleep(0.05)
+        pedidos = [asyncio.ensure_future(voos.executar_async('BBDC4', busca_lenta_async))
+                   for _ in range(200)]
+        await asyncio.sleep(0.05)
+        threads_durante = threading.active_count()
+        resultados = await asyncio.gather(lider, *pedidos)
+        return threads_durante - threads_antes, resultados
+
+    threads_extras, resultados = asyncio.run(esperando_thread())
+    print(f"   Threads a mais durante a espera: {threads_extras} | "
+          f"Resultados iguais: {len(set(resultados)) == 1}")
+    assert threads_extras <= 1 and len(set(resultados)) == 1
+
+    print("\n5️⃣ Tarefa líder cancelada antes de começar não trava as threads:")
+
+    async def lider_cancelado():
+        pedido = asyncio.ensure_future(voos.executar_async('BBAS3', busca_lenta_async))
+        await asyncio.sleep(0)
+        voos._voos_async[(asyncio.get_running_loop(), 'BBAS3')].cancel()
+        try:
+            await pedido
+        except asyncio.CancelledError:
+            pass
+        await asyncio.sleep(0)
+
+    asyncio.run(lider_cancelado())
+    em_thread = ThreadPoolExecutor(max_workers=1)
+    resultado = em_thread.submit(voos.executar, 'BBAS3', busca_lenta, 'BBAS3').result(timeout=2)
+    em_thread.shutdown()
+    print(f"   Depois do cancelamento, a thread buscou: {resultado!r}")
+
+    print(f"\n📊 Estatísticas: {voos.estatisticas()}")
+
+
+# Executar teste se rodar arquivo diretamente
+if __name__ == "__main__":
+    testar_single_flight()
@@ -0,0 +1,297 @@
+"""
+RESOLUÇÃO APROXIMADA DE TICKERS
+
+Quando o comando não traz um ticker no formato exato (ex: "compra 100
+petrobras", "notícias vale", "venda 50 PETR 4"), tenta descobrir o ticker
+mais provável a partir do nome da empresa ou de um ticker digitado errado.
+
+O índice é montado uma vez a partir do cadastro de tickers:
+- chaves: raiz do ticker (PETR), nome da empresa e as palavras
+  do nome que só aparecem numa empresa (ex: "itau", "vivo")
+- trigramas de cada chave, para achar nomes com erro de digitação
+  (ex: "petrobas") contando trigramas em comum (coeficiente de Dice)
+
+Cada resolução vem com uma confiança entre 0 e 1. Abaixo de
+LIMIAR_CONFIRMACAO o chamador deve pedir confirmação antes de agir.
+
+Exemplo:
+    resolver_ticker("compra 100 petrobras")
+    # Resolucao(ticker='PETR4', empresa='Petrobras', confianca=0.81, trecho='petrobras')
+"""
+
+import re
+import threading
+import unicodedata
+from typing import NamedTuple
+
+try:
+    from .utils.ticker_registry import obter_registro
+except ImportError:
+    from utils.ticker_registry import obter_registro
+
+# Abaixo disso, o ticker encontrado precisa ser confirmado pelo usuário
+LIMIAR_CONFIRMACAO = 0.9
+# Abaixo disso, a resolução é descartada
+CONFIANCA_MINIMA = 0.5
+
+# Palavras de ligação, ignoradas também nos nomes das empresas
+CONECTIVOS = frozenset([
+    'de', 'da', 'do', 'das', 'dos', 'e', 'a', 'o', 'as', 'os', 'sa', 'para'
+])
+
+# Palavras do comando que não fazem parte de nomes de empresas (verbos e
+# substantivos comuns nos pedidos nunca viram chave, mesmo que apareçam
+# num nome, como "quero" em Lojas Quero-Quero)
+PALAVRAS_IGNORADAS = CONECTIVOS | frozenset([
+    'compra', 'comprar', 'compre', 'compro', 'comprando', 'venda', 'vender', 'vende',
+    'vendo', 'vendendo', 'quero', 'queria', 'gostaria', 'preciso', 'pode', 'poderia',
+    'faz', 'fazer', 'faca', 'manda', 'mandar', 'envia', 'enviar', 'executa', 'executar',
+    'noticia', 'noticias', 'news', 'conta', 'acao', 'acoes', 'papel', 'papeis',
+    'ordem', 'ordens', 'lote', 'lotes', 'unidades', 'cotas', 'mercado', 'preco',
+    'eu', 'me', 'mim', 'um', 'uma', 'uns', 'umas', 'no', 'na', 'nos', 'nas', 'em',
+    'por', 'pra', 'pro', 'com', 'sobre', 'favor', 'hoje', 'agora', 'ja', 'mais'
+])
+
+# Quando a empresa tem várias classes, qual escolher primeiro
+PRIORIDADE_CLASSE = {'UNT': 0, 'PN': 1, 'ON': 2, 'PNB': 3, 'PNA': 4}
+
+# Confiança base de cada tipo de chave (antes do desconto por várias classes).
+# Uma palavra solta do nome ("porto", "rede") fica abaixo de
+# LIMIAR_CONFIRMACAO: ordens assim sempre pedem confirmação.
+CONFIANCA_NOME = 0.95
+CONFIANCA_RAIZ = 0.9
+CONFIANCA_PALAVRA = 0.8
+FATOR_FUZZY = 0.9
+FATOR_VARIAS_CLASSES = 0.85
+
+_PADRAO_TICKER_ESPACADO = re.compile(r'\b([a-z][a-z0-9]{3})\s+(\d{1,2})\b')
+_PADRAO_PALAVRA = re.compile(r'[a-z0-9]+')
+
+
+class Resolucao(NamedTuple):
+    """Ticker encontrado para um texto livre."""
+    ticker: str
+    empresa: str
+    confianca: float
+    trecho: str
+
+
+def _normalizar(texto):
+    """Minúsculas e sem acentos (versão enxuta de helpers.normalizar_texto)."""
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    return texto.encode('ascii', 'ignore').decode('ascii')
+
+
+def _trigramas(texto):
+    """Trigramas de ' texto ' (com bordas, para valorizar início e fim)."""
+    texto = f' {texto} '
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class ResolvedorTickers:
+    """
+    Índice de chaves (nomes, palavras e tickers) + índice invertido de
+    trigramas, montados uma vez a partir do cadastro.
+    """
+
+    def __init__(self, registro):
+        self.registro = registro
+
+        # Tickers de cada empresa, na ordem de preferência
+        por_empresa = {}
+        for ticker in registro:
+            instrumento = registro.obter(ticker)
+            por_empresa.setdefault(instrumento.empresa, []).append(instrumento)
+        for instrumentos in por_empresa.values():
+            instrumentos.sort(key=lambda i: (PRIORIDADE_CLASSE.get(i.classe, 9), i.ticker))
+
+        # Chave → (empresa, confiança base). Palavras repetidas em várias
+        # empresas ("banco", "energia") são ambíguas e ficam de fora.
+        chaves = {}
+        donos_palavra = {}
+        for empresa, instrumentos in por_empresa.items():
+            nome = ' '.join(p for p in _PADRAO_PALAVRA.findall(_normalizar(empresa))
+                            if p not in CONECTIVOS)
+            chaves[nome] = (empresa, CONFIANCA_NOME)
+            for palavra in set(nome.split()):
+                if len(palavra) >= 3 and palavra not in PALAVRAS_IGNORADAS:
+                    donos_palavra.setdefault(palavra, set()).add(empresa)
+
+        for palavra, empresas in donos_palavra.items():
+            if len(empresas) == 1 and palavra not in chaves:
+                chaves[palavra] = (next(iter(empresas)), CONFIANCA_PALAVRA)
+
+        for empresa, instrumentos in por_empresa.items():
+            for instrumento in instrumentos:
+                raiz = instrumento.ticker[:4].lower()
+                chaves.setdefault(raiz, (empresa, CONFIANCA_RAIZ))
+
+        self._empresas = {empresa: tuple(instrumentos) for empresa, instrumentos in por_empresa.items()}
+        self._chaves = chaves
+        self._lista_chaves = list(chaves)
+
+        # Índice invertido: trigrama → posições em _lista_chaves
+        self._tamanhos = []
+        self._indice = {}
+        for posicao, chave in enumerate(self._lista_chaves):
+            trigramas = _trigramas(chave)
+            self._tamanhos.append(len(trigramas))
+            for trigrama in trigramas:
+                self._indice.setdefault(trigrama, []).append(posicao)
+
+    def _resolucao(self, empresa, confianca_base, trecho):
+        """Monta a Resolucao escolhendo a classe preferida da empresa."""
+        instrumentos = self._empresas[empresa]
+        confianca = confianca_base
+        if len(instrumentos) > 1:
+            confianca *= FATOR_VARIAS_CLASSES
+        return Resolucao(instrumentos[0].ticker, empresa, round(confianca, 3), trecho)
+
+    def _mais_parecida(self, trecho):
+        """Chave com mais trigramas em comum com o trecho (Dice), e a nota."""
+        trigramas = _trigramas(trecho)
+        contagem = {}
+        for trigrama in trigramas:
+            for posicao in self._indice.get(trigrama, ()):
+                contagem[posicao] = contagem.get(posicao, 0) + 1
+
+        melhor, nota_melhor = None, 0.0
+        for posicao, comuns in contagem.items():
+            nota = 2 * comuns / (len(trigramas) + self._tamanhos[posicao])
+            if nota > nota_melhor:
+                melhor, nota_melhor = posicao, nota
+
+        if melhor is None:
+            return None, 0.0
+        return self._lista_chaves[melhor], nota_melhor
+
+    def resolver(self, texto):
+        """
+        Retorna a Resolucao mais provável para o texto, ou None se nada
+        passar de CONFIANCA_MINIMA.
+        """
+        texto = _normalizar(texto)
+
+        # 1. Ticker com espaço: "PETR 4" → PETR4
+        for raiz, numero in _PADRAO_TICKER_ESPACADO.findall(texto):
+            instrumento = self.registro.obter(raiz + numero)
+            if instrumento:
+                return Resolucao(instrumento.ticker, instrumento.empresa, 1.0, f"{raiz} {numero}")
+
+        palavras = [p for p in _PADRAO_PALAVRA.findall(texto)
+                    if not p.isdigit() and p not in PALAVRAS_IGNORADAS]
+        if not palavras:
+            return None
+
+        # 2. Ticker completo que o analisador não reconhece (ex: B3SA3)
+        for palavra in palavras:
+            instrumento = self.registro.obter(palavra)
+            if instrumento:
+                return Resolucao(instrumento.ticker, instrumento.empresa, 1.0, palavra)
+
+        # 3. Trechos de 1 a 3 palavras iguais a uma chave: vence o tipo de
+        #    chave mais confiável (nome inteiro > raiz > palavra), depois o
+        #    trecho mais longo; a posição no texto não importa
+        melhor = None
+        for tamanho in (3, 2, 1):
+            for inicio in range(len(palavras) - tamanho + 1):
+                trecho = ' '.join(palavras[inicio:inicio + tamanho])
+                encontrado = self._chaves.get(trecho)
+                if encontrado and (melhor is None or (encontrado[1], len(trecho)) > (melhor[1], len(melhor[2]))):
+                    melhor = (encontrado[0], encontrado[1], trecho)
+        if melhor:
+            return self._resolucao(*melhor)
+
+        # 4. Aproximado por trigramas (cada palavra e o texto todo)
+        candidatos = [p for p in palavras if len(p) >= 3]
+        if len(palavras) > 1:
+            candidatos.append(' '.join(palavras))
+
+        melhor = None
+        for trecho in candidatos:
+            chave, nota = self._mais_parecida(trecho)
+            if chave is None:
+                continue
+            empresa, confianca_base = self._chaves[chave]
+            resolucao = self._resolucao(empresa, confianca_base * nota * FATOR_FUZZY, trecho)
+            if melhor is None or resolucao.confianca > melhor.confianca:
+                melhor = resolucao
+
+        if melhor is None or melhor.confianca < CONFIANCA_MINIMA:
+            return None
+        return melhor
+
+
+# ====== RESOLVEDOR PADRÃO ======
+_resolvedor_padrao = None
+_trava_resolvedor = threading.Lock()
+
+
+def obter_resolvedor():
+    """Retorna o resolvedor compartilhado (índice montado na primeira chamada)."""
+    global _resolvedor_padrao
+
+    if _resolvedor_padrao is None:
+        with _trava_resolvedor:
+            if _resolvedor_padrao is None:
+                _resolvedor_padrao = ResolvedorTickers(obter_registro())
+    return _resolvedor_padrao
+
+
+def resolver_ticker(texto):
+    """Atalho: obter_resolvedor().resolver(texto)."""
+    return obter_resolvedor().resolver(texto)
+
+
+# ====== FUNÇÃO DE TESTE ======
+def testar_resolvedor():
+    """Testa a resolução de nomes, tickers espaçados e erros de digitação"""
+
+    import time
+
+    print("🧪 TESTANDO RESOLUÇÃO DE TICKERS")
+    print("=" * 50)
+
+    inicio = time.perf_counter()
+    resolvedor = obter_resolvedor()
+    print(f"\n   Índice montado em {(time.perf_counter() - inicio) * 1000:.1f} ms "
+          f"({len(resolvedor._lista_chaves)} chaves)")
+
+    exemplos = [
+        "compra 100 petrobras",
+        "notícias vale",
+        "venda 50 PETR 4 conta 12345",
+        "compra 200 itaú",
+        "notícias banco do brasil",
+        "compra 10 magazine luisa",
+        "venda 30 petrobas",
+        "compra 5 ambevv",
+        "compra 100 b3sa3",
+        "notícias do mercado",
+        "quero comprar 100 petrobras",
+        "compra 100 rede",
+        "compra 100 porto seguro",
+    ]
+
+    print()
+    for texto in exemplos:
+        resolucao = resolvedor.resolver(texto)
+        if resolucao is None:
+            print(f"   '{texto}' → não encontrado")
+            continue
+        aviso = "" if resolucao.confianca >= LIMIAR_CONFIRMACAO else " (confirmar)"
+        print(f"   '{texto}' → {resolucao.ticker} ({resolucao.empresa}) "
+              f"confiança {resolucao.confianca:.2f}{aviso}")
+
+    repeticoes = 2000
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for texto in exemplos:
+            resolvedor.resolver(texto)
+    duracao = (time.perf_counter() - inicio) / (repeticoes * len(exemplos))
+    print(f"\n   ⏱️  {duracao * 1e6:.1f} µs por mensagem")
+
+
+# Executar teste se rodar arquivo diretamente
+if __name__ == "__main__":
+    testar_resolvedor()
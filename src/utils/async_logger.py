@@ -0,0 +1,309 @@
+"""
+ESCRITOR DE LOG EM SEGUNDO PLANO
+
+Em vez de abrir, escrever e fechar o arquivo de log a cada chamada,
+criar_log só coloca a linha num buffer em memória. Uma thread em segundo
+plano grava as linhas em lote:
+
+- quando o buffer junta tamanho_lote linhas, ou
+- a cada intervalo_segundos, ou
+- ao encerrar o programa (atexit)
+
+Depois de encerrar(), registrar grava a linha na hora (sem a thread),
+para nada se perder no fim do programa.
+
+Também faz rotação dos arquivos por tamanho e por tempo:
+sistema.log → sistema.log.1 → sistema.log.2 ...
+A idade de um arquivo que já existia ao ser aberto vem da data de
+criação (st_birthtime) ou, onde o sistema não informa (Linux), da última
+modificação, como no TimedRotatingFileHandler do logging.
+"""
+
+import atexit
+import os
+import threading
+import time
+from collections import deque
+
+# Configurações padrão
+CAPACIDADE_PADRAO = 10000        # linhas no buffer (as mais antigas são descartadas)
+TAMANHO_LOTE_PADRAO = 200        # grava assim que juntar isso
+INTERVALO_PADRAO_SEGUNDOS = 1.0  # ou depois desse tempo
+MAX_BYTES_PADRAO = 10 * 1024 * 1024
+ROTACAO_PADRAO_SEGUNDOS = 24 * 60 * 60
+MAX_ARQUIVOS_PADRAO = 5
+
+
+class EscritorLogAssincrono:
+    """
+    Buffer circular de linhas de log + thread que grava em lote,
+    com rotação por tamanho e por tempo.
+    """
+
+    def __init__(self, capacidade=CAPACIDADE_PADRAO, tamanho_lote=TAMANHO_LOTE_PADRAO,
+                 intervalo_segundos=INTERVALO_PADRAO_SEGUNDOS, max_bytes=MAX_BYTES_PADRAO,
+                 rotacao_segundos=ROTACAO_PADRAO_SEGUNDOS, max_arquivos=MAX_ARQUIVOS_PADRAO):
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_segundos = intervalo_segundos
+        self.max_bytes = max_bytes
+        self.rotacao_segundos = rotacao_segundos
+        self.max_arquivos = max_arquivos
+
+        self._buffer = deque(maxlen=capacidade)  # (arquivo, linha)
+        self._condicao = threading.Condition()
+        self._trava_escrita = threading.Lock()
+        self._abertos = {}  # arquivo → (handle, criado_em)
+        self._encerrado = False
+
+        # Contadores
+        self.linhas_gravadas = 0
+        self.descartadas = 0
+        self.gravacoes = 0
+        self.rotacoes = 0
+        self.erros = 0
+
+        self._thread = threading.Thread(target=self._laco, name='escritor-log', daemon=True)
+        self._thread.start()
+        atexit.register(self.encerrar)
+
+    def registrar(self, arquivo, linha):
+        """
+        Coloca uma linha no buffer (não toca no disco). Depois de
+        encerrar(), grava na hora e fecha o arquivo.
+        """
+        with self._condicao:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.descartadas += 1
+            self._buffer.append((arquivo, linha))
+
+            encerrado = self._encerrado
+            if not encerrado and len(self._buffer) >= self.tamanho_lote:
+                self._condicao.notify()
+
+        if encerrado:
+            self.descarregar()
+            self._fechar_arquivos()
+
+    def _laco(self):
+        """Thread em segundo plano: espera lote ou intervalo e grava."""
+        while True:
+            with self._condicao:
+                if not self._encerrado and len(self._buffer) < self.tamanho_lote:
+                    self._condicao.wait(self.intervalo_segundos)
+                encerrado = self._encerrado
+
+            self.descarregar()
+
+            if encerrado:
+                return
+
+    def descarregar(self):
+        """Grava agora tudo o que está no buffer."""
+        with self._condicao:
+            if not self._buffer:
+                return
+            pendentes = list(self._buffer)
+            self._buffer.clear()
+
+        # Agrupa por arquivo para uma única escrita por arquivo
+        por_arquivo = {}
+        for arquivo, linha in pendentes:
+            por_arquivo.setdefault(arquivo, []).append(linha)
+
+        with self._trava_escrita:
+            for arquivo, linhas in por_arquivo.items():
+                try:
+                    handle = self._obter_handle(arquivo)
+                    if self._antigo_demais(arquivo):
+                        # As linhas novas já vão para o arquivo do novo período
+                        self._rotacionar(arquivo)
+                        handle = self._obter_handle(arquivo)
+                    handle.write(''.join(linhas))
+                    handle.flush()
+                    self.linhas_gravadas += len(linhas)
+                    self.gravacoes += 1
+                    if self.max_bytes and handle.tell() >= self.max_bytes:
+                        self._rotacionar(arquivo)
+                except Exception as e:
+                    self.erros += 1
+                    print(f"❌ Erro ao criar log: {e}")
+
+    def _obter_handle(self, arquivo):
+        """Mantém o arquivo aberto entre gravações (chamar com _trava_escrita)."""
+        aberto = self._abertos.get(arquivo)
+        if aberto is not None:
+            return aberto[0]
+
+        pasta = os.path.dirname(arquivo)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+
+        # A idade conta desde a criação do arquivo, não desde que foi aberto
+        # aqui (senão cada reinício do programa zeraria o relógio)
+        try:
+            estado = os.stat(arquivo)
+            criado_em = getattr(estado, 'st_birthtime', estado.st_mtime) if estado.st_size else time.time()
+        except FileNotFoundError:
+            criado_em = time.time()
+
+        handle = open(arquivo, 'a', encoding='utf-8')
+        self._abertos[arquivo] = (handle, criado_em)
+        return handle
+
+    def _antigo_demais(self, arquivo):
+        """O arquivo passou de rotacao_segundos de idade (chamar com _trava_escrita)."""
+        _, criado_em = self._abertos[arquivo]
+        return bool(self.rotacao_segundos) and time.time() - criado_em >= self.rotacao_segundos
+
+    def _rotacionar(self, arquivo):
+        """Fecha e roda o arquivo (chamar com _trava_escrita)."""
+        handle, _ = self._abertos[arquivo]
+        handle.close()
+        del self._abertos[arquivo]
+
+        # sistema.log.4 → .5, ..., sistema.log → sistema.log.1
+        for indice in range(self.max_arquivos - 1, 0, -1):
+            origem = f"{arquivo}.{indice}"
+            if os.path.exists(origem):
+                os.replace(origem, f"{arquivo}.{indice + 1}")
+        if os.path.exists(arquivo):
+            os.replace(arquivo, f"{arquivo}.1")
+
+        # Remove o que passou do limite de arquivos guardados
+        excedente = f"{arquivo}.{self.max_arquivos + 1}"
+        if os.path.exists(excedente):
+            os.remove(excedente)
+
+        self.rotacoes += 1
+
+    def encerrar(self):
+        """Grava o que falta, para a thread e fecha os arquivos."""
+        with self._condicao:
+            if self._encerrado:
+                return
+            self._encerrado = True
+            self._condicao.notify()
+
+        self._thread.join(timeout=5)
+        self.descarregar()
+        self._fechar_arquivos()
+
+    def _fechar_arquivos(self):
+        with self._trava_escrita:
+            for handle, _ in self._abertos.values():
+                handle.close()
+            self._abertos.clear()
+
+    def estatisticas(self):
+        """Retorna os contadores do escritor."""
+        with self._condicao:
+            pendentes = len(self._buffer)
+        return {
+            'pendentes': pendentes,
+            'linhas_gravadas': self.linhas_gravadas,
+            'gravacoes': self.gravacoes,
+            'descartadas': self.descartadas,
+            'rotacoes': self.rotacoes,
+            'erros': self.erros
+        }
+
+
+# ====== ESCRITOR PADRÃO ======
+_escritor_padrao = None
+_trava_escritor = threading.Lock()
+
+
+def obter_escritor_log():
+    """Retorna o escritor compartilhado (a thread só nasce no primeiro log)."""
+    global _escritor_padrao
+
+    if _escritor_padrao is None:
+        with _trava_escritor:
+            if _escritor_padrao is None:
+                _escritor_padrao = EscritorLogAssincrono()
+    return _escritor_padrao
+
+
+def configurar_escritor_log(**opcoes):
+    """
+    Troca o escritor compartilhado por um com outras opções
+    (o anterior grava o que tem pendente e é encerrado).
+
+    Exemplo: configurar_escritor_log(max_bytes=1024 * 1024, max_arquivos=3)
+    """
+    global _escritor_padrao
+
+    with _trava_escritor:
+        if _escritor_padrao is not None:
+            _escritor_padrao.encerrar()
+        _escritor_padrao = EscritorLogAssincrono(**opcoes)
+        return _escritor_padrao
+
+
+# ====== FUNÇÃO DE TESTE ======
+def testar_escritor_log():
+    """Testa buffer cheio, gravação ao encerrar e rotação por tamanho e por tempo"""
+
+    import tempfile
+
+    print("🧪 TESTANDO ESCRITOR DE LOG EM SEGUNDO PLANO")
+    print("=" * 50)
+
+    def ler(caminho):
+        with open(caminho, encoding='utf-8') as arquivo:
+            return arquivo.read().splitlines()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        # Intervalo longo: nada é gravado sem descarregar() ou encerrar()
+        print("\n1️⃣ Buffer de 5 linhas recebe 8: as 3 mais antigas são descartadas:")
+        caminho = os.path.join(pasta, 'cheio.log')
+        escritor = EscritorLogAssincrono(capacidade=5, tamanho_lote=100, intervalo_segundos=60)
+        for numero in range(8):
+            escritor.registrar(caminho, f"linha {numero}\n")
+        escritor.descarregar()
+        print(f"   Gravadas: {ler(caminho)} | descartadas: {escritor.descartadas}")
+        assert ler(caminho) == [f"linha {numero}" for numero in range(3, 8)]
+        escritor.encerrar()
+
+        print("\n2️⃣ encerrar() grava o que está no buffer; depois dele, a linha vai direto:")
+        caminho = os.path.join(pasta, 'encerrar.log')
+        escritor = EscritorLogAssincrono(tamanho_lote=100, intervalo_segundos=60)
+        for numero in range(3):
+            escritor.registrar(caminho, f"linha {numero}\n")
+        pendentes = escritor.estatisticas()['pendentes']
+        escritor.encerrar()
+        escritor.registrar(caminho, "depois do encerrar\n")
+        print(f"   Pendentes antes: {pendentes} | no arquivo: {ler(caminho)}")
+        assert ler(caminho) == ['linha 0', 'linha 1', 'linha 2', 'depois do encerrar']
+
+        print("\n3️⃣ Rotação por tamanho (30 bytes por arquivo, guarda 2):")
+        caminho = os.path.join(pasta, 'tamanho.log')
+        escritor = EscritorLogAssincrono(tamanho_lote=100, intervalo_segundos=60,
+                                         max_bytes=30, max_arquivos=2)
+        for numero in range(8):
+            escritor.registrar(caminho, f"linha {numero:02d} ..........\n")
+            escritor.descarregar()
+        escritor.encerrar()
+        arquivos = sorted(nome for nome in os.listdir(pasta) if nome.startswith('tamanho'))
+        print(f"   Arquivos: {arquivos} | rotações: {escritor.rotacoes}")
+        assert arquivos == ['tamanho.log.1', 'tamanho.log.2'] and escritor.rotacoes == 4
+
+        print("\n4️⃣ Rotação por tempo conta a idade do arquivo, não da abertura:")
+        caminho = os.path.join(pasta, 'tempo.log')
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            arquivo.write("linha de ontem\n")
+        uma_hora_atras = time.time() - 3600
+        os.utime(caminho, (uma_hora_atras, uma_hora_atras))
+
+        escritor = EscritorLogAssincrono(tamanho_lote=100, intervalo_segundos=60, rotacao_segundos=60)
+        escritor.registrar(caminho, "linha de hoje\n")
+        escritor.encerrar()
+        print(f"   tempo.log: {ler(caminho)} | tempo.log.1: {ler(caminho + '.1')}")
+        assert ler(caminho) == ['linha de hoje'] and ler(caminho + '.1') == ['linha de ontem']
+
+    print(f"\n📊 Estatísticas: {escritor.estatisticas()}")
+
+
+# Executar teste se rodar arquivo diretamente
+if __name__ == "__main__":
+    testar_escritor_log()
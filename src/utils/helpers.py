@@ -11,6 +11,13 @@ from datetime import datetime
 import os
 import sys
 
+try:
+    from .async_logger import obter_escritor_log
+    from .ticker_registry import obter_registro
+except ImportError:
+    from async_logger import obter_escritor_log
+    from ticker_registry import obter_registro
+
 # ====== FUNÇÕES DE TEXTO ======
 
 def normalizar_texto(texto):
@@ -82,8 +89,10 @@ def extrair_primeiro_numero(texto):
 
 def validar_ticker(ticker):
     """
-    Valida se um ticker tem formato correto.
-    Formato esperado: 4 letras + 1-2 números (ex: PETR4, B3SA3)
+    Valida um ticker da B3 (ex: PETR4, B3SA3, BOVA11). Se está no cadastro,
+    é válido. Se não está, só é recusado quando o cadastro é a lista
+    completa da B3; com a lista parcial padrão (sem ETFs, FIIs e BDRs)
+    vale o formato, e quem chama pode avisar com ticker_no_cadastro.
     
     Retorna (True, ticker_normalizado) ou (False, mensagem_erro)
     """
@@ -93,13 +102,23 @@ def validar_ticker(ticker):
     # Converter para string e maiúsculas
     ticker_str = str(ticker).strip().upper()
     
+    # Consulta ao índice de instrumentos listados
+    if obter_registro().esta_listado(ticker_str):
+        return True, ticker_str
+    
     # Verificar formato com regex
     padrao = r'^[A-Z]{4}\d{1,2}$'
     
-    if re.match(padrao, ticker_str):
-        return True, ticker_str
-    else:
+    if not re.match(padrao, ticker_str):
         return False, f"Formato inválido: {ticker}. Use: 4 letras + 1-2 números (ex: PETR4)"
+    if obter_registro().completo:
+        return False, f"Ticker não listado na B3: {ticker_str}"
+    return True, ticker_str
+
+
+def ticker_no_cadastro(ticker):
+    """True se o ticker está no cadastro local de instrumentos."""
+    return bool(ticker) and obter_registro().esta_listado(str(ticker).strip().upper())
 
 
 def validar_quantidade(quantidade):
@@ -156,6 +175,21 @@ def formatar_moeda(valor, simbolo='R$'):
         return f"{simbolo} 0,00"
 
 
+# ====== FUNÇÕES DE ESTATÍSTICA ======
+
+def percentil(valores_ordenados, percentual):
+    """
+    Percentil simples (vizinho mais próximo) de uma lista já ordenada.
+    Retorna None para lista vazia.
+    
+    Exemplo: percentil([1, 2, 3, 4], 50) → 3
+    """
+    if not valores_ordenados:
+        return None
+    indice = min(len(valores_ordenados) - 1, int(len(valores_ordenados) * percentual / 100))
+    return valores_ordenados[indice]
+
+
 # ====== FUNÇÕES DE LOG ======
 
 def criar_log(mensagem, tipo='INFO', arquivo_log='logs/sistema.log'):
@@ -163,22 +197,27 @@ def criar_log(mensagem, tipo='INFO', arquivo_log='logs/sistema.log'):
     Cria uma entrada de log formatada.
     
     Tipos: INFO, WARNING, ERROR, SUCCESS
-    """
-    # Criar pasta logs se não existir
-    os.makedirs(os.path.dirname(arquivo_log), exist_ok=True)
     
+    A linha vai para um buffer em memória e é gravada em lote por uma
+    thread em segundo plano (ver utils/async_logger.py). Use
+    descarregar_logs() para forçar a gravação imediata.
+    """
     timestamp = formatar_data_hora()
     linha_log = f"[{timestamp}] [{tipo}] {mensagem}\n"
     
     try:
-        with open(arquivo_log, 'a', encoding='utf-8') as f:
-            f.write(linha_log)
+        obter_escritor_log().registrar(arquivo_log, linha_log)
         return True
     except Exception as e:
         print(f"❌ Erro ao criar log: {e}")
         return False
 
 
+def descarregar_logs():
+    """Grava imediatamente todas as linhas de log pendentes."""
+    obter_escritor_log().descarregar()
+
+
 def log_comando(comando, resultado, usuario='SISTEMA'):
     """
     Log específico para comandos do assistente.
@@ -208,22 +247,32 @@ def pausar_execucao(segundos=2):
     time.sleep(segundos)
 
 
-def mostrar_progresso(etapa, total_etapas, texto=""):
+def mostrar_progresso(etapa, total_etapas, texto="", arquivo=None):
     """
     Mostra uma barra de progresso simples no terminal.
     
     Exemplo: [=====>     ] 50% Buscando notícias...
+    
+    Se total_etapas for None (total desconhecido, ex: leitura de stdin),
+    mostra apenas a contagem de etapas concluídas.
+    Use arquivo=sys.stderr para não misturar a barra com a saída do programa.
     """
+    arquivo = arquivo or sys.stdout
+    
+    if not total_etapas:
+        print(f"\r[{etapa}] {texto}", end='', flush=True, file=arquivo)
+        return
+    
     percentual = int((etapa / total_etapas) * 100)
     barras = int(percentual / 5)  # 20 caracteres = 100%
     espacos = 20 - barras
     
     barra = "[" + "=" * barras + ">" + " " * espacos + "]"
     
-    print(f"\r{barra} {percentual}% {texto}", end='', flush=True)
+    print(f"\r{barra} {percentual}% {texto}", end='', flush=True, file=arquivo)
     
     if etapa == total_etapas:
-        print()  # Nova linha ao finalizar
+        print(file=arquivo)  # Nova linha ao finalizar
 
 
 # ====== FUNÇÃO DE TESTE ======
@@ -244,7 +293,7 @@ def testar_helpers():
     
     # Teste 2: Validar ticker
     print("\n2️⃣ Teste: validar_ticker()")
-    tickers = ["PETR4", "XYZ", "ABCD123", "VALE3", "1234"]
+    tickers = ["PETR4", "XYZ", "ABCD123", "VALE3", "1234", "XYZW9", "B3SA3", "BOVA11", "AAPL34"]
     for ticker in tickers:
         valido, mensagem = validar_ticker(ticker)
         status = "✅" if valido else "❌"
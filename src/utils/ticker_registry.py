@@ -0,0 +1,259 @@
+"""
+CADASTRO DE TICKERS DA B3
+
+Carrega UMA vez a lista de instrumentos (ticker, empresa, classe, ISIN) de
+um arquivo local (CSV ou JSON) e guarda numa estrutura somente leitura:
+
+- obter(ticker): busca direta por dicionário, O(1)
+- buscar_prefixo("PETR"): tickers que começam com o prefixo (bisect numa
+  tupla ordenada)
+- query_noticias(ticker): query de busca de notícias já montada na carga
+- esta_listado(ticker): confere se o ticker existe usando um índice
+  compacto (IndiceInstrumentos, ~4 bytes por instrumento); só quando
+  o cadastro é completo (completo=True) um ticker de fora conta como
+  "não listado"
+
+O arquivo padrão é src/dados/instrumentos_b3.csv, com as colunas
+ticker,empresa,classe,isin. É uma lista PARCIAL, montada à mão: só as
+ações (ON/PN) e units mais negociadas, sem ETFs, FIIs nem BDRs, e com a
+coluna isin vazia. Serve para nomes de empresa e queries de notícia, mas
+não como prova de que um ticker não existe. Para usar a lista oficial
+completa da B3 basta exportá-la no mesmo formato e carregá-la com
+configurar_registro.
+
+Exemplo:
+    registro = obter_registro()
+    registro.obter('PETR4').empresa   # 'Petrobras'
+    registro.buscar_prefixo('ITU')    # ('ITUB3', 'ITUB4')
+"""
+
+import bisect
+import csv
+from array import array
+import json
+import os
+import threading
+from types import MappingProxyType
+from typing import NamedTuple
+
+# Arquivo padrão com a lista de instrumentos
+ARQUIVO_INSTRUMENTOS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'dados', 'instrumentos_b3.csv'
+)
+
+# Mesmo formato que criar_query_noticias sempre usou
+MODELO_QUERY = '{empresa} OR {ticker} "ações" OR "resultados" OR "dividendos"'
+
+
+class Instrumento(NamedTuple):
+    """Um instrumento listado (tupla imutável e compacta)."""
+    ticker: str
+    empresa: str
+    classe: str
+    isin: str
+    query: str
+
+
+class IndiceInstrumentos:
+    """
+    Índice compacto de existência: cada ticker vira um inteiro de 32 bits
+    (4 caracteres em base 36 + número da classe) guardado num array
+    ordenado. Consultar é codificar o ticker e fazer uma busca binária
+    (~8 comparações para a lista da B3), sem criar objetos.
+    """
+
+    __slots__ = ('_codigos',)
+
+    def __init__(self, tickers):
+        codigos = {codificar_ticker(ticker) for ticker in tickers}
+        codigos.discard(None)
+        self._codigos = array('I', sorted(codigos))
+
+    def __contains__(self, ticker):
+        codigo = codificar_ticker(ticker)
+        if codigo is None:
+            return False
+        posicao = bisect.bisect_left(self._codigos, codigo)
+        return posicao < len(self._codigos) and self._codigos[posicao] == codigo
+
+    def __len__(self):
+        return len(self._codigos)
+
+    def tamanho_bytes(self):
+        """Memória usada pelos códigos."""
+        return len(self._codigos) * self._codigos.itemsize
+
+
+def codificar_ticker(ticker):
+    """
+    PETR4 → inteiro único. Os 4 primeiros caracteres (letras ou dígitos,
+    ex: B3SA) em base 36 e o número final (1-99) nas duas últimas casas.
+    Retorna None se o ticker não tiver esse formato (o número só com
+    dígitos ASCII e sem zero à esquerda, para PETR04 não virar PETR4).
+    """
+    ticker = str(ticker).strip().upper()
+    if not 5 <= len(ticker) <= 6 or not ticker.isascii():
+        return None
+
+    raiz, numero = ticker[:4], ticker[4:]
+    if not raiz.isalnum() or not numero.isdigit() or numero[0] == '0':
+        return None
+
+    return int(raiz, 36) * 100 + int(numero)
+
+
+class RegistroTickers:
+    """
+    Cadastro somente leitura de instrumentos, montado uma única vez.
+    """
+
+    __slots__ = ('_por_ticker', '_ordenados', 'indice', 'completo')
+
+    def __init__(self, linhas, completo=False):
+        """
+        linhas: iterável de dicionários com ticker, empresa, classe e isin.
+        completo: True se as linhas são a lista inteira da B3 (ações, ETFs,
+        FIIs, BDRs); só então ficar de fora quer dizer "não listado".
+        """
+        por_ticker = {}
+        for linha in linhas:
+            ticker = linha['ticker'].strip().upper()
+            empresa = (linha.get('empresa') or '').strip() or ticker
+            por_ticker[ticker] = Instrumento(
+                ticker=ticker,
+                empresa=empresa,
+                classe=(linha.get('classe') or '').strip(),
+                isin=(linha.get('isin') or '').strip(),
+                query=MODELO_QUERY.format(empresa=empresa, ticker=ticker)
+            )
+
+        self._por_ticker = MappingProxyType(por_ticker)
+        self._ordenados = tuple(sorted(por_ticker))
+        self.indice = IndiceInstrumentos(self._ordenados)
+        self.completo = completo
+
+    def obter(self, ticker):
+        """Retorna o Instrumento do ticker, ou None se não estiver cadastrado."""
+        if not ticker:
+            return None
+        return self._por_ticker.get(str(ticker).strip().upper())
+
+    def __contains__(self, ticker):
+        return self.obter(ticker) is not None
+
+    def __len__(self):
+        return len(self._ordenados)
+
+    def __iter__(self):
+        return iter(self._ordenados)
+
+    def buscar_prefixo(self, prefixo, limite=None):
+        """Tickers (em ordem) que começam com o prefixo informado."""
+        prefixo = str(prefixo).strip().upper()
+        inicio = bisect.bisect_left(self._ordenados, prefixo)
+        fim = bisect.bisect_left(self._ordenados, prefixo + '\uffff', lo=inicio)
+        if limite is not None:
+            fim = min(fim, inicio + limite)
+        return self._ordenados[inicio:fim]
+
+    def esta_listado(self, ticker):
+        """True se o ticker existe no cadastro (consulta pelo índice compacto)."""
+        return bool(ticker) and ticker in self.indice
+
+    def nome_empresa(self, ticker):
+        """Nome da empresa do ticker, ou None se não estiver cadastrado."""
+        instrumento = self.obter(ticker)
+        return instrumento.empresa if instrumento else None
+
+    def query_noticias(self, ticker):
+        """Query de notícias pré-montada, ou None se o ticker não estiver cadastrado."""
+        instrumento = self.obter(ticker)
+        return instrumento.query if instrumento else None
+
+
+def carregar_registro(caminho=ARQUIVO_INSTRUMENTOS, completo=False):
+    """
+    Lê a lista de instrumentos de um arquivo CSV ou JSON (lista de objetos)
+    e monta um RegistroTickers (completo=True só para a lista oficial inteira).
+    """
+    with open(caminho, 'r', encoding='utf-8') as f:
+        if caminho.lower().endswith('.json'):
+            linhas = json.load(f)
+        else:
+            linhas = list(csv.DictReader(f))
+
+    return RegistroTickers(linhas, completo)
+
+
+# ====== REGISTRO PADRÃO ======
+_registro_padrao = None
+_trava_registro = threading.Lock()
+
+
+def obter_registro():
+    """Retorna o cadastro compartilhado (o arquivo só é lido na primeira chamada)."""
+    global _registro_padrao
+
+    if _registro_padrao is None:
+        with _trava_registro:
+            if _registro_padrao is None:
+                _registro_padrao = carregar_registro()
+    return _registro_padrao
+
+
+def configurar_registro(caminho, completo=False):
+    """
+    Troca o cadastro compartilhado por um lido de outro arquivo. Com a
+    lista oficial completa da B3 exportada em CSV, passe completo=True
+    para que tickers de fora sejam recusados por validar_ticker.
+    """
+    global _registro_padrao
+
+    with _trava_registro:
+        _registro_padrao = carregar_registro(caminho, completo)
+        return _registro_padrao
+
+
+# ====== FUNÇÃO DE TESTE ======
+def testar_registro():
+    """Testa busca direta, por prefixo e as queries pré-montadas"""
+
+    import time
+
+    print("🧪 TESTANDO CADASTRO DE TICKERS")
+    print("=" * 50)
+
+    registro = obter_registro()
+    print(f"\n   Instrumentos carregados: {len(registro)}")
+
+    for ticker in ['PETR4', 'vale3', 'TAEE11', 'XYZW9']:
+        instrumento = registro.obter(ticker)
+        if instrumento:
+            print(f"   {ticker:<7} → {instrumento.empresa} ({instrumento.classe}, {instrumento.isin or 'sem ISIN'})")
+        else:
+            print(f"   {ticker:<7} → não cadastrado")
+
+    print(f"\n   Prefixo 'ITU': {registro.buscar_prefixo('ITU')}")
+    print(f"   Prefixo 'BB':  {registro.buscar_prefixo('BB')}")
+    print(f"   Query PETR4:   {registro.query_noticias('PETR4')}")
+    print(f"   Listados: PETR4={registro.esta_listado('PETR4')} "
+          f"B3SA3={registro.esta_listado('B3SA3')} XYZW9={registro.esta_listado('XYZW9')}")
+    print(f"   Índice: {len(registro.indice)} códigos em {registro.indice.tamanho_bytes()} bytes")
+
+    inicio = time.perf_counter()
+    for _ in range(100000):
+        registro.query_noticias('PETR4')
+    duracao = (time.perf_counter() - inicio) / 100000
+    print(f"\n   ⏱️  query_noticias: {duracao * 1e6:.2f} µs por chamada")
+
+    inicio = time.perf_counter()
+    for _ in range(100000):
+        registro.esta_listado('XYZW9')
+    duracao = (time.perf_counter() - inicio) / 100000
+    print(f"   ⏱️  esta_listado: {duracao * 1e6:.2f} µs por chamada")
+
+
+# Executar teste se rodar arquivo diretamente
+if __name__ == "__main__":
+    testar_registro()